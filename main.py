@@ -22,10 +22,8 @@
 import argparse
 import json
 import pprint
-import numpy as np
 
 from rearrangement import DATA_PATH
-from rearrangement import placement, planning
 
 
 def main(
@@ -36,6 +34,9 @@ def main(
     verbose,
     camera_distance,
     name,
+    workers=0,
+    transition="physics",
+    geometry_cache=None,
 ):
     """
     Simple function to show minimal usage.
@@ -56,9 +57,25 @@ def main(
         Distance of camera from center of surface.
     name : str
         Filename base to use for debug files.
+    workers : int
+        Number of worker processes for placement generation and for resolving
+        the collisions of candidate plans.
+    transition : str
+        How collisions are resolved: 'physics' or 'separation'.
+    geometry_cache : str
+        Path to a JSON file caching the geometries of URDF files across runs;
+        None keeps them in memory.
 
     """
 
+    # Heavy dependencies are only loaded once there is a query to solve
+    import numpy as np
+
+    from rearrangement import placement, planning
+    from rearrangement.physics import get_geometry_cache
+
+    get_geometry_cache(geometry_cache)
+
     # Use a seed for reproducibility
     np.random.seed(random_seed)
 
@@ -73,6 +90,8 @@ def main(
         name=name,
         verbose=verbose,
         camera_distance=camera_distance,
+        workers=workers,
+        transition=transition,
     )
 
     # Rearrangement Planning
@@ -83,6 +102,7 @@ def main(
         verbose=verbose,
         camera_distance=camera_distance,
         new=False,
+        workers=workers,
     )
 
     # Show the resulting plan
@@ -165,6 +185,27 @@ if __name__ == "__main__":
         default="outer",
         type=str,
     )
+    PARSER.add_argument(
+        "--workers",
+        "-w",
+        help="Number of worker processes for placement and plan repair",
+        default=0,
+        type=int,
+    )
+    PARSER.add_argument(
+        "--transition",
+        "-t",
+        help="How collisions are resolved: 'physics' or 'separation'",
+        default="physics",
+        type=str,
+    )
+    PARSER.add_argument(
+        "--geometry_cache",
+        "-g",
+        help="JSON file caching the geometries of URDF files across runs",
+        default=None,
+        type=str,
+    )
     ARGS = PARSER.parse_args()
 
     main(
@@ -175,4 +216,7 @@ if __name__ == "__main__":
         verbose=str_to_bool(ARGS.verbose),
         camera_distance=ARGS.camera_distance,
         name=ARGS.name,
+        workers=ARGS.workers,
+        transition=ARGS.transition,
+        geometry_cache=ARGS.geometry_cache,
     )
@@ -30,6 +30,16 @@ DATA_PATH = abspath(LIB_PATH + "/data")
 TEMP_PATH = abspath(LIB_PATH + "/temp")
 DEBUG_PATH = abspath(LIB_PATH + "/debug")
 
-for path in [TEMP_PATH, DEBUG_PATH]:
-    if not isdir(path):
-        makedirs(path)
+
+def make_dirs(*paths):
+    """Creates the directories that do not exist yet. TEMP_PATH and DEBUG_PATH
+    are created when files are first written to them rather than on import."""
+
+    for path in paths:
+        if not isdir(path):
+            try:
+                makedirs(path)
+            except OSError:
+                # Another process may have created it in the meantime
+                if not isdir(path):
+                    raise
@@ -13,8 +13,37 @@
 """
 
 
-from rearrangement.physics.utils import to_euler, to_quaternion
-from rearrangement.physics.constraint import Constraint
+from rearrangement.physics.utils import (
+    to_euler,
+    to_quaternion,
+    to_eulers,
+    to_quaternions,
+    to_local_aabb,
+    to_world_aabb,
+    get_overlapping_pairs,
+)
+from rearrangement.physics.constraint import (
+    Constraint,
+    CompiledConstraints,
+    project_poses,
+    pack_geometry,
+    unpack_geometry,
+)
+from rearrangement.physics.stats import Stats, register_stats, count_call
+from rearrangement.physics.writer import ImageWriter
+from rearrangement.physics.footprint import Footprint, load_footprint
+from rearrangement.physics.geometry import (
+    Geometry,
+    GeometryCache,
+    get_geometry_cache,
+)
+from rearrangement.physics.occupancy import Occupancy
+from rearrangement.physics.analytic import (
+    get_penetration_matrix,
+    separate_footprints,
+)
 from rearrangement.physics.body import Body
+from rearrangement.physics.scene import Scene
 from rearrangement.physics.configuration import Configuration
 from rearrangement.physics.engine import Engine
+from rearrangement.physics.pool import EnginePool, EnginePickler, EngineUnpickler
@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    Analytic Collision Checking
+
+    Functions that compute the penetration depths between bodies from their
+    footprints in batch, using the separating axis theorem for boxes and closed
+    forms for discs, and that push bodies out of collision along their
+    penetrations. No physics engine is needed.
+
+    Primitives are extruded along the z-axis (see Footprint), and two of them
+    collide if they overlap both in the plane and along the z-axis. Spheres are
+    therefore checked as cylinders as tall as they are wide: spheres stacked
+    with a horizontal offset, which only touch in the physics engine, report a
+    penetration as deep as the overlap of their heights. Bodies made of spheres
+    resting on each other should be checked by the physics engine instead.
+
+    Author: Abdul Rahman Dabbour
+    Affiliation: CogRobo Lab, FENS, Sabanci University
+    License: GNU Affero General Public License v3.0
+    Repository: https://github.com/ardabbour/rearrangement/
+"""
+
+import numpy as np
+
+from rearrangement.physics.constraint import CompiledConstraints
+
+
+def place_footprints(footprints, poses, z_offs):
+    """
+    Transforms footprints to the world frame.
+
+    Parameters
+    ----------
+    footprints : list
+        the Footprint of each body.
+    poses : array_like
+        (n, 3) array of the [x, y, yaw] pose of each body.
+    z_offs : array_like
+        (n,) array of the z position of each body.
+
+    Returns
+    -------
+    primitives : dict
+        'owner', 'centers', 'yaws', 'extents', 'discs', and 'heights' arrays
+        describing all primitives in the world frame, where 'owner' is the index
+        of the body each primitive belongs to.
+    """
+
+    poses = np.asarray(poses, dtype=float).reshape(-1, 3)
+    z_offs = np.asarray(z_offs, dtype=float).reshape(-1)
+
+    owner = np.concatenate([np.full(len(x), i) for i, x in enumerate(footprints)])
+    centers = np.concatenate([x.centers for x in footprints])
+    yaws = poses[owner, 2]
+    cos, sin = np.cos(yaws), np.sin(yaws)
+
+    return {
+        "owner": owner,
+        "centers": np.stack(
+            [
+                poses[owner, 0] + (cos * centers[:, 0]) - (sin * centers[:, 1]),
+                poses[owner, 1] + (sin * centers[:, 0]) + (cos * centers[:, 1]),
+            ],
+            axis=1,
+        ),
+        "yaws": yaws + np.concatenate([x.yaws for x in footprints]),
+        "extents": np.concatenate([x.extents for x in footprints]),
+        "discs": np.concatenate([x.discs for x in footprints]),
+        "heights": z_offs[owner][:, None]
+        + np.concatenate([x.heights for x in footprints]),
+    }
+
+
+def _box_box(c_a, yaw_a, e_a, c_b, yaw_b, e_b):
+    """Returns the penetration depths of pairs of boxes along their separating
+    axes with the least overlap, and those axes oriented from a to b."""
+
+    axes = [
+        np.stack([np.cos(yaw_a), np.sin(yaw_a)], axis=1),
+        np.stack([-np.sin(yaw_a), np.cos(yaw_a)], axis=1),
+        np.stack([np.cos(yaw_b), np.sin(yaw_b)], axis=1),
+        np.stack([-np.sin(yaw_b), np.cos(yaw_b)], axis=1),
+    ]
+    dist = c_b - c_a
+
+    overlaps, signs = [], []
+    for axis in axes:
+        r_a = (e_a[:, 0] * np.abs(np.sum(axis * axes[0], axis=1))) + (
+            e_a[:, 1] * np.abs(np.sum(axis * axes[1], axis=1))
+        )
+        r_b = (e_b[:, 0] * np.abs(np.sum(axis * axes[2], axis=1))) + (
+            e_b[:, 1] * np.abs(np.sum(axis * axes[3], axis=1))
+        )
+        projection = np.sum(dist * axis, axis=1)
+        overlaps.append(r_a + r_b - np.abs(projection))
+        signs.append(np.where(projection < 0, -1.0, 1.0))
+
+    best = np.argmin(overlaps, axis=0)
+    rows = np.arange(len(best))
+    normals = np.stack(axes)[best, rows] * np.stack(signs)[best, rows][:, None]
+
+    return np.stack(overlaps)[best, rows], normals
+
+
+def _box_disc(c_box, yaw_box, e_box, c_disc, radius):
+    """Returns the penetration depths of pairs of boxes and discs, and the
+    directions in which the discs are pushed out of the boxes."""
+
+    cos, sin = np.cos(yaw_box), np.sin(yaw_box)
+    dist = c_disc - c_box
+    local = np.stack(
+        [
+            (cos * dist[:, 0]) + (sin * dist[:, 1]),
+            (cos * dist[:, 1]) - (sin * dist[:, 0]),
+        ],
+        axis=1,
+    )
+
+    closest = np.clip(local, -e_box, e_box)
+    gap = np.linalg.norm(local - closest, axis=1)
+    outside = radius - gap
+    inside = radius + np.min(e_box - np.abs(local), axis=1)
+    is_inside = np.all(np.abs(local) <= e_box, axis=1)
+
+    # Inside, the disc leaves through the nearest face of the box
+    face = np.argmin(e_box - np.abs(local), axis=1)
+    rows = np.arange(len(face))
+    directions = np.zeros_like(local)
+    directions[rows, face] = np.where(local[rows, face] < 0, -1.0, 1.0)
+    away = (local - closest) / np.where(gap > 0, gap, 1.0)[:, None]
+    directions = np.where((is_inside | (gap == 0))[:, None], directions, away)
+    normals = np.stack(
+        [
+            (cos * directions[:, 0]) - (sin * directions[:, 1]),
+            (sin * directions[:, 0]) + (cos * directions[:, 1]),
+        ],
+        axis=1,
+    )
+
+    return np.where(is_inside, inside, outside), normals
+
+
+def _disc_disc(c_a, r_a, c_b, r_b):
+    """Returns the penetration depths of pairs of discs, and the directions from
+    a to b; concentric discs are pushed apart along the x-axis."""
+
+    dist = c_b - c_a
+    norm = np.linalg.norm(dist, axis=1)
+    normals = np.where(
+        (norm > 0)[:, None],
+        dist / np.where(norm > 0, norm, 1.0)[:, None],
+        np.array([1.0, 0.0]),
+    )
+
+    return r_a + r_b - norm, normals
+
+
+def _get_primitive_contacts(footprints, poses, z_offs):
+    """Returns the owners of each pair of primitives of different bodies that
+    overlap along the z-axis and may overlap in the plane, along with their
+    planar penetration depths, the directions pushing the second primitive of
+    each pair out of the first, and their depths along the z-axis."""
+
+    prims = place_footprints(footprints, poses, z_offs)
+    owner, centers, extents = prims["owner"], prims["centers"], prims["extents"]
+
+    # Broad phase: bounding circles of primitives of different bodies
+    first, second = np.triu_indices(len(owner), 1)
+    bounds = np.linalg.norm(extents, axis=1)
+    reach = bounds[first] + bounds[second]
+    dist = np.linalg.norm(centers[second] - centers[first], axis=1)
+    keep = (owner[first] != owner[second]) & (dist < reach)
+    first, second = first[keep], second[keep]
+
+    # Depth along the z-axis: the shorter translation that separates the pair
+    heights = prims["heights"]
+    z_depth = np.minimum(
+        heights[first, 1] - heights[second, 0], heights[second, 1] - heights[first, 0]
+    )
+    keep = z_depth > 0
+    first, second, z_depth = first[keep], second[keep], z_depth[keep]
+
+    # Order each pair such that a box always comes before a disc
+    discs = prims["discs"]
+    swap = discs[first] & ~discs[second]
+    first, second = np.where(swap, second, first), np.where(swap, first, second)
+
+    depths = np.zeros(len(first))
+    normals = np.zeros((len(first), 2))
+    yaws = prims["yaws"]
+
+    mask = ~discs[first] & ~discs[second]
+    i, j = first[mask], second[mask]
+    depths[mask], normals[mask] = _box_box(
+        centers[i], yaws[i], extents[i], centers[j], yaws[j], extents[j]
+    )
+
+    mask = ~discs[first] & discs[second]
+    i, j = first[mask], second[mask]
+    depths[mask], normals[mask] = _box_disc(
+        centers[i], yaws[i], extents[i], centers[j], extents[j, 0]
+    )
+
+    mask = discs[first] & discs[second]
+    i, j = first[mask], second[mask]
+    depths[mask], normals[mask] = _disc_disc(
+        centers[i], extents[i, 0], centers[j], extents[j, 0]
+    )
+
+    return owner[first], owner[second], depths, normals, z_depth
+
+
+def get_penetration_matrix(footprints, poses, z_offs):
+    """
+    Computes the penetration depth between every pair of bodies.
+
+    The penetration depth of two bodies is the largest penetration depth of
+    their primitives, where the depth of two primitives is the smaller of their
+    planar depth and their depth along the z-axis.
+
+    Parameters
+    ----------
+    footprints : list
+        the Footprint of each body.
+    poses : array_like
+        (n, 3) array of the [x, y, yaw] pose of each body.
+    z_offs : array_like
+        (n,) array of the z position of each body.
+
+    Returns
+    -------
+    penetrations : ndarray
+        (n, n) symmetric array of penetration depths; 0 if there is no
+        collision.
+    """
+
+    n = len(footprints)
+    penetrations = np.zeros((n, n))
+    if n < 2:
+        return penetrations
+
+    first, second, depths, _, z_depth = _get_primitive_contacts(
+        footprints, poses, z_offs
+    )
+    depths = np.maximum(np.minimum(depths, z_depth), 0.0)
+    np.maximum.at(penetrations, (first, second), depths)
+
+    return np.maximum(penetrations, penetrations.T)
+
+
+def separate_footprints(
+    footprints, poses, z_offs, constraints, fixed, iterations=100, tolerance=1e-3
+):
+    """
+    Pushes bodies out of collision by displacing all of them at once along the
+    directions of their penetrations, as a potential field would, without
+    rotating them.
+
+    In every iteration, each penetrating pair of primitives pushes its bodies
+    apart by their planar penetration depth plus the tolerance, shared equally
+    between movable bodies and taken entirely by the movable body if the other
+    is fixed. The poses of movable bodies are then projected onto their
+    constraints.
+
+    Parameters
+    ----------
+    footprints : list
+        the Footprint of each body.
+    poses : array_like
+        (n, 3) array of the [x, y, yaw] pose of each body.
+    z_offs : array_like
+        (n,) array of the z position of each body.
+    constraints : list
+        the list of constraints of each body; ignored for fixed bodies.
+    fixed : array_like
+        (n,) boolean array, True for the bodies that must not be moved.
+    iterations : int
+        the maximum number of iterations.
+    tolerance : float
+        the penetration depth below which a pair is not in collision.
+
+    Returns
+    -------
+    poses : ndarray
+        (n, 3) array of the separated poses.
+    iterations : int
+        the number of iterations that moved bodies.
+    """
+
+    poses = np.array(poses, dtype=float).reshape(-1, 3)
+    fixed = np.asarray(fixed, dtype=bool).reshape(-1)
+    movable = np.flatnonzero(~fixed)
+    compiled = CompiledConstraints([constraints[i] for i in movable])
+    if len(footprints) < 2 or not len(movable):
+        return poses, 0
+
+    for iteration in range(iterations):
+        first, second, depths, normals, z_depth = _get_primitive_contacts(
+            footprints, poses, z_offs
+        )
+        keep = np.minimum(depths, z_depth) > tolerance
+        if not np.any(keep):
+            return poses, iteration
+        first, second = first[keep], second[keep]
+        pushes = (depths[keep] + tolerance)[:, None] * normals[keep]
+
+        # A movable body takes the whole push from a fixed one, otherwise half
+        share_first = np.where(fixed[second], 1.0, 0.5) * ~fixed[first]
+        share_second = np.where(fixed[first], 1.0, 0.5) * ~fixed[second]
+        displacements = np.zeros((len(poses), 2))
+        np.add.at(displacements, first, -share_first[:, None] * pushes)
+        np.add.at(displacements, second, share_second[:, None] * pushes)
+
+        poses[:, :2] += displacements
+        poses[movable] = compiled.project(poses[movable])
+
+    return poses, iterations
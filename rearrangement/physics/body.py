@@ -13,12 +13,22 @@
     Repository: https://github.com/ardabbour/rearrangement/
 """
 
+import copy
+import sys
 import uuid
 
 import numpy as np
 import pybullet as p
 
-from rearrangement.physics import to_euler, to_quaternion, Constraint
+from rearrangement.physics import (
+    to_euler,
+    to_quaternion,
+    to_local_aabb,
+    to_world_aabb,
+    Constraint,
+    Footprint,
+    count_call,
+)
 from rearrangement.errors import type_error, value_error, length_error
 
 
@@ -44,6 +54,10 @@ class Body(object):
         the greatest cross-sectional area of the body parallel to the x-y plane.
     path: str
         the path to the URDF file describing the body.
+    footprint : Footprint
+        the footprint of the body, if it is made of primitives (optional).
+    eid : int
+        the ID of the physics client the body is loaded into (optional).
 
     Attributes
     ----------
@@ -51,12 +65,16 @@ class Body(object):
         the uuid of the body; generated by uuid1.
     bid : int
         the physics engine ID of the body.
+    eid : int
+        the ID of the physics client the body is loaded into.
     name : str
         the name of the body.
     area : float
         the greatest cross-section area of the body parallel to the x-y plane.
     path : str
         the path to the URDF file describing the body.
+    footprint : Footprint
+        the footprint of the body; None if it is not made of primitives.
     init_color : list
         the initial RGBA color of the body
     color : list
@@ -64,7 +82,8 @@ class Body(object):
     init_pose : list
         the initial [x, y, yaw] pose of the body.
     pose : list
-        the [x, y, yaw] pose of the body.
+        the [x, y, yaw] pose of the body; stored in a row of a pose array,
+        which is shared by the movable bodies of a configuration.
     constraints : Constraint
         The list of constraints acting on the body.
     z_off : float
@@ -72,34 +91,188 @@ class Body(object):
 
     """
 
-    def __init__(self, bid, color, name, pose, constraints, z_off, area, path):
+    __slots__ = (
+        "__oid",
+        "__bid",
+        "__eid",
+        "__name",
+        "__area",
+        "__path",
+        "__footprint",
+        "__init_color",
+        "__color",
+        "__init_pose",
+        "__constraints",
+        "__z_off",
+        "__poses",
+        "__index",
+        "__aabb",
+        "__aabb_model",
+        "__links",
+    )
+
+    def __init__(
+        self,
+        bid,
+        color,
+        name,
+        pose,
+        constraints,
+        z_off,
+        area,
+        path,
+        footprint=None,
+        eid=0,
+    ):
         self.oid = uuid.uuid1()
         self.bid = bid
+        self.eid = eid
         self.name = name
         self.area = area
         self.path = path
+        self.footprint = footprint
         self.init_color = color
         self.color = color
         self.init_pose = pose
         self.constraints = constraints
         self.z_off = z_off
+        self.__poses = np.zeros((1, 3))
+        self.__index = 0
+        self.__aabb = None
+        # Shared with copies of the body, which have the same shape
+        self.__aabb_model = {}
         self.pose = pose
 
+    def __deepcopy__(self, memo):
+        body = Body.__new__(Body)
+        memo[id(self)] = body
+        body.__oid = self.__oid
+        body.__bid = self.__bid
+        body.__eid = self.__eid
+        body.__name = self.__name
+        body.__area = self.__area
+        body.__path = self.__path
+        body.__footprint = self.__footprint
+        body.__init_color = list(self.__init_color)
+        body.__color = list(self.__color)
+        body.__init_pose = list(self.__init_pose)
+        body.__constraints = [copy.deepcopy(x, memo) for x in self.__constraints]
+        body.__z_off = self.__z_off
+        body.__poses = self.__poses[self.__index : self.__index + 1].copy()
+        body.__index = 0
+        body.__aabb = self.__aabb
+        body.__aabb_model = self.__aabb_model
+        body.__links = self.__links
+
+        return body
+
+    def __getstate__(self):
+        # Python 2 only pickles classes with __slots__ that define it
+        return [getattr(self, "_Body" + name) for name in Body.__slots__]
+
+    def __setstate__(self, state):
+        for name, value in zip(Body.__slots__, state):
+            setattr(self, "_Body" + name, value)
+
+    def __sizeof__(self):
+        # The memory a copy of the body takes, apart from its pose, which is
+        # stored in the pose array of its configuration; see __deepcopy__
+        return (
+            object.__sizeof__(self)
+            + sys.getsizeof(self.__init_color)
+            + sys.getsizeof(self.__color)
+            + sys.getsizeof(self.__init_pose)
+            + sys.getsizeof(self.__constraints)
+            + sum(sys.getsizeof(x) for x in self.__constraints)
+        )
+
+    def _bind_pose(self, poses, index):
+        """Moves the storage of the pose of the body to a row of an (n, 3)
+        pose array."""
+
+        poses[index] = self.__poses[self.__index]
+        self.__poses = poses
+        self.__index = index
+
+    def _bind_aabb_model(self, model):
+        """Shares the AABB model of the body with the other bodies of the same
+        URDF file and scaling; see GeometryCache."""
+
+        self.__aabb_model = model
+        self.__aabb = None
+
     def reset_color(self):
         """Resets the color of the body to its initial value."""
 
-        self.color = self.init_color
+        self._set_color(self.init_color)
 
     def reset_pose(self):
         """Resets the pose of the body to its initial value."""
 
-        self.pose = self.init_pose
+        self._set_pose(self.init_pose)
 
     @property
     def aabb_info(self):
-        """Returns information on the aligned axis bounding box of the body."""
+        """Returns information on the aligned axis bounding box of the body. The
+        information is cached until the pose of the body changes."""
+
+        pose = self.__poses[self.__index].tolist()
+        key = (self.__bid, self.__eid, self.__z_off) + tuple(pose)
+        if self.__aabb is None or self.__aabb[0] != key:
+            aabb = self.__get_aabb(pose)
+            self.__aabb = (key, self.__get_aabb_info(aabb))
+
+        return dict(self.__aabb[1])
+
+    def __get_aabb(self, pose):
+        """Returns the AABB of the body at a pose. The AABB of a body made of
+        primitives is derived from its box in the base frame, or from its
+        offset from the position of the body for AABBs that do not change with
+        the yaw, once the model has been recovered from the physics engine and
+        verified at another yaw."""
+
+        model = self.__aabb_model
+        position = [pose[0], pose[1], self.__z_off]
+        if model.get("verified"):
+            if model.get("invariant"):
+                return (np.array(model["offset"]) + position).tolist()
+            return to_world_aabb(model["local"], position, pose[2])
+
+        aabb = p.getAABB(self.__bid, physicsClientId=self.__eid)
+        count_call(self.__eid, "getAABB")
+        if self.__footprint is None or model.get("local") is False:
+            return aabb
+
+        if model.get("local") is None:
+            model["local"] = to_local_aabb(aabb, position, pose[2])
+            model["offset"] = (np.array(aabb) - position).tolist()
+            model["yaw"] = pose[2]
+        else:
+            # Spheres keep the same AABB at any yaw, unlike boxes and cylinders
+            predicted = to_world_aabb(model["local"], position, pose[2])
+            rotated = np.allclose(predicted, aabb, rtol=0.0, atol=1e-9)
+            offset = np.array(model["offset"]) + position
+            invariant = np.allclose(offset, aabb, rtol=0.0, atol=1e-9)
+            turn = abs(np.sin(2 * pose[2])) - abs(np.sin(2 * model["yaw"]))
+            if not (rotated or invariant):
+                model["local"] = False
+            elif abs(turn) > 0.1:
+                model["verified"] = True
+                model["invariant"] = not rotated
+
+        return aabb
+
+    def _get_aabb(self, pose):
+        """Returns the AABB of the body at the pose last applied to the physics
+        engine, which may differ from its pose, as a pair of [x, y, z] lists."""
+
+        aabb_min, aabb_max = self.__get_aabb(pose)
+
+        return [list(aabb_min), list(aabb_max)]
+
+    def __get_aabb_info(self, aabb):
+        """Builds the information returned by aabb_info from an AABB."""
 
-        aabb = p.getAABB(self.bid)
         x_min = aabb[0][0]
         x_max = aabb[1][0]
         y_min = aabb[0][1]
@@ -135,8 +308,8 @@ class Body(object):
         """Syncronizes the physics engine's pose of the body with the one
         defined in self.__pose. To be used after the stepSimulation method."""
 
-        pos, orn = p.getBasePositionAndOrientation(self.bid)
-        self.pose = [pos[0], pos[1], to_euler(orn)[2]]
+        pos, orn = p.getBasePositionAndOrientation(self.bid, physicsClientId=self.eid)
+        self._set_pose([pos[0], pos[1], to_euler(orn)[2]])
 
     def _get_constrained_pose(self, pose):
         """Constrains the pose to comply with the constraints in the body."""
@@ -213,9 +386,21 @@ class Body(object):
     def bid(self, bid):
         if isinstance(bid, int):
             self.__bid = bid
+            self.__links = None
         else:
             raise type_error("bid", int, type(bid))
 
+    @property
+    def eid(self):
+        return self.__eid
+
+    @eid.setter
+    def eid(self, eid):
+        if isinstance(eid, int):
+            self.__eid = eid
+        else:
+            raise type_error("eid", int, type(eid))
+
     @property
     def name(self):
         return self.__name
@@ -251,6 +436,17 @@ class Body(object):
         else:
             raise type_error("path", str, type(path))
 
+    @property
+    def footprint(self):
+        return self.__footprint
+
+    @footprint.setter
+    def footprint(self, footprint):
+        if isinstance(footprint, Footprint) or footprint is None:
+            self.__footprint = footprint
+        else:
+            raise type_error("footprint", Footprint, type(footprint))
+
     @property
     def init_color(self):
         return self.__init_color
@@ -284,16 +480,28 @@ class Body(object):
                 if item > 1.0 or item < 0.0:
                     raise value_error("index {} of color", "0 >= x >= 1", item)
 
-            # TODO: handle multiple links better
-            p.changeVisualShape(self.__bid, -1, rgbaColor=color)
-            p.changeVisualShape(self.__bid, 0, rgbaColor=color)
-            p.changeVisualShape(self.__bid, 1, rgbaColor=color)
-            p.changeVisualShape(self.__bid, 2, rgbaColor=color)
-
-            self.__color = color
+            self._set_color(color)
         else:
             raise type_error("color", list, type(color))
 
+    def _set_color(self, color):
+        """Sets the color of the body without validating it; for colors that
+        are already known to be valid."""
+
+        # The base and every link of the body, looked up on first use
+        if self.__links is None:
+            num_joints = p.getNumJoints(self.__bid, physicsClientId=self.__eid)
+            count_call(self.__eid, "getNumJoints")
+            self.__links = list(range(-1, num_joints))
+
+        for link in self.__links:
+            p.changeVisualShape(
+                self.__bid, link, rgbaColor=color, physicsClientId=self.__eid
+            )
+        count_call(self.__eid, "changeVisualShape", len(self.__links))
+
+        self.__color = color
+
     @property
     def init_pose(self):
         return self.__init_pose
@@ -304,7 +512,7 @@ class Body(object):
 
     @property
     def pose(self):
-        return self.__pose
+        return self.__poses[self.__index].tolist()
 
     @pose.setter
     def pose(self, pose):
@@ -316,14 +524,23 @@ class Body(object):
                     )
             if not len(pose) == 3:
                 raise length_error("pose", 3, len(pose))
-            pose = self._get_constrained_pose(pose)
-            self.__pose = pose
-            pos = [pose[0], pose[1], self.z_off]
-            orn = to_quaternion([0, 0, pose[2]])
-            p.resetBasePositionAndOrientation(self.__bid, pos, orn)
+            self._set_pose(pose)
         else:
             raise type_error("pose", list, type(pose))
 
+    def _set_pose(self, pose):
+        """Sets the pose of the body, subject to its constraints, without
+        validating it; for poses that are already known to be valid."""
+
+        pose = self._get_constrained_pose(pose)
+        self.__poses[self.__index] = pose
+        pos = [pose[0], pose[1], self.__z_off]
+        orn = to_quaternion([0, 0, pose[2]])
+        p.resetBasePositionAndOrientation(
+            self.__bid, pos, orn, physicsClientId=self.__eid
+        )
+        count_call(self.__eid, "resetBasePositionAndOrientation")
+
     @property
     def constraints(self):
         """Property that holds the list of constraints of the body."""
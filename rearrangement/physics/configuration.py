@@ -12,13 +12,23 @@
     Repository: https://github.com/ardabbour/rearrangement/
 """
 
+import copy
 import json
+import sys
 import uuid
 
 import numpy as np
+import pybullet as p
 
-from rearrangement.errors import type_error
-from rearrangement.physics import Body
+from rearrangement.errors import type_error, length_error
+from rearrangement.physics import (
+    Body,
+    CompiledConstraints,
+    Scene,
+    count_call,
+    to_eulers,
+    to_quaternions,
+)
 
 
 class Configuration(object):
@@ -52,12 +62,28 @@ class Configuration(object):
         the list of all movable bodies.
     collidable : list
         the list of all collidable bodies.
+    poses : ndarray
+        (n, 3) array holding the [x, y, yaw] poses of the movable bodies, in
+        which the pose of each movable body is stored.
     all : list
         the list of all bodies.
     coverage : float
         the ratio of the area of all bodies to the surface area.
     """
 
+    __slots__ = (
+        "__oid",
+        "__surface",
+        "__obstacles",
+        "__originals",
+        "__news",
+        "__movable",
+        "__collidable",
+        "__poses",
+        "__compiled",
+        "__coverage",
+    )
+
     def __init__(self, surface, obstacles, originals, news):
         self.oid = uuid.uuid1()
         self.surface = surface
@@ -68,8 +94,58 @@ class Configuration(object):
         self.movable = self.originals + self.news
         self.collidable = self.obstacles + self.movable
 
+        self.__poses = np.zeros((len(self.movable), 3))
+        for index, body in enumerate(self.movable):
+            body._bind_pose(self.__poses, index)
+        self.__compiled = None
+
         self.coverage = sum([x.area for x in self.collidable]) / self.surface.area
 
+    def __deepcopy__(self, memo):
+        configuration = Configuration.__new__(Configuration)
+        memo[id(self)] = configuration
+        configuration.__oid = self.__oid
+        configuration.__coverage = self.__coverage
+        configuration.__surface = copy.deepcopy(self.__surface, memo)
+        configuration.__obstacles = [copy.deepcopy(x, memo) for x in self.__obstacles]
+        configuration.__originals = [copy.deepcopy(x, memo) for x in self.__originals]
+        configuration.__news = [copy.deepcopy(x, memo) for x in self.__news]
+        configuration.__movable = configuration.__originals + configuration.__news
+        configuration.__collidable = configuration.__obstacles + configuration.__movable
+
+        configuration.__poses = self.__poses.copy()
+        for index, body in enumerate(configuration.__movable):
+            body._bind_pose(configuration.__poses, index)
+        configuration.__compiled = copy.deepcopy(self.__compiled, memo)
+
+        return configuration
+
+    def __getstate__(self):
+        # Python 2 only pickles classes with __slots__ that define it
+        return [getattr(self, "_Configuration" + name) for name in Configuration.__slots__]
+
+    def __setstate__(self, state):
+        for name, value in zip(Configuration.__slots__, state):
+            setattr(self, "_Configuration" + name, value)
+
+    def __sizeof__(self):
+        # The memory a copy of the configuration takes, bodies included, as
+        # the transposition table bounds its memory by it; see __deepcopy__
+        lists = [
+            self.__obstacles,
+            self.__originals,
+            self.__news,
+            self.__movable,
+            self.__collidable,
+        ]
+        return (
+            object.__sizeof__(self)
+            + sum(sys.getsizeof(x) for x in lists)
+            + sum(sys.getsizeof(x) for x in self.__collidable + [self.__surface])
+            + sys.getsizeof(self.__poses)
+            + (0 if self.__compiled is None else sys.getsizeof(self.__compiled))
+        )
+
     @property
     def oid(self):
         return self.__oid
@@ -170,6 +246,10 @@ class Configuration(object):
         else:
             raise type_error("collidable", list, type(collidable))
 
+    @property
+    def poses(self):
+        return self.__poses
+
     @property
     def coverage(self):
         return self.__coverage
@@ -184,13 +264,100 @@ class Configuration(object):
     def reset_poses(self):
         """Resets the poses of all movable bodies."""
 
-        for i in self.movable:
-            for j in i:
-                j.reset_pose()
+        self.set_poses([body.init_pose for body in self.movable])
+
+    def get_key(self, resolution=1e-6):
+        """Returns a hashable key of the state of the configuration: the poses
+        of the movable bodies, quantized to a resolution in meters and radians,
+        and the packed constraints of the movable bodies."""
+
+        compiled = self.compiled_constraints
+        poses = np.round(self.poses / resolution).astype(np.int64)
+
+        return (
+            poses.tobytes(),
+            compiled.codes.shape,
+            compiled.codes.tobytes(),
+            compiled.params.tobytes(),
+        )
+
+    def set_poses(self, poses):
+        """Sets the poses of the movable bodies from the rows of an (n, 3)
+        array, subject to the constraints of each body, and applies them to the
+        physics engine."""
+
+        poses = np.asarray(poses, dtype=float)
+        if poses.shape != self.poses.shape:
+            raise length_error("poses", len(self.movable), len(poses))
+
+        poses = self.compiled_constraints.project(poses)
+        self.poses[:] = poses
+
+        eulers = np.zeros((len(poses), 3))
+        eulers[:, 2] = poses[:, 2]
+        orns = to_quaternions(eulers)
+        for body, pose, orn in zip(self.movable, poses.tolist(), orns.tolist()):
+            p.resetBasePositionAndOrientation(
+                body.bid, [pose[0], pose[1], body.z_off], orn, physicsClientId=body.eid
+            )
+            count_call(body.eid, "resetBasePositionAndOrientation")
+
+    def snapshot(self):
+        """Returns a snapshot of the state of the configuration, which restore
+        brings it back to: a copy of its pose array, and the constraints of the
+        movable bodies with their versions, shapes and geometries. Geometries
+        are kept by reference, as they are set anew rather than changed in
+        place (see Constraint.version)."""
+
+        constraints = [
+            [(x, x.version, x.shape, x.geometry) for x in body.constraints]
+            for body in self.movable
+        ]
+
+        return self.__poses.copy(), constraints
+
+    def restore(self, snapshot):
+        """Brings the configuration back to the state of a snapshot taken by
+        snapshot, and applies the poses to the physics engine. Constraints are
+        only set again if they were added, removed, or set since."""
+
+        poses, constraints = snapshot
+        for body, saved in zip(self.movable, constraints):
+            if [x for x, _, _, _ in saved] != body.constraints:
+                body.constraints = [x for x, _, _, _ in saved]
+            for constraint, version, shape, geometry in saved:
+                if constraint.version != version:
+                    constraint.shape = shape
+                    constraint.geometry = geometry
+        self.set_poses(poses)
+
+    @property
+    def compiled_constraints(self):
+        """Returns the constraints of the movable bodies packed for projecting
+        all of their poses at once; they are compiled again only if constraints
+        were added or removed since, and updated in place if set anew."""
+
+        constraints = [body.constraints for body in self.movable]
+        if self.__compiled is None or not self.__compiled.refresh(constraints):
+            self.__compiled = CompiledConstraints(constraints)
+
+        return self.__compiled
 
     def update_configuration(self):
-        for body in self.movable:
-            body.update_pose()
+        """Syncronizes the poses of the movable bodies with the ones in the
+        physics engine in one batch. To be used after the stepSimulation
+        method."""
+
+        if not self.movable:
+            return
+
+        states = [
+            p.getBasePositionAndOrientation(body.bid, physicsClientId=body.eid)
+            for body in self.movable
+        ]
+        positions = np.array([pos for pos, _ in states])
+        yaws = to_eulers([orn for _, orn in states])[:, 2]
+        self.set_poses(np.column_stack([positions[:, :2], yaws]))
 
     def find_body(self, oid):
         for body in self.collidable + [self.surface]:
@@ -234,26 +401,29 @@ class Configuration(object):
                 return abs((diff + np.pi) % 2 * np.pi - np.pi)
             return abs((diff + np.pi) % np.pi)
 
+        # The originals come first in the pose array
+        poses = self.poses[: len(self.originals)]
+        init_poses = np.array([x.init_pose for x in self.originals], dtype=float)
+        init_poses = init_poses.reshape(-1, 3)
+
+        x_disps = poses[:, 0] - init_poses[:, 0]
+        y_disps = poses[:, 1] - init_poses[:, 1]
+        disps = np.sqrt((x_disps ** 2) + (y_disps ** 2))
+        rots = smallest_diff(poses[:, 2], init_poses[:, 2])
+
         moved = False
         movement = 0
         moved_bodies = set()
         no_of_moved_bodies = 0
-        for body in self.originals:
-            pose = body.pose
-            init_pose = body.init_pose
-
-            x_disp = pose[0] - init_pose[0]
-            y_disp = pose[1] - init_pose[1]
-            disp = np.sqrt((x_disp ** 2) + (y_disp ** 2))
-
+        for index in np.flatnonzero(disps > 0):
+            body = self.originals[index]
             char_len = body.aabb_info["2D diagonal length"] / 2
-            rot = smallest_diff(pose[2], init_pose[2]) * char_len
+            rot = rots[index] * char_len
 
-            if disp > 0:
-                moved = True
-                moved_bodies.add(body)
-                movement += disp + rot
-                no_of_moved_bodies += 1
+            moved = True
+            moved_bodies.add(body)
+            movement += disps[index] + rot
+            no_of_moved_bodies += 1
 
         move_info = {
             "status": moved,
@@ -264,47 +434,37 @@ class Configuration(object):
 
         return move_info
 
+    def dump_scene(self):
+        """Returns the configuration as a Scene, with the same fields as
+        dump_json."""
+
+        bodies = [self.surface] + self.collidable
+        kinds = [0] + [1] * len(self.obstacles)
+        kinds += [2] * len(self.originals) + [3] * len(self.news)
+
+        z_offs = np.array([x.z_off for x in bodies], dtype=float)
+        real = np.array(["real" in x.path for x in bodies])
+        z_offs = np.where(real, z_offs / 15.0, z_offs) - self.surface.z_off
+        z_offs[0] = self.surface.z_off
+
+        poses = [self.surface.pose] + [x.pose for x in self.obstacles]
+        paths = np.array([x.path for x in bodies], dtype=str)
+        urdfs, urdf_ids = np.unique(paths, return_inverse=True)
+
+        return Scene(
+            [x.name for x in bodies],
+            kinds,
+            urdfs,
+            urdf_ids,
+            np.concatenate([np.reshape(poses, (-1, 3)), self.poses]),
+            z_offs,
+            [x.area for x in bodies],
+        )
+
     def dump_json(self):
         """Returns the configuration as a JSON object."""
 
-        def unpack(obj, surf):
-            """Unpacks an object into a dictionary."""
-
-            dic = {}
-            for item in obj:
-                key = item.name
-                path = item.path
-                if "real" in path:
-                    z_pos = item.z_off / 15.0
-                else:
-                    z_pos = item.z_off
-                z_off = z_pos - surf.z_off
-                value = {
-                    "path": path,
-                    "pose": item.pose,
-                    "z offset": z_off,
-                    "area": item.area,
-                }
-                dic[key] = value
-            return dic
-
-        surface = {
-            "path": self.surface.path,
-            "pose": self.surface.pose,
-            "z offset": self.surface.z_off,
-            "area": self.surface.area,
-        }
-        originals = unpack(self.originals, self.surface)
-        news = unpack(self.news, self.surface)
-        obstacles = unpack(self.obstacles, self.surface)
-        data = {
-            "surface": surface,
-            "obstacles": obstacles,
-            "originals": originals,
-            "news": news,
-        }
-
-        return json.dumps(data, sort_keys=True, indent=4)
+        return json.dumps(self.dump_scene().to_json(), sort_keys=True, indent=4)
 
     def randomize(self):
         """Randomizes the configuration with a uniform distribution"""
@@ -316,8 +476,10 @@ class Configuration(object):
         s_x_max = s_aabb["max x"] - anti_padding
         s_y_max = s_aabb["max x"] - anti_padding
 
-        for body in self.movable:
-            rand_x = np.random.uniform(s_x_min, s_x_max)
-            rand_y = np.random.uniform(s_y_min, s_y_max)
-            rand_theta = np.random.uniform(0, 2 * np.pi)
-            body.pose = [rand_x, rand_y, rand_theta]
+        self.set_poses(
+            np.random.uniform(
+                [s_x_min, s_y_min, 0],
+                [s_x_max, s_y_max, 2 * np.pi],
+                size=(len(self.movable), 3),
+            )
+        )
@@ -13,8 +13,12 @@
     Repository: https://github.com/ardabbour/rearrangement/
 """
 
+import copy
+import sys
 import uuid
 
+import numpy as np
+
 from rearrangement.errors import type_error
 
 
@@ -39,6 +43,8 @@ class Constraint(object):
     ----------
     oid : UUID
         the UUID of the constraint; generated by uuid1.
+    version : int
+        the number of times the shape or geometry has been set.
     shape : str
         the shape of the constraint:-
         'recatangular',
@@ -51,11 +57,47 @@ class Constraint(object):
         'min' and 'max' values for 'rotational'.
     """
 
+    __slots__ = ("__oid", "__shape", "__geometry", "__version")
+
     def __init__(self, shape, geometry):
+        self.__version = 0
         self.oid = uuid.uuid1()
         self.shape = shape
         self.geometry = geometry
 
+    def __deepcopy__(self, memo):
+        constraint = Constraint.__new__(Constraint)
+        memo[id(self)] = constraint
+        constraint.__version = self.__version
+        constraint.__oid = self.__oid
+        constraint.__shape = self.__shape
+        constraint.__geometry = dict(
+            (key, list(value) if isinstance(value, list) else value)
+            for key, value in self.__geometry.items()
+        )
+
+        return constraint
+
+    def __getstate__(self):
+        # Python 2 only pickles classes with __slots__ that define it
+        return [getattr(self, "_Constraint" + name) for name in Constraint.__slots__]
+
+    def __setstate__(self, state):
+        for name, value in zip(Constraint.__slots__, state):
+            setattr(self, "_Constraint" + name, value)
+
+    def __sizeof__(self):
+        # The memory a copy of the constraint takes; see __deepcopy__
+        return (
+            object.__sizeof__(self)
+            + sys.getsizeof(self.__geometry)
+            + sum(
+                sys.getsizeof(value)
+                for value in self.__geometry.values()
+                if isinstance(value, list)
+            )
+        )
+
     @property
     def oid(self):
         return self.__oid
@@ -74,6 +116,7 @@ class Constraint(object):
     @shape.setter
     def shape(self, shape):
         self.__shape = shape
+        self.__version += 1
 
     @property
     def geometry(self):
@@ -82,3 +125,258 @@ class Constraint(object):
     @geometry.setter
     def geometry(self, geometry):
         self.__geometry = geometry
+        self.__version += 1
+
+    @property
+    def version(self):
+        """Property that is incremented whenever the shape or geometry is set;
+        changes made to the geometry in place must be followed by setting it
+        again for compiled constraints to pick them up."""
+
+        return self.__version
+
+
+SHAPES = ["rectangular", "circular", "rotational"]
+
+
+def pack_geometry(shape, geometry):
+    """
+    Packs the geometry of a constraint into a shape code and four parameters:-
+    [min x, max x, min y, max y] for 'rectangular',
+    [center x, center y, radius, 0] for 'circular', or
+    [min, max, 0, 0] for 'rotational'.
+
+    Parameters
+    ----------
+    shape : str
+        the shape of the constraint.
+    geometry : dict
+        the geometry of the constraint.
+
+    Returns
+    -------
+    code : int
+        the index of the shape in SHAPES; -1 if the shape is unknown.
+    params : list
+        the four parameters of the geometry; zeros if the shape is unknown.
+    """
+
+    if shape == "rectangular":
+        params = [
+            geometry["min x"],
+            geometry["max x"],
+            geometry["min y"],
+            geometry["max y"],
+        ]
+    elif shape == "circular":
+        params = [geometry["center"][0], geometry["center"][1]]
+        params += [geometry["radius"], 0.0]
+    elif shape == "rotational":
+        params = [geometry["min"], geometry["max"], 0.0, 0.0]
+    else:
+        return -1, [0.0, 0.0, 0.0, 0.0]
+
+    return SHAPES.index(shape), [float(x) for x in params]
+
+
+def unpack_geometry(code, params):
+    """Returns the shape and geometry of a constraint packed by
+    pack_geometry."""
+
+    shape = SHAPES[code]
+    params = [float(x) for x in params]
+    if shape == "rectangular":
+        geometry = {
+            "min x": params[0],
+            "max x": params[1],
+            "min y": params[2],
+            "max y": params[3],
+        }
+    elif shape == "circular":
+        geometry = {"center": params[:2], "radius": params[2]}
+    else:
+        geometry = {"min": params[0], "max": params[1]}
+
+    return shape, geometry
+
+
+class CompiledConstraints(object):
+    """
+    Defines the constraints of several bodies packed into arrays, such that
+    poses can be projected onto them for all bodies at once. The i-th
+    constraint of every body is stored in the i-th slot, as a shape code and
+    four parameters:-
+    [min x, max x, min y, max y] for 'rectangular',
+    [center x, center y, radius, 0] for 'circular', or
+    [min, max, 0, 0] for 'rotational'.
+
+    Parameters
+    ----------
+    constraints : list
+        the list of Constraints of each body.
+
+    Attributes
+    ----------
+    codes : ndarray
+        (slots, n) array of the shape code of each constraint; -1 if a body has
+        fewer constraints than slots.
+    params : ndarray
+        (slots, n, 4) array of the parameters of each constraint.
+    """
+
+    __slots__ = ("__constraints", "__codes", "__params", "__versions")
+
+    def __init__(self, constraints):
+        self.__constraints = [list(x) for x in constraints]
+        slots = max([len(x) for x in constraints] + [0])
+        self.__codes = np.full((slots, len(constraints)), -1, dtype=np.int8)
+        self.__params = np.zeros((slots, len(constraints), 4))
+        self.__versions = {}
+        for row, body_constraints in enumerate(self.__constraints):
+            for slot, constraint in enumerate(body_constraints):
+                self.__compile(slot, row, constraint)
+
+    def __deepcopy__(self, memo):
+        compiled = CompiledConstraints.__new__(CompiledConstraints)
+        memo[id(self)] = compiled
+        compiled.__constraints = [
+            [copy.deepcopy(x, memo) for x in body_constraints]
+            for body_constraints in self.__constraints
+        ]
+        compiled.__codes = self.__codes.copy()
+        compiled.__params = self.__params.copy()
+        compiled.__versions = dict(
+            (id(copy.deepcopy(x, memo)), self.__versions[id(x)])
+            for body_constraints in self.__constraints
+            for x in body_constraints
+        )
+
+        return compiled
+
+    def __sizeof__(self):
+        # The constraints themselves are counted by the bodies holding them
+        return (
+            object.__sizeof__(self)
+            + sys.getsizeof(self.__constraints)
+            + sum(sys.getsizeof(x) for x in self.__constraints)
+            + sys.getsizeof(self.__codes)
+            + sys.getsizeof(self.__params)
+            + sys.getsizeof(self.__versions)
+        )
+
+    def __reduce__(self):
+        # Versions are keyed by the ids of the constraints, which do not
+        # survive pickling, so the constraints are compiled again instead
+        return (CompiledConstraints, (self.__constraints,))
+
+    @property
+    def codes(self):
+        return self.__codes
+
+    @property
+    def params(self):
+        return self.__params
+
+    def __compile(self, slot, row, constraint):
+        """Packs a constraint into a slot of a row."""
+
+        code, params = pack_geometry(constraint.shape, constraint.geometry)
+        self.__codes[slot, row] = code
+        self.__params[slot, row] = params
+        self.__versions[id(constraint)] = constraint.version
+
+    def refresh(self, constraints):
+        """Updates the packed constraints in place if the bodies have the same
+        constraints as when compiled, repacking only the constraints whose
+        version changed; returns False if they do not, in which case the
+        constraints must be compiled again."""
+
+        if len(constraints) != len(self.__constraints):
+            return False
+
+        stale = []
+        for row, (current, compiled) in enumerate(zip(constraints, self.__constraints)):
+            if len(current) != len(compiled):
+                return False
+            for slot, (constraint, other) in enumerate(zip(current, compiled)):
+                if constraint is not other:
+                    return False
+                if constraint.version != self.__versions[id(constraint)]:
+                    stale.append((slot, row, constraint))
+
+        for slot, row, constraint in stale:
+            self.__compile(slot, row, constraint)
+
+        return True
+
+    def project(self, poses):
+        """
+        Constrains the poses of the bodies, such that each pose is projected
+        onto the constraints of its body in order, as it is by Body.
+
+        Parameters
+        ----------
+        poses : array_like
+            (n, 3) array of the [x, y, yaw] pose of each body.
+
+        Returns
+        -------
+        poses : ndarray
+            (n, 3) array of the constrained poses.
+        """
+
+        poses = np.array(poses, dtype=float).reshape(-1, 3)
+
+        for codes, params in zip(self.__codes, self.__params):
+            rows = np.flatnonzero(codes == 0)
+            if len(rows):
+                for axis in [0, 1]:
+                    low, high = params[rows, 2 * axis], params[rows, (2 * axis) + 1]
+                    values = poses[rows, axis]
+                    poses[rows, axis] = np.where(
+                        values > high, high, np.where(values < low, low, values)
+                    )
+
+            rows = np.flatnonzero(codes == 1)
+            if len(rows):
+                centers, radii = params[rows, :2], params[rows, 2]
+                dists = centers - poses[rows, :2]
+                norms = np.sqrt((dists[:, 1] ** 2) + (dists[:, 0] ** 2))
+
+                outside = ~(np.round(norms, 2) <= np.round(radii, 2))
+                outside = outside & (radii != 0)
+                poses[rows[outside], :2] = centers[outside] + (
+                    (dists[outside] / norms[outside, None]) * radii[outside, None]
+                )
+                poses[rows[radii == 0], :2] = centers[radii == 0]
+
+            rows = np.flatnonzero(codes == 2)
+            if len(rows):
+                low, high = params[rows, 0], params[rows, 1]
+                values = poses[rows, 2]
+                poses[rows, 2] = np.where(
+                    values > high, high, np.where(values < low, low, values)
+                )
+
+        return poses
+
+
+def project_poses(constraints, poses):
+    """
+    Constrains the poses of several bodies at once, such that each pose is
+    projected onto the constraints of its body in order, as it is by Body.
+
+    Parameters
+    ----------
+    constraints : list
+        the list of Constraints of each body.
+    poses : array_like
+        (n, 3) array of the [x, y, yaw] pose of each body.
+
+    Returns
+    -------
+    poses : ndarray
+        (n, 3) array of the constrained poses.
+    """
+
+    return CompiledConstraints(constraints).project(poses)
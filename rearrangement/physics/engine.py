@@ -11,8 +11,8 @@
     Repository: https://github.com/ardabbour/rearrangement/
 """
 
+import collections
 import copy
-import itertools
 import json
 import os
 import uuid
@@ -20,7 +20,6 @@ import warnings
 
 import numpy as np
 import pybullet as p
-from PIL import Image
 
 from rearrangement.physics import (
     Body,
@@ -28,6 +27,17 @@ from rearrangement.physics import (
     Configuration,
     to_euler,
     to_quaternion,
+    to_quaternions,
+    get_overlapping_pairs,
+    GeometryCache,
+    get_geometry_cache,
+    Occupancy,
+    Scene,
+    get_penetration_matrix,
+    separate_footprints,
+    Stats,
+    register_stats,
+    ImageWriter,
 )
 from rearrangement.errors import type_error, value_error, length_error
 
@@ -38,6 +48,17 @@ class Engine(object):
 
     Attributes
     ----------
+    collision_method : str
+        how penetration depths are computed:-
+        'closest', by querying the closest points of each pair of bodies
+        from the physics engine, or
+        'analytic', by the separating axis theorem on the footprints of all
+        bodies at once, where spheres are treated as cylinders (see
+        rearrangement.physics.analytic); used only if every collidable body
+        has a footprint, or
+        'contacts', like 'closest', but only for the pairs of bodies in contact
+        after a single collision detection pass of the physics engine; used
+        only if the physics engine supports it.
     collision_threshold : float
         the distance after which a geometry overlap between two bodies is
         considered a collision.
@@ -47,21 +68,63 @@ class Engine(object):
         whether or not the instance is connected to a physics backend.
     eid : int
         the ID of the engine generated by pybullet.
+    geometry_cache : GeometryCache
+        the cache of the geometries of the URDF files loaded; shared by all
+        engines of the process by default, and saved on disconnect.
+    image_size : list
+        the default [width, height] in pixels of the images rendered by
+        get_image and save_image.
+    lazy_colors : bool
+        whether or not body colors set by collision checks are only tracked,
+        and pushed to the physics engine when needed (e.g. by get_image);
+        enabled when connecting without visualization.
     oid : UUID
         the UUID of the engine; generated by uuid1.
+    stats : Stats
+        the calls made to pybullet by the engine and its bodies, the time spent
+        in its operations, and the collision evaluations made by each layer.
     visual : bool
         whether or not the instance is being visualized.
 
     """
 
     def __init__(self):
+        self.__num_links = {}
+        self.__pool = {}
+        self.__pool_keys = {}
+        self.__snapshots = {}
+        self.__bids = {}
+        self.__static = None
+        self.clear_collision_cache()
+        self.collision_method = "closest"
         self.collision_threshold = 0.001
         self.configuration = None
         self.connected = False
         self.eid = None
+        self.geometry_cache = get_geometry_cache()
+        self.image_size = [1920, 1920]
+        self.__writer = None
+        self.__colors = {}
+        self.lazy_colors = False
         self.oid = uuid.uuid1()
+        self.stats = Stats()
         self.visual = None
 
+    @property
+    def collision_method(self):
+        return self.__collision_method
+
+    @collision_method.setter
+    def collision_method(self, collision_method):
+        if collision_method in ["closest", "analytic", "contacts"]:
+            self.__collision_method = collision_method
+        else:
+            raise value_error(
+                "collision_method",
+                "'closest', 'analytic', or 'contacts'",
+                collision_method,
+            )
+
     @property
     def collision_threshold(self):
         return self.__collision_threshold
@@ -80,12 +143,20 @@ class Engine(object):
     @configuration.setter
     def configuration(self, configuration):
         if isinstance(configuration, Configuration):
-            if self.configuration is not None:
-                for body in configuration.movable:
-                    # body.set_color([1,0,0,1])
-                    loaded_body = copy.deepcopy(self.configuration.find_body(body.oid))
-                    loaded_body.constraints = copy.deepcopy(body.constraints)
-                    loaded_body.pose = body.pose
+            if self.configuration is not None and configuration.movable:
+                poses = configuration.compiled_constraints.project(configuration.poses)
+                eulers = np.zeros((len(poses), 3))
+                eulers[:, 2] = poses[:, 2]
+                orns = to_quaternions(eulers).tolist()
+                for body, pose, orn in zip(configuration.movable, poses.tolist(), orns):
+                    p.resetBasePositionAndOrientation(
+                        body.bid,
+                        [pose[0], pose[1], body.z_off],
+                        orn,
+                        physicsClientId=self.eid,
+                    )
+                    self.__applied_poses[body.oid] = tuple(pose)
+                self.stats.count("resetBasePositionAndOrientation", len(poses))
             self.__configuration = configuration
 
         elif configuration is None:
@@ -116,6 +187,47 @@ class Engine(object):
         else:
             raise type_error("eid", int, type(eid))
 
+    @property
+    def geometry_cache(self):
+        return self.__geometry_cache
+
+    @geometry_cache.setter
+    def geometry_cache(self, geometry_cache):
+        if isinstance(geometry_cache, GeometryCache):
+            self.__geometry_cache = geometry_cache
+        else:
+            raise type_error("geometry_cache", GeometryCache, type(geometry_cache))
+
+    @property
+    def image_size(self):
+        return self.__image_size
+
+    @image_size.setter
+    def image_size(self, image_size):
+        if not isinstance(image_size, list):
+            raise type_error("image_size", list, type(image_size))
+        if len(image_size) != 2:
+            raise length_error("image_size", 2, len(image_size))
+        for item in image_size:
+            if not isinstance(item, int):
+                raise type_error("image_size item", int, type(item))
+            if item < 1:
+                raise value_error("image_size item", "x >= 1", item)
+        self.__image_size = image_size
+
+    @property
+    def lazy_colors(self):
+        return self.__lazy_colors
+
+    @lazy_colors.setter
+    def lazy_colors(self, lazy_colors):
+        if isinstance(lazy_colors, bool):
+            self.__lazy_colors = lazy_colors
+            if not lazy_colors:
+                self.flush_colors()
+        else:
+            raise type_error("lazy_colors", bool, type(lazy_colors))
+
     @property
     def oid(self):
         return self.__oid
@@ -157,6 +269,17 @@ class Engine(object):
             self.eid = p.connect(p.DIRECT)
             self.visual = False
 
+        # Pairs of overlapping bodies are sorted, so that their order does not
+        # depend on the order in which bodies were moved; see push_bodies
+        p.setPhysicsEngineParameter(
+            deterministicOverlappingPairs=1, physicsClientId=self.eid
+        )
+        self.__pool = {}
+        self.__pool_keys = {}
+        self.__snapshots = {}
+        self.__static = None
+        self.lazy_colors = not visual
+        register_stats(self.eid, self.stats)
         self.connected = True
 
     def disconnect(self):
@@ -166,7 +289,10 @@ class Engine(object):
             warnings.warn("Physics engine already disconnected.")
             return
 
+        self.flush_images()
+        self.geometry_cache.save()
         p.disconnect(physicsClientId=self.eid)
+        register_stats(self.eid, None)
 
         self.connected = False
 
@@ -182,14 +308,21 @@ class Engine(object):
 
         return p.getPhysicsEngineParameters(physicsClientId=self.eid)
 
-    def get_image(self, width=1920, height=1920, distance=10, fov=90, new=True):
-        """Returns an image of the setup."""
+    def __render(self, width, height, distance, fov, new):
+        """Returns an (height, width, 4) uint8 RGBA array of the setup, as seen
+        from above the origin, rendered by the CPU renderer without shadows."""
+
+        if width is None:
+            width = self.image_size[0]
+        if height is None:
+            height = self.image_size[1]
 
+        self.flush_colors()
         if not new:
             for body in self.configuration.news:
                 color = body.color
                 color[-1] = 0.0
-                body.color = color
+                body._set_color(color)
 
         view_matrix = p.computeViewMatrixFromYawPitchRoll(
             [0, 0, 0], distance, 0, -90, 0, 2
@@ -202,19 +335,50 @@ class Engine(object):
             height,
             viewMatrix=view_matrix,
             projectionMatrix=projection_matrix,
+            shadow=0,
+            flags=p.ER_NO_SEGMENTATION_MASK,
+            renderer=p.ER_TINY_RENDERER,
             physicsClientId=self.eid,
         )
+        self.stats.count("getCameraImage")
         image_array = np.uint8(np.reshape(image_info[2], (height, width, 4)))
 
-        image = Image.fromarray(image_array, "RGBA")
-
         if not new:
             for body in self.configuration.news:
                 color = body.color
                 color[-1] = 1.0
-                body.color = color
+                body._set_color(color)
+
+        return image_array
+
+    def get_image(self, width=None, height=None, distance=10, fov=90, new=True):
+        """Returns an image of the setup; the width and height default to
+        image_size."""
+
+        from PIL import Image
+
+        with self.stats.timer("get_image"):
+            image_array = self.__render(width, height, distance, fov, new)
 
-        return image
+        return Image.fromarray(image_array, "RGBA")
+
+    def save_image(self, path, width=None, height=None, distance=10, fov=90, new=True):
+        """Renders an image of the setup like get_image, and saves it to path as
+        a PNG in a background thread; see flush_images."""
+
+        with self.stats.timer("get_image"):
+            image_array = self.__render(width, height, distance, fov, new)
+
+        if self.__writer is None:
+            self.__writer = ImageWriter()
+        self.__writer.save(image_array, path)
+
+    def flush_images(self):
+        """Waits until all images queued by save_image are saved."""
+
+        if self.__writer is not None:
+            self.__writer.close()
+            self.__writer = None
 
     def set_camera_parameters(self, center=None, distance=6, yaw=0, pitch=-89.99):
         """Sets the GUI visualizer settings. Pitch and yaw are in degrees."""
@@ -246,11 +410,20 @@ class Engine(object):
 
         return p.removeAllUserDebugItems(physicsClientId=self.eid)
 
-    def load_configuration(self, json_input):
-        """Loads the configuration from a JSON object."""
+    def load_configuration(self, query):
+        """Loads the configuration from a JSON object or a Scene."""
+
+        with self.stats.timer("load_configuration"):
+            if not isinstance(query, Scene):
+                query = Scene.from_json(query)
+            return self.__load_configuration(query)
+
+    def __load_configuration(self, scene):
+        """Loads the configuration from a Scene; see load_configuration."""
 
-        def load_bodies(dic, surf, fixed=False, color=None):
-            """Loads bodies into the physics engine."""
+        def load_bodies(kind, surf, fixed=False, color=None):
+            """Loads the bodies of a section of the scene into the physics
+            engine."""
 
             # Define a constraint to maintain the body to be in the surface
             s_aabb = surf.aabb_info
@@ -262,55 +435,49 @@ class Engine(object):
             s_const = Constraint("rectangular", s_aabb)
 
             loaded_bodies = []
-            for key, body in dic.items():
-                path = os.path.join(home_dir, body["path"])
-                z_pos = body["z offset"] + (surf.z_off * 2.0)
-                if "pose" in body:
-                    pose = [float(x) for x in body["pose"]]
+            for index in np.flatnonzero(scene.kinds == kind):
+                path = os.path.join(home_dir, scene.get_path(index))
+                if "real" in path:
+                    globalScaling = 15.0
                 else:
+                    globalScaling = 1.0
+                geometry = self.geometry_cache.get(path, globalScaling)
+                z_off, area = self.__get_dimensions(scene, index, geometry)
+                z_pos = z_off + (surf.z_off * 2.0)
+                pose = scene.poses[index].tolist()
+                if np.isnan(pose).any():
                     pose = [
                         np.random.uniform(s_aabb["min x"], s_aabb["max x"]),
                         np.random.uniform(s_aabb["min y"], s_aabb["max y"]),
                         np.random.uniform(0, 2 * np.pi),
                     ]
-                constraints = []
-                constraints.append(s_const)
-                if "constraints" in body:
-                    for _, constraint in body["constraints"].items():
-                        constraints.append(
-                            Constraint(constraint["shape"], constraint["geometry"])
-                        )
+                constraints = [s_const]
+                constraints += [x for _, x in scene.get_constraints(index)]
 
                 orn = to_quaternion([0.0, 0.0, float(pose[2])])
-                if "real" in path:
-                    globalScaling = 15.0
-                else:
-                    globalScaling = 1.0
                 z_pos = z_pos * globalScaling
                 pos = [float(pose[0]), float(pose[1]), float(z_pos)]
-                bid = p.loadURDF(
-                    path,
-                    pos,
-                    orn,
-                    useFixedBase=fixed,
-                    physicsClientId=self.eid,
-                    globalScaling=globalScaling,
-                )
+                bid = self.load_body(path, pos, orn, fixed, globalScaling)
                 p.changeVisualShape(bid, -1, rgbaColor=color, physicsClientId=self.eid)
                 p.changeVisualShape(bid, 0, rgbaColor=color, physicsClientId=self.eid)
                 p.changeVisualShape(bid, 1, rgbaColor=color, physicsClientId=self.eid)
                 p.changeVisualShape(bid, 2, rgbaColor=color, physicsClientId=self.eid)
+                self.stats.count("changeVisualShape", 4)
 
                 body = Body(
                     int(bid),
                     color,
-                    str(key),
+                    str(scene.names[index]),
                     pose,
                     constraints,
                     z_pos,
-                    float(body["area"]),
+                    area,
                     str(path),
+                    geometry.footprint,
+                    self.eid,
                 )
+                body._bind_aabb_model(geometry.aabb_model)
+                self.__bids[body.oid] = body.bid
                 loaded_bodies.append(body)
 
             return loaded_bodies
@@ -325,22 +492,18 @@ class Engine(object):
         home_dir = os.path.dirname(
             os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         )
-        surf = json_input["surface"]
-        obs = json_input["obstacles"]
-        original = json_input["originals"]
-        new = json_input["news"]
 
-        s_path = os.path.join(home_dir, surf["path"])
+        # The surface is the first body of the scene
+        s_path = os.path.join(home_dir, scene.get_path(0))
         if "real" in s_path:
             globalScaling = 10
         else:
             globalScaling = 1
 
-        surf_id = p.loadURDF(
-            s_path,
-            useFixedBase=True,
-            physicsClientId=self.eid,
-            globalScaling=globalScaling,
+        s_geometry = self.geometry_cache.get(s_path, globalScaling)
+        s_z_off, s_area = self.__get_dimensions(scene, 0, s_geometry)
+        surf_id = self.load_body(
+            s_path, [0.0, 0.0, 0.0], [0.0, 0.0, 0.0, 1.0], True, globalScaling
         )
         surf = Body(
             int(surf_id),
@@ -348,27 +511,147 @@ class Engine(object):
             "surface",
             [0.0, 0.0, 0.0],
             [],
-            float(surf["z offset"]),
-            float(surf["area"]),
+            s_z_off,
+            s_area,
             str(s_path),
+            s_geometry.footprint,
+            self.eid,
         )
+        self.__bids[surf.oid] = surf.bid
         p.changeVisualShape(
             surf_id, -1, rgbaColor=[0.0, 1.0, 0.0, 1.0], physicsClientId=self.eid
         )
+        self.stats.count("changeVisualShape")
 
-        l_obs = []
-        if obs:
-            l_obs = load_bodies(obs, surf, fixed=True, color=[0.0, 0.0, 0.0, 1.0])
-
-        l_original = []
-        if original:
-            l_original = load_bodies(original, surf, color=[1.0, 0.0, 0.0, 1.0])
-
-        l_new = load_bodies(new, surf, color=[0.0, 0.0, 1.0, 1.0])
+        l_obs = load_bodies(1, surf, fixed=True, color=[0.0, 0.0, 0.0, 1.0])
+        l_original = load_bodies(2, surf, color=[1.0, 0.0, 0.0, 1.0])
+        l_new = load_bodies(3, surf, color=[0.0, 0.0, 1.0, 1.0])
 
         self.configuration = Configuration(surf, l_obs, l_original, l_new)
+        self.get_occupancy(self.configuration)
         return self.configuration
 
+    def __get_dimensions(self, scene, index, geometry):
+        """Returns the z offset and the area of a body of a scene, in the
+        unscaled units of queries. Those not given by the scene are derived
+        from the geometry of the URDF file of the body."""
+
+        z_off, area = float(scene.z_offs[index]), float(scene.areas[index])
+        scaling = geometry.scaling
+        if np.isnan(z_off):
+            z_off = -float(geometry.z_extent[0]) / scaling
+        if np.isnan(area):
+            area = geometry.area / (scaling * scaling)
+        if np.isnan(z_off) or np.isnan(area):
+            raise ValueError(
+                "The z offset and area of {} are not given, and its URDF file "
+                "is not made of primitives.".format(scene.names[index])
+            )
+
+        return z_off, area
+
+    def load_body(self, path, position, orientation, fixed, scaling):
+        """Loads a body from a URDF file and returns its ID. A body previously
+        released with the same URDF file, scaling, and base type is moved into
+        place instead of loading the URDF file again."""
+
+        key = (path, float(scaling), fixed)
+        if self.__pool.get(key):
+            bid = self.__pool[key].pop(0)
+            p.resetBasePositionAndOrientation(
+                bid, position, orientation, physicsClientId=self.eid
+            )
+            self.stats.count("resetBasePositionAndOrientation")
+            return bid
+
+        bid = p.loadURDF(
+            path,
+            position,
+            orientation,
+            useFixedBase=fixed,
+            physicsClientId=self.eid,
+            globalScaling=scaling,
+        )
+        self.stats.count("loadURDF")
+        self.__pool_keys[bid] = key
+        return bid
+
+    def release_body(self, bid):
+        """Parks a body loaded by load_body far away from the others so that it
+        can be reused."""
+
+        self.__park_body(bid)
+        self.__pool.setdefault(self.__pool_keys[bid], []).append(bid)
+
+    def __park_body(self, bid):
+        """Moves a body at rest far away from the others, and from the other
+        parked bodies."""
+
+        far = [1000.0 + (100.0 * bid), 1000.0, -1000.0]
+        p.resetBasePositionAndOrientation(
+            bid, far, [0.0, 0.0, 0.0, 1.0], physicsClientId=self.eid
+        )
+        self.stats.count("resetBasePositionAndOrientation")
+        p.resetBaseVelocity(
+            bid, [0.0, 0.0, 0.0], [0.0, 0.0, 0.0], physicsClientId=self.eid
+        )
+
+    def replicate(self):
+        """Returns a new headless engine into which the bodies of the current
+        configuration are loaded at their current poses. Configurations of this
+        engine can be evaluated by the new one after being bound to it."""
+
+        if self.configuration is None:
+            raise ValueError("No configuration is in the engine.")
+
+        engine = Engine()
+        engine.connect(visual=False)
+        engine.collision_method = self.collision_method
+        engine.collision_threshold = self.collision_threshold
+        engine.import_bodies(self.export_bodies())
+        engine.configuration = engine.bind(self.configuration)
+
+        return engine
+
+    def export_bodies(self):
+        """Returns the bodies of the current configuration as a picklable list
+        of (oid, path, scaling, fixed, position, orientation) tuples, which any
+        engine, in this process or another, can load with import_bodies."""
+
+        if self.configuration is None:
+            raise ValueError("No configuration is in the engine.")
+
+        bodies = []
+        for body in [self.configuration.surface] + self.configuration.collidable:
+            path, scaling, fixed = self.__pool_keys[body.bid]
+            pos, orn = p.getBasePositionAndOrientation(
+                body.bid, physicsClientId=self.eid
+            )
+            bodies.append((body.oid, path, scaling, fixed, pos, orn))
+
+        return bodies
+
+    def import_bodies(self, bodies):
+        """Loads bodies exported by export_bodies, such that configurations of
+        the exporting engine can be bound to this one."""
+
+        if not self.connected:
+            raise ValueError("Physics engine not connected.")
+
+        for oid, path, scaling, fixed, pos, orn in bodies:
+            self.__bids[oid] = int(self.load_body(path, pos, orn, fixed, scaling))
+
+    def bind(self, configuration):
+        """Returns a copy of a configuration, of this engine or of one of its
+        replicas, whose bodies are those loaded into this engine."""
+
+        configuration = copy.deepcopy(configuration)
+        for body in [configuration.surface] + configuration.collidable:
+            body.bid = self.__bids[body.oid]
+            body.eid = self.eid
+
+        return configuration
+
     def dump_configuration(self):
         """Dumps the engine's current configuration into a JSON object."""
 
@@ -421,60 +704,442 @@ class Engine(object):
         )
 
         for bid in [x.bid for x in bodies]:
-            p.removeBody(bid, physicsClientId=self.eid)
+            self.release_body(bid)
 
+        self.__num_links = {}
+        self.__colors = {}
+        self.__bids = {}
+        self.__static = None
+        self.clear_collision_cache()
         self.configuration = None
 
-    def push_bodies(self, configuration, batch_size=10):
+    def set_poses(self, configuration, poses):
+        """Sets the poses of the movable bodies of a configuration from the rows
+        of an (n, 3) array at once, subject to the constraints of each body, and
+        applies them to the physics engine."""
+
+        configuration.set_poses(poses)
+        for body, pose in zip(configuration.movable, configuration.poses.tolist()):
+            self.__applied_poses[body.oid] = tuple(pose)
+
+    def push_bodies(self, configuration, batch_size=10, window=20):
         """Modifies the physics engine's internal collision resolution to act as a
-        potential field."""
+        potential field.
+
+        The movable bodies start at rest and without contact points, so that
+        the result depends on the configuration alone, and not on the bodies
+        pushed before; see reset_contacts. Pushing stops as soon as the configuration is collision-free, or once it
+        is in static equilibrium: when the moving average of the collision
+        severity over the last window * batch_size steps is less than some
+        error. The poses are synchronized every batch_size steps, while the
+        number of steps between severity checks doubles as long as the severity
+        stays flat, up to 8 * batch_size."""
 
-        def static_equilibrium(history, s, e):
-            """We say that the configuration is in static equilibrium when its
-            moving average is less than some error e."""
+        with self.stats.timer("push_bodies"):
+            self.__push_bodies(configuration, batch_size, window)
 
-            if len(history) >= s:
-                cumsum_vec = np.cumsum(np.insert(history, 0, 0))
-                ma_vec = (cumsum_vec[s:] - cumsum_vec[:-s]) / s
-                return ma_vec[-1] < e
-            return False
+    def __push_bodies(self, configuration, batch_size, window):
+        """Pushes the bodies of a configuration; see push_bodies."""
 
         if not self.__connected:
             raise ValueError("Physics engine not connected.")
 
         self.configuration = configuration
+        if self.get_collision_info(configuration, "push_bodies")["severity"] == 0:
+            return
+        self.reset_contacts(configuration)
 
-        history = []
-        s = 20
+        span = window * batch_size
         e = 0.5 * len(configuration.collidable)
-        while not static_equilibrium(history, s, e):
-            for _ in range(batch_size):
-                p.stepSimulation(physicsClientId=self.eid)
-            configuration.update_configuration()
-            history.append(self.get_collision_info(configuration)["severity"])
+        history = collections.deque()
+        steps, total = 0, 0.0
+        size, previous = batch_size, None
+        while True:
+            for _ in range(size // batch_size):
+                for _ in range(batch_size):
+                    p.stepSimulation(physicsClientId=self.eid)
+                self.stats.count("stepSimulation", batch_size)
+                configuration.update_configuration()
+            severity = self.get_collision_info(configuration, "push_bodies")["severity"]
+            if severity == 0:
+                return
+
+            history.append((size, severity))
+            steps, total = steps + size, total + (size * severity)
+            while steps - history[0][0] >= span:
+                n, old = history.popleft()
+                steps, total = steps - n, total - (n * old)
+            if steps >= span and total / steps < e:
+                return
+
+            if previous is not None and abs(severity - previous) <= 0.05 * previous:
+                size = min(2 * size, 8 * batch_size)
+                if steps < span:
+                    size = min(size, span - steps)
+            else:
+                size = batch_size
+            previous = severity
+
+    def reset_contacts(self, configuration):
+        """Makes the physics engine forget the contact points and the velocities
+        of the movable bodies of a configuration, which it would otherwise carry
+        over from previous steps. The bodies are parked for a single collision
+        detection pass, which drops their contact points, and put back."""
+
+        if not hasattr(p, "performCollisionDetection"):
+            return
 
-    def get_collision_info(self, configuration):
+        # Assigning a configuration puts its bodies back only if one is loaded
+        if self.configuration is None:
+            self.configuration = configuration
+        for body in configuration.movable:
+            self.__park_body(body.bid)
+        p.performCollisionDetection(physicsClientId=self.eid)
+        self.configuration = configuration
+
+    def separate_bodies(self, configuration, iterations=500):
+        """Pushes the movable bodies of a configuration out of collision from
+        their footprints in batch, without stepping the simulation; see
+        separate_footprints. Falls back to push_bodies unless all collidable
+        bodies have footprints."""
+
+        if not self.__connected:
+            raise ValueError("Physics engine not connected.")
+
+        collidable = configuration.collidable
+        if any(body.footprint is None for body in collidable):
+            return self.push_bodies(configuration)
+
+        n_obstacles = len(configuration.obstacles)
+        poses, _ = separate_footprints(
+            [body.footprint for body in collidable],
+            [body.pose for body in collidable],
+            [body.z_off for body in collidable],
+            [body.constraints for body in collidable],
+            [index < n_obstacles for index in range(len(collidable))],
+            iterations=iterations,
+            tolerance=self.collision_threshold,
+        )
+        self.configuration = configuration
+        self.set_poses(configuration, poses[n_obstacles:])
+
+    def snapshot(self):
+        """Saves the state of the physics engine, along with the poses applied
+        to it, and returns the ID of the snapshot."""
+
+        sid = p.saveState(physicsClientId=self.eid)
+        self.__snapshots[sid] = dict(self.__applied_poses)
+
+        return sid
+
+    def restore(self, sid):
+        """Restores the state of the physics engine saved by snapshot, such as
+        that of the engine of a worker process before each task. The bodies of
+        a configuration can then be synchronized with update_configuration."""
+
+        p.restoreState(sid, physicsClientId=self.eid)
+        self.__applied_poses = dict(self.__snapshots[sid])
+
+    def remove_snapshot(self, sid):
+        """Frees the state of the physics engine saved by snapshot."""
+
+        p.removeState(sid, physicsClientId=self.eid)
+        del self.__snapshots[sid]
+
+    def clear_collision_cache(self):
+        """Forgets all poses, AABBs, and penetration depths cached by previous
+        collision checks. The occupancy of the obstacles is kept, as they never
+        move."""
+
+        self.__applied_poses = {}
+        self.__checked_poses = {}
+        self.__aabbs = {}
+        self.__penetrations = {}
+        self.__matrix = None
+
+    def get_aabb(self, body):
+        """Returns the AABB enclosing all links of a body as a pair of
+        [x, y, z] lists."""
+
+        bid = body.bid
+        if bid not in self.__num_links:
+            self.__num_links[bid] = p.getNumJoints(bid, physicsClientId=self.eid)
+
+        # The AABB of a single link is predicted from its model once learned
+        if not self.__num_links[bid]:
+            return body._get_aabb(self.__get_applied_pose(body))
+
+        aabb_min, aabb_max = p.getAABB(bid, physicsClientId=self.eid)
+        aabb_min, aabb_max = list(aabb_min), list(aabb_max)
+        for link in range(self.__num_links[bid]):
+            link_min, link_max = p.getAABB(bid, link, physicsClientId=self.eid)
+            aabb_min = [min(x, y) for x, y in zip(aabb_min, link_min)]
+            aabb_max = [max(x, y) for x, y in zip(aabb_max, link_max)]
+        self.stats.count("getAABB", 1 + self.__num_links[bid])
+
+        return [aabb_min, aabb_max]
+
+    def __get_static(self, configuration):
+        """Returns the occupancy of the obstacles of a configuration, and the
+        penetration depths between pairs of its obstacles as a list of
+        (index, index, penetration) tuples of the pairs in collision.
+
+        Both are computed once per set of obstacles, as obstacles never move."""
+
+        obstacles = configuration.obstacles
+        key = tuple(body.oid for body in obstacles)
+        if self.__static is not None and self.__static[0] == key:
+            return self.__static
+
+        aabbs = [self.get_aabb(body) for body in obstacles]
+        s_min, s_max = self.get_aabb(configuration.surface)
+        occupancy = Occupancy(aabbs, [s_min[:2], s_max[:2]])
+
+        static = []
+        for k, m in get_overlapping_pairs(aabbs):
+            penetration = self.__get_pairwise_penetration(obstacles[k], obstacles[m])
+            if penetration > 0:
+                static.append((k, m, penetration))
+
+        self.__static = (key, occupancy, static)
+
+        return self.__static
+
+    def get_occupancy(self, configuration):
+        """Returns the Occupancy of the obstacles of a configuration, against
+        which AABBs can be screened in constant time. It is computed when the
+        configuration is loaded and kept until it is destroyed."""
+
+        return self.__get_static(configuration)[1]
+
+    def get_candidate_pairs(self, configuration):
+        """Returns the pairs of collidable bodies, other than pairs of obstacles,
+        whose AABBs overlap; only these pairs can be in collision. The AABBs of
+        movable bodies are only checked against the obstacles that their cells
+        of the occupancy of the obstacles do not rule out."""
+
+        collidable = configuration.collidable
+        n_obstacles = len(configuration.obstacles)
+        occupancy = self.get_occupancy(configuration)
+
+        aabbs = []
+        for body in configuration.movable:
+            pose = self.__get_applied_pose(body)
+            cached = self.__aabbs.get(body.oid)
+            if cached is None or cached[0] != pose:
+                cached = (pose, self.get_aabb(body))
+                self.__aabbs[body.oid] = cached
+            aabbs.append(cached[1])
+
+        pairs = [(k, n_obstacles + i) for i, k in occupancy.get_overlapping_pairs(aabbs)]
+        for i, j in get_overlapping_pairs(aabbs):
+            pairs.append((n_obstacles + i, n_obstacles + j))
+
+        return [(collidable[i], collidable[j]) for i, j in sorted(pairs)]
+
+    def get_contact_pairs(self, configuration):
+        """Returns the pairs of collidable bodies that penetrate each other
+        according to the contact points of a single collision detection pass.
+        Pairs of obstacles are left out, as the physics engine does not detect
+        contacts between two fixed bodies; see get_occupancy.
+
+        Contact points persist across passes and may be stale for bodies whose
+        poses have been reset, so these pairs are candidates to be checked
+        rather than collisions."""
+
+        collidable = configuration.collidable
+        p.performCollisionDetection(physicsClientId=self.eid)
+        points = p.getContactPoints(physicsClientId=self.eid)
+        self.stats.count("getContactPoints")
+        if not points:
+            return []
+
+        contacts = np.array([point[1:3] for point in points if point[8] < 0])
+        if not len(contacts):
+            return []
+
+        # Index of each collidable body by its pybullet ID, -1 for the others
+        bids = np.array([body.bid for body in collidable])
+        index = np.full(max(bids.max(), contacts.max()) + 1, -1)
+        index[bids] = np.arange(len(collidable))
+        pairs = np.sort(index[contacts], axis=1)
+        pairs = np.unique(pairs[pairs[:, 0] >= 0], axis=0)
+
+        return [(collidable[i], collidable[j]) for i, j in pairs]
+
+    def __get_applied_pose(self, body):
+        """Returns the pose of the body as it was last applied to the physics
+        engine."""
+
+        return self.__applied_poses.get(body.oid, tuple(body.pose))
+
+    def __get_pairwise_penetration(self, body1, body2):
+        """Returns the penetration depth between two bodies (0 if there is no
+        collision)."""
+
+        points = p.getClosestPoints(body1.bid, body2.bid, 0, physicsClientId=self.eid)
+        self.stats.count("getClosestPoints")
+        if points:
+            return -points[0][8]
+        return 0
+
+    def __get_penetrations(self, configuration):
+        """Returns the penetration depths of the pairs of bodies in collision,
+        or that may be, as a list of (body, body, penetration) tuples, by the
+        contact points of the physics engine or by the candidate pairs. Pairs
+        of obstacles in collision are taken as computed once by __get_static."""
+
+        if self.collision_method == "contacts" and hasattr(
+            p, "performCollisionDetection"
+        ):
+            pairs = self.get_contact_pairs(configuration)
+        else:
+            pairs = self.get_candidate_pairs(configuration)
+        result = self.__get_pair_penetrations(configuration, pairs)
+
+        obstacles = configuration.obstacles
+        for k, m, penetration in self.__get_static(configuration)[2]:
+            result.append((obstacles[k], obstacles[m], penetration))
+
+        return result
+
+    def __get_pair_penetrations(self, configuration, pairs):
+        """Returns the penetration depths of pairs of collidable bodies of a
+        configuration as a list of (body, body, penetration) tuples.
+
+        Depths are cached per pair of body OIDs, and are only recomputed for
+        pairs in which at least one body is dirty, i.e. has been moved since the
+        previous check."""
+
+        collidable = configuration.collidable
+
+        poses = {}
+        for body in collidable:
+            poses[body.oid] = self.__get_applied_pose(body)
+        dirty = set(
+            oid for oid, pose in poses.items() if self.__checked_poses.get(oid) != pose
+        )
+
+        penetrations = {}
+        result = []
+        for i, j in pairs:
+            key = (i.oid, j.oid)
+            if key in self.__penetrations and not (i.oid in dirty or j.oid in dirty):
+                penetration = self.__penetrations[key]
+            else:
+                penetration = self.__get_pairwise_penetration(i, j)
+            penetrations[key] = penetration
+            result.append((i, j, penetration))
+
+        # Pairs that are no longer candidates involve at least one dirty body,
+        # so only the current candidates are worth keeping.
+        self.__checked_poses.update(poses)
+        self.__penetrations = penetrations
+
+        return result
+
+    def __get_penetration_matrix(self, configuration):
+        """Returns the penetration matrix; see get_penetration_matrix.
+
+        The matrix of the last check is kept along with the collision method,
+        bodies, and applied poses it was computed for, and is returned as is if
+        they have not changed since."""
+
+        collidable = configuration.collidable
+        poses = tuple(self.__get_applied_pose(body) for body in collidable)
+        key = (self.collision_method, tuple(body.oid for body in collidable), poses)
+        if self.__matrix is not None and self.__matrix[0] == key:
+            return self.__matrix[1]
+
+        if self.collision_method == "analytic" and all(
+            body.footprint is not None for body in collidable
+        ):
+            penetrations = get_penetration_matrix(
+                [body.footprint for body in collidable],
+                poses,
+                [body.z_off for body in collidable],
+            )
+        else:
+            index = dict((id(body), k) for k, body in enumerate(collidable))
+            penetrations = np.zeros((len(collidable), len(collidable)))
+            for i, j, penetration in self.__get_penetrations(configuration):
+                penetrations[index[id(i)], index[id(j)]] = penetration
+                penetrations[index[id(j)], index[id(i)]] = penetration
+
+        penetrations.setflags(write=False)
+        self.__matrix = (key, penetrations)
+
+        return penetrations
+
+    def get_penetration_matrix(self, configuration, layer="other"):
+        """
+        Returns the penetration depths between all pairs of collidable bodies of
+        a configuration. The matrix is cached until the poses of the bodies
+        change, and is therefore read-only.
+
+        Parameters
+        ----------
+        configuration : Configuration
+            the configuration to check.
+        layer : str
+            the layer whose stats the evaluation is counted in.
+
+        Returns
+        -------
+        penetrations : ndarray
+            (n, n) symmetric array of penetration depths, in the order of
+            configuration.collidable; 0 if there is no collision.
+        """
+
+        self.stats.evaluate(layer)
+        with self.stats.timer("get_penetration_matrix"):
+            self.configuration = configuration
+            return self.__get_penetration_matrix(configuration)
+
+    def get_collision_scores(self, configuration, layer="other"):
+        """Returns the cumulative penetration depth of the collisions of each
+        collidable body of a configuration, in the order of
+        configuration.collidable; the higher the score of a body, the more
+        relocating it resolves."""
+
+        penetrations = self.get_penetration_matrix(configuration, layer)
+        in_collision = penetrations > self.collision_threshold
+
+        return np.sum(np.where(in_collision, penetrations, 0.0), axis=1)
+
+    def __set_color(self, body, color):
+        """Sets the color of a body, or only tracks it if colors are lazy."""
+
+        if self.lazy_colors:
+            self.__colors[body.oid] = color
+        else:
+            body._set_color(color)
+
+    def flush_colors(self):
+        """Pushes the colors tracked while colors are lazy to the bodies of the
+        current configuration."""
+
+        if self.configuration is not None:
+            for body in self.configuration.collidable:
+                if body.oid in self.__colors:
+                    body._set_color(list(self.__colors[body.oid]))
+        self.__colors = {}
+
+    def get_collision_info(self, configuration, layer="other"):
         """Returns a dictionary with information containing:
         1) A boolean depicting the existence of at least one collision,
         2) the number of collisions,
         3) the cumulative penetration depth of all collisions, and
-        4) the colliding Body objects."""
-
-        def pairwaise_collision_check(body1, body2):
-            """Returns the presence of a collision between two bodies and their
-            penetration depth (0 if no collision)."""
+        4) the colliding Body objects.
 
-            try:
-                penetration = p.getClosestPoints(
-                    body1.bid, body2.bid, 0, physicsClientId=self.eid
-                )[0][8]
-                collision = True
+        The evaluation is counted in the stats of the layer that requested it."""
 
-            except IndexError:
-                penetration = 0
-                collision = False
+        self.stats.evaluate(layer)
+        with self.stats.timer("get_collision_info"):
+            return self.__get_collision_info(configuration)
 
-            return collision, -penetration
+    def __get_collision_info(self, configuration):
+        """Returns the collision information; see get_collision_info."""
 
         self.configuration = configuration
         collision = False
@@ -482,21 +1147,23 @@ class Engine(object):
         colliding = set()
         collisions = 0
 
-        for i, j in itertools.combinations(configuration.collidable, 2):
-            _, penetration = pairwaise_collision_check(i, j)
-            if penetration > self.collision_threshold:
-                if i not in configuration.obstacles:
-                    i.color = [1.0, 1.0, 0.0, 1.0]
-                    j.color = [1.0, 1.0, 0.0, 1.0]
-                collisions += 1
-                cum_penetration += penetration
-                collision = True
-                colliding.add(i)
-                colliding.add(j)
+        collidable = configuration.collidable
+        penetrations = self.__get_penetration_matrix(configuration)
+        pairs = np.nonzero(np.triu(penetrations > self.collision_threshold))
+        for k, m in zip(*pairs):
+            i, j = collidable[k], collidable[m]
+            if i not in configuration.obstacles:
+                self.__set_color(i, [1.0, 1.0, 0.0, 1.0])
+                self.__set_color(j, [1.0, 1.0, 0.0, 1.0])
+            collisions += 1
+            cum_penetration += float(penetrations[k, m])
+            collision = True
+            colliding.add(i)
+            colliding.add(j)
 
         for body in configuration.collidable:
             if body not in colliding:
-                body.reset_color()
+                self.__set_color(body, body.init_color)
 
         collision_info = {
             "status": collision,
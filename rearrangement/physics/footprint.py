@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    Footprint class definition
+
+    A footprint is the projection of a body onto the x-y plane, described as a
+    union of boxes and discs that are extruded along the z-axis. Footprints are
+    extracted from the collision geometry of URDF files made of primitives.
+
+    Author: Abdul Rahman Dabbour
+    Affiliation: CogRobo Lab, FENS, Sabanci University
+    License: GNU Affero General Public License v3.0
+    Repository: https://github.com/ardabbour/rearrangement/
+"""
+
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+
+class Footprint(object):
+    """
+    Defines the footprint of a body in its base frame. Footprints are immutable,
+    and are therefore shared rather than copied.
+
+    Parameters
+    ----------
+    centers : list
+        the [x, y] centers of the primitives.
+    yaws : list
+        the yaw of each primitive.
+    extents : list
+        the [x, y] half extents of each primitive; both are the radius for discs.
+    discs : list
+        whether each primitive is a disc (True) or a box (False).
+    heights : list
+        the [min z, max z] extents of each primitive.
+
+    Attributes
+    ----------
+    centers : ndarray
+        (m, 2) array of the centers of the primitives.
+    yaws : ndarray
+        (m,) array of the yaw of each primitive.
+    extents : ndarray
+        (m, 2) array of the half extents of each primitive.
+    discs : ndarray
+        (m,) boolean array, True for the primitives that are discs.
+    heights : ndarray
+        (m, 2) array of the [min z, max z] extents of each primitive.
+    """
+
+    def __init__(self, centers, yaws, extents, discs, heights):
+        self.__centers = np.array(centers, dtype=float).reshape(-1, 2)
+        self.__yaws = np.array(yaws, dtype=float).reshape(-1)
+        self.__extents = np.array(extents, dtype=float).reshape(-1, 2)
+        self.__discs = np.array(discs, dtype=bool).reshape(-1)
+        self.__heights = np.array(heights, dtype=float).reshape(-1, 2)
+
+        for array in [
+            self.__centers,
+            self.__yaws,
+            self.__extents,
+            self.__discs,
+            self.__heights,
+        ]:
+            array.setflags(write=False)
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __len__(self):
+        return len(self.__yaws)
+
+    @property
+    def centers(self):
+        return self.__centers
+
+    @property
+    def yaws(self):
+        return self.__yaws
+
+    @property
+    def extents(self):
+        return self.__extents
+
+    @property
+    def discs(self):
+        return self.__discs
+
+    @property
+    def heights(self):
+        return self.__heights
+
+
+def _parse_origin(element):
+    """Returns the [x, y, z] position and the yaw of the origin of a URDF
+    element, or None if it is rotated about the x or y axes."""
+
+    origin = element.find("origin")
+    if origin is None:
+        return [0.0, 0.0, 0.0], 0.0
+
+    xyz = _parse_floats(origin.get("xyz", "0 0 0"))
+    rpy = _parse_floats(origin.get("rpy", "0 0 0"))
+    if rpy[0] != 0.0 or rpy[1] != 0.0:
+        return None
+
+    return xyz, rpy[2]
+
+
+def _parse_floats(string):
+    """Parses a whitespace (or comma) separated string of floats."""
+
+    return [float(x) for x in string.replace(",", " ").split()]
+
+
+def _compose(parent, child):
+    """Composes two planar transforms given as ([x, y, z], yaw)."""
+
+    (p_xyz, p_yaw), (c_xyz, c_yaw) = parent, child
+    cos, sin = np.cos(p_yaw), np.sin(p_yaw)
+    xyz = [
+        p_xyz[0] + (cos * c_xyz[0]) - (sin * c_xyz[1]),
+        p_xyz[1] + (sin * c_xyz[0]) + (cos * c_xyz[1]),
+        p_xyz[2] + c_xyz[2],
+    ]
+
+    return xyz, p_yaw + c_yaw
+
+
+def load_footprint(path, scaling=1.0):
+    """
+    Extracts the footprint of a body from its URDF file.
+
+    Parameters
+    ----------
+    path : str
+        the path to the URDF file describing the body.
+    scaling : float
+        the global scaling the body is loaded with.
+
+    Returns
+    -------
+    footprint : Footprint
+        the footprint of the body, or None if the body is not made of boxes,
+        cylinders, and spheres joined by fixed joints and rotated only about the
+        z-axis.
+    """
+
+    try:
+        robot = ET.parse(path).getroot()
+    except (IOError, ET.ParseError):
+        return None
+
+    links = dict((link.get("name"), link) for link in robot.findall("link"))
+    parents = {}
+    for joint in robot.findall("joint"):
+        origin = _parse_origin(joint)
+        if joint.get("type") != "fixed" or origin is None:
+            return None
+        parents[joint.find("child").get("link")] = (
+            joint.find("parent").get("link"),
+            origin,
+        )
+
+    bases = [name for name in links if name not in parents]
+    if len(bases) != 1:
+        return None
+
+    # The base pose set in the physics engine is that of the inertial frame
+    inertial = links[bases[0]].find("inertial")
+    if inertial is not None:
+        origin = _parse_origin(inertial)
+        if origin is None or any(x != 0.0 for x in origin[0]) or origin[1] != 0.0:
+            return None
+
+    def get_frame(name):
+        """Returns the transform from the base frame to the link frame."""
+
+        if name not in parents:
+            return [0.0, 0.0, 0.0], 0.0
+        parent, origin = parents[name]
+        return _compose(get_frame(parent), origin)
+
+    centers, yaws, extents, discs, heights = [], [], [], [], []
+    for name, link in links.items():
+        frame = get_frame(name)
+        for collision in link.findall("collision"):
+            origin = _parse_origin(collision)
+            geometry = collision.find("geometry")
+            if origin is None or geometry is None:
+                return None
+            (x, y, z), yaw = _compose(frame, origin)
+
+            box = geometry.find("box")
+            cylinder = geometry.find("cylinder")
+            sphere = geometry.find("sphere")
+            if box is not None:
+                size = _parse_floats(box.get("size"))
+                half_height = size[2] / 2
+                extent, disc = [size[0] / 2, size[1] / 2], False
+            elif cylinder is not None:
+                radius = float(cylinder.get("radius"))
+                half_height = float(cylinder.get("length")) / 2
+                extent, disc = [radius, radius], True
+            elif sphere is not None:
+                radius = float(sphere.get("radius"))
+                extent, half_height, disc = [radius, radius], radius, True
+            else:
+                return None
+
+            centers.append([x * scaling, y * scaling])
+            yaws.append(yaw)
+            extents.append([extent[0] * scaling, extent[1] * scaling])
+            discs.append(disc)
+            heights.append([(z - half_height) * scaling, (z + half_height) * scaling])
+
+    if not centers:
+        return None
+
+    return Footprint(centers, yaws, extents, discs, heights)
+
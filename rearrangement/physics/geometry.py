@@ -0,0 +1,393 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    Geometry class definition
+
+    The geometry of a URDF model loaded at some global scaling: its footprint,
+    the convex polygon enclosing the footprint, its area and extents, and the
+    model of its AABB learned from the physics engine. Geometries are computed
+    once per model and kept in a cache, in memory and on disk, so that they are
+    reused across queries, workers, and runs.
+
+    Author: Abdul Rahman Dabbour
+    Affiliation: CogRobo Lab, FENS, Sabanci University
+    License: GNU Affero General Public License v3.0
+    Repository: https://github.com/ardabbour/rearrangement/
+"""
+
+import json
+import os
+import warnings
+
+import numpy as np
+
+from rearrangement import make_dirs
+from rearrangement.errors import type_error
+from rearrangement.physics import Footprint, load_footprint
+
+
+class Geometry(object):
+    """
+    Defines the geometry of a URDF model at a global scaling. All lengths are
+    scaled.
+
+    Parameters
+    ----------
+    footprint : Footprint
+        the footprint of the model; None if it is not made of primitives.
+    scaling : float
+        the global scaling the model is loaded with.
+    aabb_model : dict
+        the AABB model learned by the bodies of the model; see Body.
+
+    Attributes
+    ----------
+    footprint : Footprint
+        the footprint of the model; None if it is not made of primitives.
+    scaling : float
+        the global scaling the model is loaded with.
+    polygon : ndarray
+        (k, 2) array of the vertices of the convex hull of the footprint, in
+        counter-clockwise order; empty without a footprint.
+    area : float
+        the area of the footprint (the union of its primitives); NaN without a
+        footprint.
+    z_extent : ndarray
+        the [min z, max z] extents of the footprint; NaN without a footprint.
+    half_extents : ndarray
+        the [x center, y center, x half extent, y half extent] of the box
+        enclosing the footprint at a yaw of 0; NaN without a footprint.
+    aabb_model : dict
+        the AABB model shared by all bodies of the model, which they complete
+        as they query the physics engine.
+    """
+
+    def __init__(self, footprint, scaling=1.0, aabb_model=None):
+        self.__footprint = footprint
+        self.__scaling = float(scaling)
+        self.__aabb_model = {} if aabb_model is None else aabb_model
+
+        if footprint is None:
+            self.__polygon = np.zeros((0, 2))
+            self.__area = float("nan")
+            self.__z_extent = np.full(2, np.nan)
+            self.__half_extents = np.full(4, np.nan)
+        else:
+            points = _get_outline(footprint)
+            low, high = points.min(axis=0), points.max(axis=0)
+            self.__polygon = _get_convex_hull(points)
+            self.__area = _get_area(footprint, low, high)
+            self.__z_extent = np.array(
+                [footprint.heights[:, 0].min(), footprint.heights[:, 1].max()]
+            )
+            self.__half_extents = np.concatenate([(low + high) / 2, (high - low) / 2])
+
+        for array in [self.__polygon, self.__z_extent, self.__half_extents]:
+            array.setflags(write=False)
+
+    def __deepcopy__(self, memo):
+        return self
+
+    @property
+    def footprint(self):
+        return self.__footprint
+
+    @property
+    def scaling(self):
+        return self.__scaling
+
+    @property
+    def polygon(self):
+        return self.__polygon
+
+    @property
+    def area(self):
+        return self.__area
+
+    @property
+    def z_extent(self):
+        return self.__z_extent
+
+    @property
+    def half_extents(self):
+        return self.__half_extents
+
+    @property
+    def aabb_model(self):
+        return self.__aabb_model
+
+
+def _get_outline(footprint, vertices=32):
+    """Returns the corners of the boxes and points along the circles of the
+    discs of a footprint, as an (m, 2) array."""
+
+    points = []
+    angles = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    for center, yaw, extent, disc in zip(
+        footprint.centers, footprint.yaws, footprint.extents, footprint.discs
+    ):
+        if disc:
+            local = extent[0] * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+        else:
+            local = extent * np.array([[1, 1], [-1, 1], [-1, -1], [1, -1]])
+            cos, sin = np.cos(yaw), np.sin(yaw)
+            local = local.dot(np.array([[cos, sin], [-sin, cos]]))
+        points.append(center + local)
+
+    return np.concatenate(points)
+
+
+def _get_convex_hull(points):
+    """Returns the convex hull of points in counter-clockwise order, by the
+    monotone chain algorithm."""
+
+    points = sorted(set(map(tuple, np.round(points, 12).tolist())))
+    if len(points) < 3:
+        return np.array(points, dtype=float).reshape(-1, 2)
+
+    def cross(o, a, b):
+        return ((a[0] - o[0]) * (b[1] - o[1])) - ((a[1] - o[1]) * (b[0] - o[0]))
+
+    lower, upper = [], []
+    for point in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], point) <= 0:
+            lower.pop()
+        lower.append(point)
+    for point in reversed(points):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], point) <= 0:
+            upper.pop()
+        upper.append(point)
+
+    return np.array(lower[:-1] + upper[:-1], dtype=float)
+
+
+def _get_area(footprint, low, high, resolution=256):
+    """Returns the area of the union of the primitives of a footprint, sampled
+    at the centers of the cells of a raster over the box [low, high]."""
+
+    cell = max(float(np.max(high - low)) / resolution, 1e-12)
+    xs = np.arange(low[0] + (cell / 2), high[0], cell)
+    ys = np.arange(low[1] + (cell / 2), high[1], cell)
+    points = np.stack(np.meshgrid(xs, ys), axis=-1).reshape(-1, 2)
+
+    inside = np.zeros(len(points), dtype=bool)
+    for center, yaw, extent, disc in zip(
+        footprint.centers, footprint.yaws, footprint.extents, footprint.discs
+    ):
+        dist = points - center
+        if disc:
+            inside |= np.sum(dist ** 2, axis=1) <= extent[0] ** 2
+        else:
+            cos, sin = np.cos(yaw), np.sin(yaw)
+            local_x = (cos * dist[:, 0]) + (sin * dist[:, 1])
+            local_y = (cos * dist[:, 1]) - (sin * dist[:, 0])
+            inside |= (np.abs(local_x) <= extent[0]) & (np.abs(local_y) <= extent[1])
+
+    return float(np.count_nonzero(inside)) * cell * cell
+
+
+class GeometryCache(object):
+    """
+    Defines a cache of the geometries of URDF models, keyed by the path of the
+    URDF file and the global scaling. Geometries are stored on disk as JSON,
+    along with the modification time and size of their URDF files, and are
+    computed again whenever the URDF file changes.
+
+    Parameters
+    ----------
+    path : str
+        the JSON file in which the cache is stored; None keeps it in memory.
+
+    Attributes
+    ----------
+    path : str
+        the JSON file in which the cache is stored; None keeps it in memory.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.__geometries = {}
+        self.__stamps = {}
+
+    def __len__(self):
+        return len(self.__geometries)
+
+    @property
+    def path(self):
+        return self.__path
+
+    @path.setter
+    def path(self, path):
+        if path is None or isinstance(path, str):
+            self.__path = path
+            self.__stored = None
+        else:
+            raise type_error("path", str, type(path))
+
+    def __get_stored(self):
+        """Returns the records stored on disk, read on first use."""
+
+        if self.__stored is None:
+            self.__stored = _read_records(self.path)
+
+        return self.__stored
+
+    def get(self, urdf, scaling=1.0):
+        """Returns the geometry of a URDF file at a global scaling, computing it
+        only if it is neither in memory nor stored with a matching URDF file."""
+
+        key = _get_key(urdf, scaling)
+        if key in self.__geometries:
+            return self.__geometries[key]
+
+        stamp = _get_stamp(urdf)
+        record = self.__get_stored().get(key)
+        if record is not None and record["stamp"] == stamp:
+            geometry = _from_record(record)
+        else:
+            geometry = Geometry(load_footprint(urdf, scaling), scaling)
+
+        self.__geometries[key] = geometry
+        self.__stamps[key] = stamp
+
+        return geometry
+
+    def save(self):
+        """Writes the geometries in memory to disk, merged with those already
+        stored, unless none was computed or verified since they were read or
+        last written; failing to write only warns."""
+
+        if self.path is None:
+            return
+
+        stored = self.__get_stored()
+        changes = {}
+        for key, geometry in self.__geometries.items():
+            record = _to_record(geometry, self.__stamps[key])
+            if stored.get(key) != record:
+                changes[key] = record
+        if not changes:
+            return
+
+        records = dict(_read_records(self.path))
+        records.update(changes)
+
+        # Written to a temporary file first, as other processes may read it
+        temp_path = "{}.{}.tmp".format(self.path, os.getpid())
+        try:
+            make_dirs(os.path.dirname(self.path))
+            with open(temp_path, "w") as cache_file:
+                json.dump(records, cache_file, sort_keys=True)
+            _replace(temp_path, self.path)
+        except (IOError, OSError) as error:
+            warnings.warn("Geometry cache not saved: {}".format(error))
+            return
+        self.__stored = records
+
+    def clear(self):
+        """Forgets the geometries in memory; those on disk are kept."""
+
+        self.__geometries = {}
+        self.__stamps = {}
+        self.__stored = None
+
+
+# os.replace is not available on Python 2, where os.rename replaces the file
+# atomically on POSIX systems
+_replace = getattr(os, "replace", os.rename)
+
+
+def _get_key(urdf, scaling):
+    """Returns the key of a URDF file and a global scaling."""
+
+    return "{}|{!r}".format(os.path.abspath(urdf), float(scaling))
+
+
+def _get_stamp(urdf):
+    """Returns the modification time and size of a URDF file."""
+
+    try:
+        stat = os.stat(urdf)
+    except OSError:
+        return None
+
+    return [stat.st_mtime, stat.st_size]
+
+
+def _read_records(path):
+    """Returns the records of a cache file; an empty dict if there is none or
+    it cannot be read."""
+
+    if path is None or not os.path.isfile(path):
+        return {}
+
+    try:
+        with open(path) as cache_file:
+            return json.load(cache_file)
+    except (IOError, ValueError):
+        return {}
+
+
+def _to_record(geometry, stamp):
+    """Returns a geometry as a JSON-serializable record. Only verified AABB
+    models are stored."""
+
+    footprint = geometry.footprint
+    record = {
+        "stamp": stamp,
+        "scaling": geometry.scaling,
+        "footprint": None,
+        "aabb model": None,
+    }
+    if footprint is not None:
+        record["footprint"] = {
+            "centers": footprint.centers.tolist(),
+            "yaws": footprint.yaws.tolist(),
+            "extents": footprint.extents.tolist(),
+            "discs": footprint.discs.tolist(),
+            "heights": footprint.heights.tolist(),
+        }
+    model = geometry.aabb_model
+    if model.get("verified"):
+        record["aabb model"] = {
+            "local": list(model["local"]),
+            "offset": model["offset"],
+            "yaw": model["yaw"],
+            "invariant": model["invariant"],
+        }
+
+    return record
+
+
+def _from_record(record):
+    """Returns the geometry of a record made by _to_record."""
+
+    footprint = record["footprint"]
+    if footprint is not None:
+        footprint = Footprint(
+            footprint["centers"],
+            footprint["yaws"],
+            footprint["extents"],
+            footprint["discs"],
+            footprint["heights"],
+        )
+    model = {}
+    if record["aabb model"] is not None:
+        model = dict(record["aabb model"], verified=True)
+
+    return Geometry(footprint, record["scaling"], model)
+
+
+# Shared by all engines of a process; kept in memory unless given a path
+_CACHE = GeometryCache()
+
+
+def get_geometry_cache(path=None):
+    """Returns the geometry cache shared by all engines of the process. It is
+    kept in memory, unless a JSON file is given in which it is stored across
+    processes, such as TEMP_PATH + "/geometry-cache.json"."""
+
+    if path is not None:
+        _CACHE.path = path
+
+    return _CACHE
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    Occupancy class definition
+
+    An occupancy is a raster of the cells of the surface covered by the AABBs of
+    the obstacles. As obstacles never move, it is computed once per query, after
+    which any AABB can be screened against all obstacles in constant time using
+    a summed-area table of the raster.
+
+    Author: Abdul Rahman Dabbour
+    Affiliation: CogRobo Lab, FENS, Sabanci University
+    License: GNU Affero General Public License v3.0
+    Repository: https://github.com/ardabbour/rearrangement/
+"""
+
+import numpy as np
+
+
+class Occupancy(object):
+    """
+    Defines the occupancy of a set of obstacles. Occupancies are immutable.
+
+    Parameters
+    ----------
+    aabbs : list
+        the AABBs of the obstacles, each in the [[min x, min y, min z],
+        [max x, max y, max z]] format.
+    bounds : list
+        the [[min x, min y], [max x, max y]] region to rasterize, typically
+        that of the surface; it is extended to cover all obstacles.
+    resolution : int
+        the number of cells along the longer side of the region.
+
+    Attributes
+    ----------
+    aabbs : ndarray
+        (m, 2, 3) array of the AABBs of the obstacles.
+    bounds : ndarray
+        (2, 2) array of the rasterized region.
+    cell_size : float
+        the length of the side of each (square) cell.
+    grid : ndarray
+        (rows, columns) boolean array, True for the cells covered by at least
+        one obstacle; rows are along the y-axis.
+    """
+
+    def __init__(self, aabbs, bounds=None, resolution=64):
+        self.__aabbs = np.array(aabbs, dtype=float).reshape(-1, 2, 3)
+
+        corners = [self.__aabbs[:, 0, :2], self.__aabbs[:, 1, :2]]
+        if bounds is not None:
+            corners.append(np.asarray(bounds, dtype=float).reshape(2, 2))
+        corners = np.concatenate(corners)
+        if not len(corners):
+            corners = np.zeros((1, 2))
+        self.__bounds = np.array([corners.min(axis=0), corners.max(axis=0)])
+
+        size = self.__bounds[1] - self.__bounds[0]
+        self.__cell_size = max(float(size.max()) / int(resolution), 1e-9)
+        shape = np.maximum(np.ceil(size / self.__cell_size).astype(int), 1)
+        self.__shape = shape
+
+        # Mark the cells covered by each obstacle on a difference array
+        delta = np.zeros((shape[1] + 1, shape[0] + 1), dtype=int)
+        first, last = self.__get_cells(self.__aabbs)
+        np.add.at(delta, (first[:, 1], first[:, 0]), 1)
+        np.add.at(delta, (first[:, 1], last[:, 0] + 1), -1)
+        np.add.at(delta, (last[:, 1] + 1, first[:, 0]), -1)
+        np.add.at(delta, (last[:, 1] + 1, last[:, 0] + 1), 1)
+        self.__grid = np.cumsum(np.cumsum(delta, axis=0), axis=1)[:-1, :-1] > 0
+
+        self.__table = np.zeros((shape[1] + 1, shape[0] + 1), dtype=int)
+        self.__table[1:, 1:] = np.cumsum(np.cumsum(self.__grid, axis=0), axis=1)
+
+        for array in [
+            self.__aabbs,
+            self.__bounds,
+            self.__shape,
+            self.__grid,
+            self.__table,
+        ]:
+            array.setflags(write=False)
+
+    def __deepcopy__(self, memo):
+        return self
+
+    @property
+    def aabbs(self):
+        return self.__aabbs
+
+    @property
+    def bounds(self):
+        return self.__bounds
+
+    @property
+    def cell_size(self):
+        return self.__cell_size
+
+    @property
+    def grid(self):
+        return self.__grid
+
+    def __get_cells(self, aabbs):
+        """Returns the [column, row] indices of the first and last cells covered
+        by each AABB, clipped to the raster."""
+
+        upper = self.__shape - 1
+        mins = np.floor((aabbs[:, 0, :2] - self.__bounds[0]) / self.__cell_size)
+        maxs = np.floor((aabbs[:, 1, :2] - self.__bounds[0]) / self.__cell_size)
+
+        return (
+            np.clip(mins, 0, upper).astype(int),
+            np.clip(maxs, 0, upper).astype(int),
+        )
+
+    def screen(self, aabbs):
+        """
+        Screens AABBs against the raster in constant time each.
+
+        Parameters
+        ----------
+        aabbs : array_like
+            (n, 2, 3) array of AABBs to screen.
+
+        Returns
+        -------
+        occupied : ndarray
+            (n,) boolean array; False for the AABBs that overlap no obstacle in
+            the plane, True for those that may.
+        """
+
+        aabbs = np.asarray(aabbs, dtype=float).reshape(-1, 2, 3)
+        if not len(self.__aabbs):
+            return np.zeros(len(aabbs), dtype=bool)
+
+        first, last = self.__get_cells(aabbs)
+        table = self.__table
+        covered = (
+            table[last[:, 1] + 1, last[:, 0] + 1]
+            - table[first[:, 1], last[:, 0] + 1]
+            - table[last[:, 1] + 1, first[:, 0]]
+            + table[first[:, 1], first[:, 0]]
+        )
+
+        # AABBs entirely outside the raster are clipped onto its border cells
+        outside = np.any(
+            (aabbs[:, 1, :2] < self.__bounds[0]) | (aabbs[:, 0, :2] > self.__bounds[1]),
+            axis=1,
+        )
+
+        return (covered > 0) & ~outside
+
+    def is_free(self, aabb):
+        """Returns whether an AABB surely overlaps no obstacle."""
+
+        return not self.screen([aabb])[0]
+
+    def get_overlapping_pairs(self, aabbs):
+        """
+        Returns the pairs of AABBs and obstacles whose AABBs overlap, checking
+        only the AABBs that the raster does not screen out.
+
+        Parameters
+        ----------
+        aabbs : array_like
+            (n, 2, 3) array of AABBs.
+
+        Returns
+        -------
+        pairs : list
+            A sorted list of (i, k) index tuples of AABB i overlapping the AABB
+            of obstacle k.
+        """
+
+        aabbs = np.asarray(aabbs, dtype=float).reshape(-1, 2, 3)
+        pairs = []
+        for i in np.flatnonzero(self.screen(aabbs)):
+            below = self.__aabbs[:, 0, :] <= aabbs[i, 1, :]
+            above = aabbs[i, 0, :] <= self.__aabbs[:, 1, :]
+            for k in np.flatnonzero(np.all(below & above, axis=1)):
+                pairs.append((int(i), int(k)))
+
+        return pairs
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    EnginePool class definition
+
+    EnginePool owns several headless engines, each in a worker process of its
+    own and loaded with the bodies of a source engine, so that independent
+    evaluations run on all cores rather than on a single physics client.
+    pybullet holds the GIL during its calls, so engines sharing a process
+    would evaluate one at a time.
+
+    Author: Abdul Rahman Dabbour
+    Affiliation: CogRobo Lab, FENS, Sabanci University
+    License: GNU Affero General Public License v3.0
+    Repository: https://github.com/ardabbour/rearrangement/
+"""
+
+import io
+import multiprocessing
+import pickle
+
+import numpy as np
+
+from rearrangement.errors import type_error, value_error
+from rearrangement.physics import Engine
+
+# The engine of a worker process, the snapshot of its state once loaded, and
+# the unpickler of its tasks
+_WORKER = {}
+
+
+class EnginePool(object):
+    """
+    Defines a pool of engines replicating a source engine in worker processes.
+
+    The engine of each worker is loaded once with the bodies of the current
+    configuration of the source engine, and is restored to the state it was in
+    then before each evaluation, so that evaluations depend neither on each
+    other nor on the worker they run in. Configurations of the source engine
+    are evaluated by binding them to the engine of the worker (see
+    Engine.bind), and configurations returned by evaluations can be bound
+    back to the source engine in the same way. The counters and timers of the
+    engines of the workers are added to the stats of the source engine.
+
+    Workers are spawned where possible (Python 3), so scripts using them must
+    guard their entry point with `if __name__ == "__main__"`.
+
+    Parameters
+    ----------
+    engine : Engine
+        the engine whose configuration is replicated.
+    size : int
+        the number of engines, and worker processes, in the pool.
+    pickler : type
+        the EnginePickler with which evaluations are sent to the workers.
+    unpickler : type
+        the EngineUnpickler with which workers load evaluations.
+
+    Attributes
+    ----------
+    engine : Engine
+        the engine whose configuration is replicated.
+    size : int
+        the number of engines, and worker processes, in the pool.
+    """
+
+    def __init__(self, engine, size=2, pickler=None, unpickler=None):
+        if not isinstance(size, int):
+            raise type_error("size", int, type(size))
+        if size < 1:
+            raise value_error("size", "x >= 1", size)
+
+        self.engine = engine
+        self.__size = size
+        self.__pickler = EnginePickler if pickler is None else pickler
+        unpickler = EngineUnpickler if unpickler is None else unpickler
+
+        # Forked workers would inherit the physics clients of this process, so
+        # they are spawned where multiprocessing supports it
+        if hasattr(multiprocessing, "get_context"):
+            context = multiprocessing.get_context("spawn")
+        else:
+            context = multiprocessing
+        self.__pool = context.Pool(
+            size,
+            initializer=_init_worker,
+            initargs=(
+                engine.export_bodies(),
+                engine.configuration,
+                engine.collision_method,
+                engine.collision_threshold,
+                unpickler,
+            ),
+        )
+
+    @property
+    def engine(self):
+        return self.__engine
+
+    @engine.setter
+    def engine(self, engine):
+        if isinstance(engine, Engine):
+            self.__engine = engine
+        else:
+            raise type_error("engine", Engine, type(engine))
+
+    @property
+    def size(self):
+        return self.__size
+
+    def map(self, function, items, seeds=None):
+        """
+        Evaluates function(engine, item) for each item, where engine is the
+        engine of the worker evaluating it.
+
+        Parameters
+        ----------
+        function : callable
+            the evaluation; a function defined at the top level of a module.
+        items : list
+            the items to be evaluated; references to the source engine in them
+            are replaced by the engine of the worker.
+        seeds : list
+            the seed numpy is seeded with before evaluating each item
+            (optional).
+
+        Returns
+        -------
+        results : list
+            the result of each evaluation, in the order of items.
+        """
+
+        if seeds is None:
+            seeds = [None] * len(items)
+        tasks = [self.__dumps((function, item)) for item in items]
+        results = self.__pool.map(_run_task, list(zip(tasks, seeds)))
+        for _, stats in results:
+            self.engine.stats.merge(stats)
+
+        return [result for result, _ in results]
+
+    def close(self):
+        """Shuts the worker processes down, disconnecting their engines."""
+
+        self.__pool.close()
+        self.__pool.join()
+
+    def __dumps(self, obj):
+        """Returns an object pickled by the pickler of the pool."""
+
+        data = io.BytesIO()
+        self.__pickler(data, pickle.HIGHEST_PROTOCOL).dump(obj)
+
+        return data.getvalue()
+
+
+class EnginePickler(pickle.Pickler):
+    """Pickles engines by reference, to be replaced by the engine of a worker
+    process by EngineUnpickler."""
+
+    def persistent_id(self, obj):
+        if isinstance(obj, Engine):
+            return "engine"
+
+        return None
+
+
+class EngineUnpickler(pickle.Unpickler):
+    """Unpickles references made by EnginePickler in a worker process."""
+
+    def persistent_load(self, pid):
+        if pid == "engine":
+            return _WORKER["engine"]
+
+        raise pickle.UnpicklingError("Unknown reference '{}'.".format(pid))
+
+
+def _init_worker(
+    bodies, configuration, collision_method, collision_threshold, unpickler
+):
+    """Connects the engine of a worker process, loads the bodies into it, and
+    applies the configuration they were exported from, as Engine.replicate
+    does."""
+
+    engine = Engine()
+    engine.connect(visual=False)
+    engine.collision_method = collision_method
+    engine.collision_threshold = collision_threshold
+    engine.import_bodies(bodies)
+    engine.configuration = engine.bind(configuration)
+    _WORKER["engine"] = engine
+    _WORKER["snapshot"] = engine.snapshot()
+    _WORKER["unpickler"] = unpickler
+
+
+def _run_task(args):
+    """Evaluates a pickled (function, item) task in a worker process, given
+    the task and its seed; returns the result along with the stats of the
+    engine during the evaluation."""
+
+    task, seed = args
+    engine = _WORKER["engine"]
+    engine.restore(_WORKER["snapshot"])
+    engine.stats.reset()
+    if seed is not None:
+        np.random.seed(seed)
+
+    function, item = _WORKER["unpickler"](io.BytesIO(task)).load()
+
+    return function(engine, item), engine.stats.to_dict()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    Scene class definition
+
+    A scene is a query (or a dumped configuration) stored as a struct of arrays
+    rather than as nested JSON objects, so that it can be saved to and loaded
+    from a compact binary .npz file without parsing each field in Python. It
+    round-trips with the JSON schema of queries.
+
+    Author: Abdul Rahman Dabbour
+    Affiliation: CogRobo Lab, FENS, Sabanci University
+    License: GNU Affero General Public License v3.0
+    Repository: https://github.com/ardabbour/rearrangement/
+"""
+
+import numpy as np
+
+from rearrangement.physics import Constraint, pack_geometry, unpack_geometry
+
+# The sections of a query, in the order in which their bodies are stored
+SECTIONS = ["surface", "obstacles", "originals", "news"]
+
+
+class Scene(object):
+    """
+    Defines a scene. Scenes are immutable.
+
+    Parameters
+    ----------
+    names : array_like
+        (n,) array of the name of each body.
+    kinds : array_like
+        (n,) array of the index in SECTIONS of the section of each body; the
+        surface comes first.
+    urdfs : array_like
+        (u,) array of the distinct URDF paths of the bodies.
+    urdf_ids : array_like
+        (n,) array of the index in urdfs of the URDF path of each body.
+    poses : array_like
+        (n, 3) array of the [x, y, yaw] pose of each body; NaN if unspecified.
+    z_offs : array_like
+        (n,) array of the z offset of each body; NaN if unspecified.
+    areas : array_like
+        (n,) array of the area of each body; NaN if unspecified.
+    constraint_owners : array_like
+        (k,) array of the index of the body of each constraint, sorted.
+    constraint_names : array_like
+        (k,) array of the name of each constraint.
+    constraint_codes : array_like
+        (k,) array of the shape code of each constraint; see pack_geometry.
+    constraint_params : array_like
+        (k, 4) array of the parameters of each constraint; see pack_geometry.
+
+    Attributes
+    ----------
+    All parameters, as read-only ndarrays.
+    """
+
+    FIELDS = [
+        "names",
+        "kinds",
+        "urdfs",
+        "urdf_ids",
+        "poses",
+        "z_offs",
+        "areas",
+        "constraint_owners",
+        "constraint_names",
+        "constraint_codes",
+        "constraint_params",
+    ]
+
+    def __init__(
+        self,
+        names,
+        kinds,
+        urdfs,
+        urdf_ids,
+        poses,
+        z_offs,
+        areas,
+        constraint_owners=(),
+        constraint_names=(),
+        constraint_codes=(),
+        constraint_params=(),
+    ):
+        self.__arrays = {
+            "names": np.array(names, dtype=str).reshape(-1),
+            "kinds": np.array(kinds, dtype=np.int8).reshape(-1),
+            "urdfs": np.array(urdfs, dtype=str).reshape(-1),
+            "urdf_ids": np.array(urdf_ids, dtype=np.int32).reshape(-1),
+            "poses": np.array(poses, dtype=float).reshape(-1, 3),
+            "z_offs": np.array(z_offs, dtype=float).reshape(-1),
+            "areas": np.array(areas, dtype=float).reshape(-1),
+            "constraint_owners": np.array(constraint_owners, dtype=np.int32).reshape(
+                -1
+            ),
+            "constraint_names": np.array(constraint_names, dtype=str).reshape(-1),
+            "constraint_codes": np.array(constraint_codes, dtype=np.int8).reshape(-1),
+            "constraint_params": np.array(constraint_params, dtype=float).reshape(
+                -1, 4
+            ),
+        }
+        for array in self.__arrays.values():
+            array.setflags(write=False)
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __len__(self):
+        return len(self.__arrays["names"])
+
+    @property
+    def names(self):
+        return self.__arrays["names"]
+
+    @property
+    def kinds(self):
+        return self.__arrays["kinds"]
+
+    @property
+    def urdfs(self):
+        return self.__arrays["urdfs"]
+
+    @property
+    def urdf_ids(self):
+        return self.__arrays["urdf_ids"]
+
+    @property
+    def poses(self):
+        return self.__arrays["poses"]
+
+    @property
+    def z_offs(self):
+        return self.__arrays["z_offs"]
+
+    @property
+    def areas(self):
+        return self.__arrays["areas"]
+
+    @property
+    def constraint_owners(self):
+        return self.__arrays["constraint_owners"]
+
+    @property
+    def constraint_names(self):
+        return self.__arrays["constraint_names"]
+
+    @property
+    def constraint_codes(self):
+        return self.__arrays["constraint_codes"]
+
+    @property
+    def constraint_params(self):
+        return self.__arrays["constraint_params"]
+
+    def get_path(self, index):
+        """Returns the URDF path of a body."""
+
+        return str(self.urdfs[self.urdf_ids[index]])
+
+    def get_constraints(self, index):
+        """Returns new Constraints of a body, along with their names."""
+
+        owners = self.constraint_owners
+        start = np.searchsorted(owners, index, side="left")
+        end = np.searchsorted(owners, index, side="right")
+
+        constraints = []
+        for k in range(start, end):
+            shape, geometry = unpack_geometry(
+                self.constraint_codes[k], self.constraint_params[k]
+            )
+            constraint = Constraint(shape, geometry)
+            constraints.append((str(self.constraint_names[k]), constraint))
+
+        return constraints
+
+    @classmethod
+    def from_json(cls, query):
+        """Returns the scene of a query in the JSON schema."""
+
+        names, kinds, paths, poses, z_offs, areas = [], [], [], [], [], []
+        owners, constraint_names, codes, params = [], [], [], []
+
+        def add(name, kind, body):
+            """Appends a body to the arrays."""
+
+            index = len(names)
+            names.append(name)
+            kinds.append(kind)
+            paths.append(body["path"])
+            poses.append([float(x) for x in body.get("pose", [np.nan] * 3)])
+            z_offs.append(body.get("z offset", np.nan))
+            areas.append(body.get("area", np.nan))
+            for key, constraint in body.get("constraints", {}).items():
+                code, packed = pack_geometry(constraint["shape"], constraint["geometry"])
+                owners.append(index)
+                constraint_names.append(key)
+                codes.append(code)
+                params.append(packed)
+
+        add("surface", 0, query["surface"])
+        for kind, section in enumerate(SECTIONS[1:], 1):
+            for name, body in (query.get(section) or {}).items():
+                add(str(name), kind, body)
+
+        urdfs, urdf_ids = np.unique(np.array(paths, dtype=str), return_inverse=True)
+
+        return cls(
+            names,
+            kinds,
+            urdfs,
+            urdf_ids,
+            poses,
+            z_offs,
+            areas,
+            owners,
+            constraint_names,
+            codes,
+            params,
+        )
+
+    def to_json(self):
+        """Returns the scene as a query in the JSON schema."""
+
+        query = dict((section, {}) for section in SECTIONS)
+        paths = self.urdfs.tolist()
+        poses = self.poses.tolist()
+        z_offs = self.z_offs.tolist()
+        areas = self.areas.tolist()
+
+        for index, (name, kind, urdf_id) in enumerate(
+            zip(self.names.tolist(), self.kinds.tolist(), self.urdf_ids.tolist())
+        ):
+            body = {"path": paths[urdf_id]}
+            if not np.isnan(z_offs[index]):
+                body["z offset"] = z_offs[index]
+            if not np.isnan(areas[index]):
+                body["area"] = areas[index]
+            if not np.isnan(poses[index]).any():
+                body["pose"] = poses[index]
+            constraints = self.get_constraints(index)
+            if constraints:
+                body["constraints"] = dict(
+                    (key, {"shape": x.shape, "geometry": x.geometry})
+                    for key, x in constraints
+                )
+
+            if kind == 0:
+                query["surface"] = body
+            else:
+                query[SECTIONS[kind]][name] = body
+
+        return query
+
+    def save(self, path):
+        """Saves the scene to an uncompressed .npz file."""
+
+        np.savez(path, **self.__arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a scene saved by save; no Python objects are unpickled."""
+
+        with np.load(path, allow_pickle=False) as data:
+            return cls(**dict((field, data[field]) for field in cls.FIELDS))
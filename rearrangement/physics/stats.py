@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    Stats class definition
+
+    Stats count the calls made to the physics engine, accumulate the wall-clock
+    time spent in engine operations, and count the collision evaluations made by
+    each placement layer, to show where placement time goes.
+
+    Author: Abdul Rahman Dabbour
+    Affiliation: CogRobo Lab, FENS, Sabanci University
+    License: GNU Affero General Public License v3.0
+    Repository: https://github.com/ardabbour/rearrangement/
+"""
+
+import contextlib
+import json
+import time
+
+
+class Stats(object):
+    """
+    Defines counters and timers of a physics engine.
+
+    Attributes
+    ----------
+    calls : dict
+        the number of calls made to each pybullet function.
+    times : dict
+        the wall-clock seconds spent in each timed operation.
+    evaluations : dict
+        the number of collision evaluations made by each layer.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Sets all counters and timers to zero."""
+
+        self.calls = {}
+        self.times = {}
+        self.evaluations = {}
+
+    def count(self, kind, number=1):
+        """Counts calls made to a pybullet function."""
+
+        self.calls[kind] = self.calls.get(kind, 0) + number
+
+    def evaluate(self, layer):
+        """Counts a collision evaluation made by a layer."""
+
+        self.evaluations[layer] = self.evaluations.get(layer, 0) + 1
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """Adds the wall-clock time spent in the block to the timer of name."""
+
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0.0) + (time.time() - start)
+
+    def merge(self, data):
+        """Adds the counters and timers of a dict returned by to_dict, such as
+        those of an engine in another process."""
+
+        for kind, number in data["calls"].items():
+            self.count(kind, number)
+        for name, seconds in data["times"].items():
+            self.times[name] = self.times.get(name, 0.0) + seconds
+        for layer, number in data["evaluations"].items():
+            self.evaluations[layer] = self.evaluations.get(layer, 0) + number
+
+    def to_dict(self):
+        """Returns the counters and timers as a JSON-serializable dict."""
+
+        return {
+            "calls": dict(self.calls),
+            "times": dict(self.times),
+            "evaluations": dict(self.evaluations),
+        }
+
+    def dump_json(self, path):
+        """Writes the counters and timers to a JSON file."""
+
+        with open(path, "w") as stats_file:
+            json.dump(self.to_dict(), stats_file, indent=4, sort_keys=True)
+
+
+# The stats of each connected physics client, so that calls made on behalf of
+# an engine by its bodies and configurations are counted too
+_STATS = {}
+
+
+def register_stats(eid, stats):
+    """Counts the calls made to a physics client in stats; None stops
+    counting."""
+
+    if stats is None:
+        _STATS.pop(eid, None)
+    else:
+        _STATS[eid] = stats
+
+
+def count_call(eid, kind, number=1):
+    """Counts calls made to a physics client, if its stats are registered."""
+
+    stats = _STATS.get(eid)
+    if stats is not None:
+        stats.count(kind, number)
@@ -11,6 +11,7 @@
     Repository: https://github.com/ardabbour/rearrangement/
 """
 
+import numpy as np
 import pybullet as p
 
 
@@ -51,3 +52,191 @@ def to_quaternion(euler):
     """
 
     return p.getQuaternionFromEuler(euler)
+
+
+def to_eulers(quaternions):
+    """
+    Converts unit quaternions to Euler angles at once, in the same way as
+    to_euler.
+
+    Parameters
+    ----------
+    quaternions : array_like
+        An (n, 4) array of quaternions in the [x, y, z, w] format.
+
+    Returns
+    -------
+    eulers : ndarray
+        An (n, 3) array of the quaternions as euler angles in the [roll, pitch,
+        yaw] format.
+    """
+
+    x, y, z, w = np.asarray(quaternions, dtype=float).reshape(-1, 4).T
+    squ, sqx, sqy, sqz = w * w, x * x, y * y, z * z
+    sarg = -2 * ((x * z) - (w * y))
+
+    roll = np.arctan2(2 * ((y * z) + (w * x)), squ - sqx - sqy + sqz)
+    pitch = np.arcsin(np.clip(sarg, -1.0, 1.0))
+    yaw = np.arctan2(2 * ((x * y) + (w * z)), squ + sqx - sqy - sqz)
+
+    # At a pitch of +/- pi/2, only the sum of roll and yaw is defined
+    low, high = sarg <= -0.99999, sarg >= 0.99999
+    roll[low | high] = 0.0
+    pitch[low], pitch[high] = -0.5 * np.pi, 0.5 * np.pi
+    yaw[low] = 2 * np.arctan2(x[low], -y[low])
+    yaw[high] = 2 * np.arctan2(-x[high], y[high])
+
+    return np.stack([roll, pitch, yaw], axis=1)
+
+
+def to_quaternions(eulers):
+    """
+    Converts Euler angles to unit quaternions at once, in the same way as
+    to_quaternion.
+
+    Parameters
+    ----------
+    eulers : array_like
+        An (n, 3) array of euler angles in the [roll, pitch, yaw] format.
+
+    Returns
+    -------
+    quaternions : ndarray
+        An (n, 4) array of the euler angles as unit quaternions in the [x, y,
+        z, w] format.
+    """
+
+    halves = np.asarray(eulers, dtype=float).reshape(-1, 3) / 2
+    cos_r, cos_p, cos_y = np.cos(halves).T
+    sin_r, sin_p, sin_y = np.sin(halves).T
+
+    return np.stack(
+        [
+            (sin_r * cos_p * cos_y) - (cos_r * sin_p * sin_y),
+            (cos_r * sin_p * cos_y) + (sin_r * cos_p * sin_y),
+            (cos_r * cos_p * sin_y) - (sin_r * sin_p * cos_y),
+            (cos_r * cos_p * cos_y) + (sin_r * sin_p * sin_y),
+        ],
+        axis=1,
+    )
+
+
+def to_local_aabb(aabb, position, yaw):
+    """
+    Recovers the box in the base frame of a body whose rotation about the
+    z-axis gives the AABB of the body, the way the AABBs of boxes, cylinders,
+    and compound shapes are computed by the physics engine.
+
+    Parameters
+    ----------
+    aabb : list
+        The AABB of the body in the [[min x, min y, min z], [max x, max y,
+        max z]] format.
+    position : list
+        The [x, y, z] position of the body.
+    yaw : float
+        The yaw of the body.
+
+    Returns
+    -------
+    local_aabb : list
+        The [x, y] center, the [x, y] half extents, and the [min z, max z]
+        extents of the box relative to the position of the body, as a list of 6
+        floats; None if the yaw is too close to an odd multiple of pi/4 for the
+        half extents to be recovered.
+    """
+
+    cos, sin = abs(np.cos(yaw)), abs(np.sin(yaw))
+    det = (cos * cos) - (sin * sin)
+    if abs(det) < 0.25:
+        return None
+
+    (x_min, y_min, z_min), (x_max, y_max, z_max) = aabb
+    x_center = ((x_min + x_max) / 2) - position[0]
+    y_center = ((y_min + y_max) / 2) - position[1]
+    x_half, y_half = (x_max - x_min) / 2, (y_max - y_min) / 2
+
+    return [
+        (np.cos(yaw) * x_center) + (np.sin(yaw) * y_center),
+        (np.cos(yaw) * y_center) - (np.sin(yaw) * x_center),
+        ((cos * x_half) - (sin * y_half)) / det,
+        ((cos * y_half) - (sin * x_half)) / det,
+        z_min - position[2],
+        z_max - position[2],
+    ]
+
+
+def to_world_aabb(local_aabb, position, yaw):
+    """
+    Computes the AABB of a body from the box in its base frame given by
+    to_local_aabb.
+
+    Parameters
+    ----------
+    local_aabb : list
+        The box in the base frame of the body, as returned by to_local_aabb.
+    position : list
+        The [x, y, z] position of the body.
+    yaw : float
+        The yaw of the body.
+
+    Returns
+    -------
+    aabb : list
+        The AABB of the body in the [[min x, min y, min z], [max x, max y,
+        max z]] format.
+    """
+
+    x_local, y_local, x_ext, y_ext, z_min, z_max = local_aabb
+    cos, sin = np.cos(yaw), np.sin(yaw)
+    x_center = position[0] + (cos * x_local) - (sin * y_local)
+    y_center = position[1] + (sin * x_local) + (cos * y_local)
+    x_half = (abs(cos) * x_ext) + (abs(sin) * y_ext)
+    y_half = (abs(sin) * x_ext) + (abs(cos) * y_ext)
+
+    return [
+        [x_center - x_half, y_center - y_half, position[2] + z_min],
+        [x_center + x_half, y_center + y_half, position[2] + z_max],
+    ]
+
+
+def get_overlapping_pairs(aabbs):
+    """
+    Returns the pairs of axis aligned bounding boxes that overlap, using a sweep
+    and prune along the x-axis.
+
+    Parameters
+    ----------
+    aabbs : list
+        A list of AABBs, each in the [[min x, min y, min z], [max x, max y,
+        max z]] format.
+
+    Returns
+    -------
+    pairs : list
+        A sorted list of (i, j) index tuples, i < j, of overlapping AABBs.
+    """
+
+    if len(aabbs) < 2:
+        return []
+
+    aabbs = np.asarray(aabbs, dtype=float)
+    mins = aabbs[:, 0, :]
+    maxs = aabbs[:, 1, :]
+
+    order = np.argsort(mins[:, 0], kind="stable")
+    sorted_min_x = mins[order, 0]
+
+    pairs = []
+    for rank, i in enumerate(order):
+        end = np.searchsorted(sorted_min_x, maxs[i, 0], side="right")
+        if end <= rank + 1:
+            continue
+        candidates = order[rank + 1 : end]
+        below = mins[candidates, 1:] <= maxs[i, 1:]
+        above = mins[i, 1:] <= maxs[candidates, 1:]
+        overlap = np.all(below & above, axis=1)
+        for j in candidates[overlap]:
+            pairs.append((min(i, j), max(i, j)))
+
+    return sorted((int(i), int(j)) for i, j in pairs)
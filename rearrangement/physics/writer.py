@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    ImageWriter class definition
+
+    An ImageWriter encodes and saves rendered images in a background thread, so
+    that saving screenshots does not hold up the thread that renders them.
+
+    Author: Abdul Rahman Dabbour
+    Affiliation: CogRobo Lab, FENS, Sabanci University
+    License: GNU Affero General Public License v3.0
+    Repository: https://github.com/ardabbour/rearrangement/
+"""
+
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+class ImageWriter(object):
+    """
+    Defines a background writer of RGBA images.
+
+    Attributes
+    ----------
+    pending : int
+        the number of images that are not saved yet.
+    """
+
+    def __init__(self):
+        self.__queue = queue.Queue()
+        self.__error = None
+        self.__thread = threading.Thread(target=self.__work)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    @property
+    def pending(self):
+        return self.__queue.unfinished_tasks
+
+    def __work(self):
+        """Saves the queued images until None is queued. Errors, including a
+        missing PIL, are raised by flush rather than stopping the thread."""
+
+        while True:
+            item = self.__queue.get()
+            try:
+                if item is None:
+                    return
+                from PIL import Image
+
+                image_array, path = item
+                Image.fromarray(image_array, "RGBA").save(path)
+            except Exception as error:
+                if self.__error is None:
+                    self.__error = error
+            finally:
+                self.__queue.task_done()
+
+    def save(self, image_array, path):
+        """Queues an (height, width, 4) uint8 RGBA array to be saved to path;
+        the array must not be modified afterwards."""
+
+        if not self.__thread.is_alive():
+            raise ValueError("The image writer is closed.")
+
+        self.__queue.put((image_array, path))
+
+    def flush(self):
+        """Waits until all queued images are saved, and raises the first error
+        raised while saving them, if any."""
+
+        self.__queue.join()
+        error, self.__error = self.__error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        """Saves all queued images and stops the background thread."""
+
+        if self.__thread.is_alive():
+            self.__queue.put(None)
+            self.__thread.join()
+        self.flush()
@@ -18,13 +18,14 @@ import json
 import pprint
 import time
 
-from rearrangement import DEBUG_PATH
-from rearrangement.search import LocalSearch
+from rearrangement import DEBUG_PATH, make_dirs
+from rearrangement.search import Executor, LocalSearch, TranspositionTable
 from rearrangement.physics import Configuration, Engine
 from rearrangement.placement.inner import Inner
 from rearrangement.placement.middle import Middle
 from rearrangement.placement.outer import Outer
 from rearrangement.placement.baselines import Random, RandomPotentialField
+from rearrangement.placement.parallel import ProcessExecutor
 
 
 def generate_placement(
@@ -35,6 +36,9 @@ def generate_placement(
     camera_distance=10.0,
     name="instance",
     engine=None,
+    table_bytes=0,
+    workers=0,
+    transition="physics",
 ):
     """
     Attempts returning a collision-free placement for the configuration.
@@ -53,11 +57,22 @@ def generate_placement(
         Distance of camera from center of surface.
     name : str
         Filename base to use for debug files.
+    table_bytes : int
+        Memory budget in bytes of the transposition table shared by the layers;
+        0, the default, disables memoization.
+    workers : int
+        Number of worker processes generating the successors of the middle and
+        outer layers; 0 generates them in this process, with the same results.
+    transition : str
+        How the inner layer resolves collisions: 'physics', by pushing bodies
+        with the physics engine, or 'separation', by separating their
+        footprints.
 
     RETURNS
     -------
     solution : Configuration
-        The (attempted to be) solved configuration.
+        The (attempted to be) solved configuration. The stats of the engine are
+        reset before placement and describe it afterwards.
 
     """
 
@@ -65,31 +80,60 @@ def generate_placement(
         engine = Engine()
         engine.connect(visual=verbose)
         engine.collision_threshold = collision_threshold
+    engine.stats.reset()
     config = engine.load_configuration(query)
 
     if verbose:
-        img = engine.get_image(distance=camera_distance, new=False)
-        img.save(DEBUG_PATH + "/{}-initial_placement.png".format(name))
-        img = engine.get_image(distance=camera_distance)
-        img.save(DEBUG_PATH + "/{}-random_placement.png".format(name))
+        make_dirs(DEBUG_PATH)
+        engine.save_image(
+            DEBUG_PATH + "/{}-initial_placement.png".format(name),
+            distance=camera_distance,
+            new=False,
+        )
+        engine.save_image(
+            DEBUG_PATH + "/{}-random_placement.png".format(name),
+            distance=camera_distance,
+        )
 
     start_time = time.time()
     random_restart = True
+    table = TranspositionTable(table_bytes) if table_bytes else None
+    executor = ProcessExecutor(engine, workers) if workers else Executor()
     if algorithm.lower() == "random_sample":
         problem = Random(config, engine, start_time=start_time)
 
     elif algorithm.lower() == "inner":
-        problem = Inner(config, engine, start_time=start_time)
+        problem = Inner(
+            config,
+            engine,
+            start_time=start_time,
+            transition=transition,
+            table=table,
+        )
         random_restart = False
 
     elif algorithm.lower() == "random_restart":
         problem = RandomPotentialField(config, engine, start_time=start_time)
 
     elif algorithm.lower() == "middle":
-        problem = Middle(config, engine, start_time=start_time)
+        problem = Middle(
+            config,
+            engine,
+            start_time=start_time,
+            table=table,
+            executor=executor,
+            transition=transition,
+        )
 
     elif algorithm.lower() == "outer":
-        problem = Outer(config, engine, start_time=start_time)
+        problem = Outer(
+            config,
+            engine,
+            start_time=start_time,
+            table=table,
+            executor=executor,
+            transition=transition,
+        )
     else:
         raise ValueError("Queried algorithm '{}' is unknown.".format(name))
 
@@ -102,7 +146,9 @@ def generate_placement(
             problem, start_time=start_time, random_restart=random_restart
         ).simple()
 
-    col_info = engine.get_collision_info(solution)
+    executor.close()
+
+    col_info = engine.get_collision_info(solution, "placement")
     move_info = solution.movement_info
 
     no_collisions, penetration = col_info["number"], col_info["severity"]
@@ -117,6 +163,8 @@ def generate_placement(
         # "number of iterations": iterations,
         "number of original objects moved": no_org_moved,
         "placement time": "{:.4f} s".format(time_elapsed),
+        "engine stats": engine.stats.to_dict(),
+        "transposition table": table.to_dict() if table is not None else None,
     }
 
     if verbose:
@@ -125,10 +173,15 @@ def generate_placement(
         pprint.pprint(results)
         print ("\n")
 
-        img = engine.get_image(distance=camera_distance)
-        img.save(DEBUG_PATH + "/{}-goal_placement.png".format(name))
+        engine.save_image(
+            DEBUG_PATH + "/{}-goal_placement.png".format(name),
+            distance=camera_distance,
+        )
 
         with open(DEBUG_PATH + "/{}-goal_placement.json".format(name), "w") as my_ans:
             json.dump(config.dump_json(), my_ans)
 
+        engine.stats.dump_json(DEBUG_PATH + "/{}-placement_stats.json".format(name))
+        engine.flush_images()
+
     return solution
@@ -64,22 +64,13 @@ class Random(Problem):
         """The cost of a state depends on how many clutter bodies have moved and
         by how much, and whether the state is in collision or not."""
 
-        return round(self.engine.get_collision_info(state)["severity"], 2)
+        return round(
+            self.engine.get_collision_info(state, "random_sample")["severity"], 2
+        )
 
     def get_random_restart(self):
         state = copy.deepcopy(self.init_state)
-        s_aabb = state.surface.aabb_info
-        anti_padding = s_aabb["2D diagonal length"] * 0.0125
-        s_x_min = s_aabb["min x"] + anti_padding
-        s_y_min = s_aabb["min y"] + anti_padding
-        s_x_max = s_aabb["max x"] - anti_padding
-        s_y_max = s_aabb["max x"] - anti_padding
-
-        for body in state.movable:
-            pose_x = np.random.uniform(s_x_min, s_x_max)
-            pose_y = np.random.uniform(s_y_min, s_y_max)
-            pose_theta = np.random.uniform(0, 2 * np.pi)
-            body.pose = [pose_x, pose_y, pose_theta]
+        state.randomize()
 
         return state
 
@@ -87,19 +78,8 @@ class Random(Problem):
     def get_neighbors(state):
         """Returns the list of states that are successors."""
 
-        s_aabb = state.surface.aabb_info
-        anti_padding = s_aabb["2D diagonal length"] * 0.0125
-        s_x_min = s_aabb["min x"] + anti_padding
-        s_y_min = s_aabb["min y"] + anti_padding
-        s_x_max = s_aabb["max x"] - anti_padding
-        s_y_max = s_aabb["max x"] - anti_padding
-
         state = copy.deepcopy(state)
-        for body in state.movable:
-            pose_x = np.random.uniform(s_x_min, s_x_max)
-            pose_y = np.random.uniform(s_y_min, s_y_max)
-            pose_theta = np.random.uniform(0, 2 * np.pi)
-            body.pose = [pose_x, pose_y, pose_theta]
+        state.randomize()
 
         return [state]
 
@@ -168,22 +148,13 @@ class RandomPotentialField(Problem):
         """The cost of a state depends on how many clutter bodies have moved and
         by how much, and whether the state is in collision or not."""
 
-        return round(self.engine.get_collision_info(state)["severity"], 2)
+        return round(
+            self.engine.get_collision_info(state, "random_restart")["severity"], 2
+        )
 
     def get_random_restart(self):
         state = copy.deepcopy(self.init_state)
 
-        s_aabb = state.surface.aabb_info
-        anti_padding = s_aabb["2D diagonal length"] * 0.0125
-        s_x_min = s_aabb["min x"] + anti_padding
-        s_y_min = s_aabb["min y"] + anti_padding
-        s_x_max = s_aabb["max x"] - anti_padding
-        s_y_max = s_aabb["max x"] - anti_padding
-
-        for body in state.movable:
-            pose_x = np.random.uniform(s_x_min, s_x_max)
-            pose_y = np.random.uniform(s_y_min, s_y_max)
-            pose_theta = np.random.uniform(0, 2 * np.pi)
-            body.pose = [pose_x, pose_y, pose_theta]
+        state.randomize()
 
         return state
@@ -5,7 +5,8 @@
 
     'Inner' is a local search whose transition model is a wrapper of the
     collision resolver of pybullet that makes it act as a potential field to
-    minimize the total penetration depth of all pairs of objects.
+    minimize the total penetration depth of all pairs of objects. Alternatively,
+    objects made of primitives can be separated from their footprints directly.
 
     Author: Abdul Rahman Dabbour
     Affiliation: CogRobo Lab, FENS, Sabanci University
@@ -16,9 +17,7 @@
 import copy
 import time
 
-import numpy as np
-
-from rearrangement.errors import type_error
+from rearrangement.errors import type_error, value_error
 from rearrangement.physics import Engine
 from rearrangement.search import Problem
 
@@ -26,13 +25,26 @@ from rearrangement.search import Problem
 class Inner(Problem):
     """This is the definition of the inner search problem."""
 
-    def __init__(self, init_state, engine, batch_size=10, start_time=time.time()):
+    deterministic = True
+
+    def __init__(
+        self,
+        init_state,
+        engine,
+        batch_size=10,
+        start_time=time.time(),
+        transition="physics",
+        table=None,
+    ):
         self.start_time = start_time
         self.batch_size = batch_size
+        self.transition = transition
         self.engine = engine
         self.engine.configuration = init_state
 
-        super(Inner, self).__init__(init_state, maximality=False, lexi=False)
+        super(Inner, self).__init__(
+            init_state, maximality=False, lexi=False, table=table
+        )
 
     @property
     def engine(self):
@@ -67,13 +79,28 @@ class Inner(Problem):
         else:
             raise type_error("batch_size", int, type(batch_size))
 
+    @property
+    def transition(self):
+        return self.__transition
+
+    @transition.setter
+    def transition(self, transition):
+        if transition in ["physics", "separation"]:
+            self.__transition = transition
+        else:
+            raise value_error("transition", "'physics' or 'separation'", transition)
+
     def get_successors(self, state):
         """Returns the list of states that are successors. Here, this is the
-        result of the physics engine pushing objects in collision outside of
-        collision, attempting to reduce the cumulative penetration depth."""
+        result of pushing objects in collision outside of collision, attempting
+        to reduce the cumulative penetration depth, either by the physics engine
+        or by separating the footprints of the objects."""
 
         new_state = copy.deepcopy(state)
-        self.engine.push_bodies(new_state, self.batch_size)
+        if self.transition == "separation":
+            self.engine.separate_bodies(new_state)
+        else:
+            self.engine.push_bodies(new_state, self.batch_size)
 
         return [new_state]
 
@@ -81,22 +108,16 @@ class Inner(Problem):
         """The cost of a state depends on how many clutter bodies have moved and
         by how much, and whether the state is in collision or not."""
 
-        return round(self.engine.get_collision_info(state)["severity"], 2)
+        return round(self.engine.get_collision_info(state, "inner")["severity"], 2)
+
+    def get_key(self, state):
+        """States are memoized by their poses and constraints."""
+
+        return ("inner", state.get_key())
 
     def get_random_restart(self):
 
         state = copy.deepcopy(self.init_state)
-        s_aabb = state.surface.aabb_info
-        anti_padding = s_aabb["2D diagonal length"] * 0.0125
-        s_x_min = s_aabb["min x"] + anti_padding
-        s_y_min = s_aabb["min y"] + anti_padding
-        s_x_max = s_aabb["max x"] - anti_padding
-        s_y_max = s_aabb["max x"] - anti_padding
-
-        for body in state.movable:
-            pose_x = np.random.uniform(s_x_min, s_x_max)
-            pose_y = np.random.uniform(s_y_min, s_y_max)
-            pose_theta = np.random.uniform(0, 2 * np.pi)
-            body.pose = [pose_x, pose_y, pose_theta]
+        state.randomize()
 
         return state
@@ -18,7 +18,7 @@ import time
 import uuid
 import numpy as np
 
-from rearrangement.errors import type_error
+from rearrangement.errors import type_error, value_error
 from rearrangement.physics import Engine
 from rearrangement.search import LocalSearch, Problem
 from rearrangement.placement import Inner
@@ -27,17 +27,37 @@ from rearrangement.placement import Inner
 class Middle(Problem):
     """This is the definition of the middle search problem."""
 
-    def __init__(self, init_state, engine, seed=1, start_time=time.time()):
+    deterministic = True
+
+    def __init__(
+        self,
+        init_state,
+        engine,
+        seed=1,
+        start_time=time.time(),
+        table=None,
+        executor=None,
+        transition="physics",
+    ):
         """Constructor/Initializer for the Middle class."""
 
         self.start_time = start_time
         self.seed = seed
         self.engine = engine
-
-        inner = Inner(init_state, engine, start_time=start_time)
+        self.transition = transition
+
+        inner = Inner(
+            init_state,
+            engine,
+            start_time=start_time,
+            transition=transition,
+            table=table,
+        )
         init_state = LocalSearch(inner, start_time=start_time).simple()
 
-        super(Middle, self).__init__(init_state, maximality=False, lexi=True)
+        super(Middle, self).__init__(
+            init_state, maximality=False, lexi=True, table=table, executor=executor
+        )
 
     @property
     def engine(self):
@@ -72,39 +92,73 @@ class Middle(Problem):
         else:
             raise type_error("start_time", int, type(seed))
 
+    @property
+    def transition(self):
+        return self.__transition
+
+    @transition.setter
+    def transition(self, transition):
+        if transition in ["physics", "separation"]:
+            self.__transition = transition
+        else:
+            raise value_error("transition", "'physics' or 'separation'", transition)
+
     def get_successors(self, state):
         """Get the neighbors."""
 
-        colliding = self.engine.get_collision_info(state)["list"]
-        colliding_movable = [x for x in colliding if x in state.movable]
+        return [self.get_successor(x) for x in self.get_starts(state)]
+
+    def get_starts(self, state):
+        """Returns copies of the state in which the body whose collisions are
+        the most severe is relocated to the center of a free cell."""
 
-        neighbors = set()
-        for body in colliding_movable:
+        scores = self.engine.get_collision_scores(state, "middle")
+        colliding_movable = [
+            (score, k)
+            for k, (body, score) in enumerate(zip(state.collidable, scores))
+            if score > 0 and body in state.movable
+        ]
+
+        # Only the body whose collisions are the most severe is relocated
+        starts = []
+        if colliding_movable:
+            body = state.collidable[max(colliding_movable)[1]]
             buuid = body.oid
-            free_cells = get_free_cells(self.seed, state, body)
-            neighbors = set()
+            occupancy = self.engine.get_occupancy(state)
+            free_cells = get_free_cells(self.seed, state, body, occupancy)
             for free_cell in free_cells:
-                self.engine.configuration = state
-                successor = copy.deepcopy(state)
+                start = copy.deepcopy(state)
                 pose = create_pose(free_cell, "center")
-                successor.find_body(buuid).pose = pose
-                inner = Inner(successor, self.engine)
-                local_search = LocalSearch(inner, start_time=self.__start_time)
-                successor = local_search.simple()
-                neighbors.add(successor)
+                start.find_body(buuid)._set_pose(pose)
+                starts.append(start)
+
+        return starts
+
+    def get_successor(self, start):
+        """Returns the result of the inner search from a start."""
 
-        return neighbors
+        inner = Inner(
+            start, self.engine, transition=self.transition, table=self.table
+        )
+
+        return LocalSearch(inner, start_time=self.__start_time).simple()
 
     def get_value(self, state):
         """The cost of a state depends on how many bodies are in collision and
         how severe all the collisions are."""
 
-        col_info = self.engine.get_collision_info(state)
+        col_info = self.engine.get_collision_info(state, "middle")
 
         return (col_info["number"], round(col_info["severity"], 2))
 
-    def get_random_restart(self):
-        """Returns a random initialization."""
+    def get_key(self, state):
+        """States are memoized by their poses and constraints."""
+
+        return ("middle", state.get_key())
+
+    def get_random_restart(self, attempts=10):
+        """Returns a random initialization. The poses of bodies that may
+        overlap an obstacle are drawn again, up to a number of attempts."""
 
         state = copy.deepcopy(self.init_state)
         s_aabb = state.surface.aabb_info
@@ -113,12 +167,19 @@ class Middle(Problem):
         y_1 = s_aabb["min y"] + anti_padding
         x_2 = s_aabb["max x"] - anti_padding
         y_2 = s_aabb["max y"] - anti_padding
-
-        for body in state.movable:
-            pose_x = np.random.uniform(x_1, x_2)
-            pose_y = np.random.uniform(y_1, y_2)
-            pose_theta = np.random.uniform(0, 2 * np.pi)
-            body.pose = [pose_x, pose_y, pose_theta]
+        low, high = [x_1, y_1, 0], [x_2, y_2, 2 * np.pi]
+
+        poses = np.random.uniform(low, high, size=(len(state.movable), 3))
+        occupancy = self.engine.get_occupancy(state)
+        reaches = [get_reach(body) for body in state.movable]
+        drawn = [k for k, reach in enumerate(reaches) if reach is not None]
+        for _ in range(attempts):
+            if not drawn:
+                break
+            squares = [get_square(poses[k], reaches[k]) for k in drawn]
+            drawn = [k for k, x in zip(drawn, occupancy.screen(squares)) if x]
+            poses[drawn] = np.random.uniform(low, high, size=(len(drawn), 3))
+        state.set_poses(poses)
 
         return state
 
@@ -189,8 +250,37 @@ def generate_cells(seed, x_size, y_size):
     return cells
 
 
-def get_free_cells(seed, state, body):
-    """Returns a list of free cells"""
+def get_reach(body):
+    """Returns the largest distance from the position of a body to a point of
+    its footprint at any yaw, or None if its footprint is unknown."""
+
+    footprint = body.footprint
+    if footprint is None or not len(footprint):
+        return None
+
+    centers = np.hypot(footprint.centers[:, 0], footprint.centers[:, 1])
+    extents = np.where(
+        footprint.discs,
+        footprint.extents[:, 0],
+        np.hypot(footprint.extents[:, 0], footprint.extents[:, 1]),
+    )
+
+    return float(np.max(centers + extents))
+
+
+def get_square(position, reach):
+    """Returns the AABB of the square of a half side of reach centered on a
+    position."""
+
+    x, y = position[0], position[1]
+
+    return [[x - reach, y - reach, 0.0], [x + reach, y + reach, 0.0]]
+
+
+def get_free_cells(seed, state, body, occupancy=None):
+    """Returns a list of free cells: the cells that contain the centroid of no
+    collidable body, and, given the occupancy of the obstacles, in the center
+    of which the body surely overlaps no obstacle, unless there are none."""
 
     s_aabb = state.surface.aabb_info
     anti_padding = s_aabb["2D diagonal length"] * 0.0125
@@ -203,6 +293,7 @@ def get_free_cells(seed, state, body):
     y_size = y_2 - y_1
 
     centroids = [x.pose[:-1] for x in state.collidable]
+    reach = get_reach(body) if occupancy is not None else None
     free_cells = []
 
     while not free_cells:
@@ -211,6 +302,14 @@ def get_free_cells(seed, state, body):
             if empty_cell(cell, centroids):
                 free_cells.append(cell)
 
+        if reach is not None:
+            clear = [
+                cell
+                for cell in free_cells
+                if occupancy.is_free(get_square(create_pose(cell, "center"), reach))
+            ]
+            free_cells = clear or free_cells
+
         seed += 1
 
     return free_cells
@@ -16,9 +16,7 @@
 import copy
 import time
 
-import numpy as np
-
-from rearrangement.errors import type_error
+from rearrangement.errors import type_error, value_error
 from rearrangement.physics import Constraint, Engine
 from rearrangement.search import LocalSearch, Problem
 from rearrangement.placement import Middle
@@ -27,13 +25,22 @@ from rearrangement.placement import Middle
 class Outer(Problem):
     """This is the definition of the outer search problem."""
 
-    def __init__(self, init_state, engine, start_time=time.time()):
+    def __init__(
+        self,
+        init_state,
+        engine,
+        start_time=time.time(),
+        table=None,
+        executor=None,
+        transition="physics",
+    ):
         # For each original body, add a circular constraint of radius zero, and
         # store the relationship between each body and its constraint in a dict
 
         self.start_time = start_time
         init_state = copy.deepcopy(init_state)
         self.engine = engine
+        self.transition = transition
         self.const_dict = {}
 
         for body in init_state.originals:
@@ -53,12 +60,21 @@ class Outer(Problem):
             rot_cuuid = rot_const.oid
             self.const_dict.update({"{}".format(buuid): (cuuid, rot_cuuid)})
 
-        middle = Middle(init_state, engine, start_time=start_time)
+        middle = Middle(
+            init_state,
+            engine,
+            start_time=start_time,
+            table=table,
+            executor=executor,
+            transition=transition,
+        )
         init_state = LocalSearch(middle, start_time=start_time).simple()
 
         self.engine.configuration = init_state
 
-        super(Outer, self).__init__(init_state, maximality=False, lexi=True)
+        super(Outer, self).__init__(
+            init_state, maximality=False, lexi=True, table=table, executor=executor
+        )
 
     @property
     def engine(self):
@@ -82,6 +98,17 @@ class Outer(Problem):
         else:
             raise type_error("start_time", float, type(start_time))
 
+    @property
+    def transition(self):
+        return self.__transition
+
+    @transition.setter
+    def transition(self, transition):
+        if transition in ["physics", "separation"]:
+            self.__transition = transition
+        else:
+            raise value_error("transition", "'physics' or 'separation'", transition)
+
     @property
     def const_dict(self):
         return self.__const_dict
@@ -94,11 +121,18 @@ class Outer(Problem):
             raise type_error("const_dict", dict, type(const_dict))
 
     def get_successors(self, state):
-        """This is the successor state function of the problem. It returns a set
-        of states, with each containing a single cluttered body with an
+        """This is the successor state function of the problem. It returns a
+        list of states, with each containing a single cluttered body with an
         augmented freedom."""
 
-        neighbors = set()
+        return [self.get_successor(x) for x in self.get_starts(state)]
+
+    def get_starts(self, state):
+        """Returns copies of the state in which the circular constraint of a
+        single original body is widened. The constraints of the state itself
+        are widened along the way."""
+
+        starts = []
         for body in state.originals:
             buuid = body.oid
             cuuid, rot_cuuid = self.const_dict["{}".format(body.oid)]
@@ -114,40 +148,46 @@ class Outer(Problem):
 
             if geometry["radius"] + delta <= limit:
                 geometry["radius"] += delta
-                successor = copy.deepcopy(state)
-                successor.find_body(buuid).find_constraint(cuuid).geometry = geometry
-                successor = LocalSearch(
-                    Middle(successor, self.engine, start_time=self.start_time),
-                    start_time=self.start_time,
-                ).simple()
-                neighbors.add(successor)
+                const.geometry = geometry
+                start = copy.deepcopy(state)
+                start.find_body(buuid).find_constraint(cuuid).geometry = geometry
+                starts.append(start)
+
+        return starts
+
+    def get_successor(self, start):
+        """Returns the result of the middle search from a start."""
 
-        return neighbors
+        middle = Middle(
+            start,
+            self.engine,
+            start_time=self.start_time,
+            table=self.table,
+            executor=self.executor,
+            transition=self.transition,
+        )
+
+        return LocalSearch(middle, start_time=self.start_time).simple()
 
     def get_value(self, state):
         """The cost of a state depends on how many bodies are in collision and
         how many clutter bodies have moved and by how much."""
 
-        col_info = self.engine.get_collision_info(state)
+        col_info = self.engine.get_collision_info(state, "outer")
         mov_info = state.movement_info
 
         return (col_info["number"], mov_info["number"], mov_info["severity"])
 
+    def get_key(self, state):
+        """States are memoized by their poses and constraints. Their successors
+        are not, as expanding a state widens the constraints of its bodies."""
+
+        return ("outer", state.get_key())
+
     def get_random_restart(self):
 
         state = copy.deepcopy(self.init_state)
-        s_aabb = state.surface.aabb_info
-        anti_padding = s_aabb["2D diagonal length"] * 0.0125
-        s_x_min = s_aabb["min x"] + anti_padding
-        s_y_min = s_aabb["min y"] + anti_padding
-        s_x_max = s_aabb["max x"] - anti_padding
-        s_y_max = s_aabb["max x"] - anti_padding
-
-        for body in state.movable:
-            pose_x = np.random.uniform(s_x_min, s_x_max)
-            pose_y = np.random.uniform(s_y_min, s_y_max)
-            pose_theta = np.random.uniform(0, 2 * np.pi)
-            body.pose = [pose_x, pose_y, pose_theta]
+        state.randomize()
 
         self.const_dict = {}
         for body in state.originals:
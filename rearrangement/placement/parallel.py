@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    ProcessExecutor class definition
+
+    'ProcessExecutor' generates the successors of the Middle and Outer layers,
+    each of which is a nested local search, on the engines of an EnginePool,
+    each of which runs in a worker process of its own.
+
+    Author: Abdul Rahman Dabbour
+    Affiliation: CogRobo Lab, FENS, Sabanci University
+    License: GNU Affero General Public License v3.0
+    Repository: https://github.com/ardabbour/rearrangement/
+"""
+
+from rearrangement.errors import type_error, value_error
+from rearrangement.physics import Engine, EnginePool, EnginePickler, EngineUnpickler
+from rearrangement.search import Executor, TranspositionTable
+
+
+class ProcessExecutor(Executor):
+    """
+    Defines an executor that generates successors in worker processes.
+
+    A task is made of the problem and a start, pickled along with references
+    to the engine, the transposition table, and the executor of the problem,
+    which are replaced by the engine of the worker, no table, and a serial
+    executor with the same seed. Numpy is seeded by the seed of the start
+    (see Executor.get_seeds) before each task. As pushes do not depend on
+    previous ones (see Engine.push_bodies), and the engines of the pool are
+    restored between tasks, the results depend on neither the number of
+    workers nor the order in which tasks are completed, and match those of the
+    serial executor. Results are returned in the order of the starts.
+
+    Parameters
+    ----------
+    engine : Engine
+        the engine whose configuration is replicated by the workers.
+    workers : int
+        the number of worker processes.
+    seed : int
+        the seed from which the seeds of the successors are derived.
+
+    Attributes
+    ----------
+    engine : Engine
+        the engine whose configuration is replicated by the workers.
+    workers : int
+        the number of worker processes.
+    seed : int
+        the seed from which the seeds of the successors are derived.
+    """
+
+    def __init__(self, engine, workers=2, seed=0):
+        if not isinstance(workers, int):
+            raise type_error("workers", int, type(workers))
+        if workers < 1:
+            raise value_error("workers", "x >= 1", workers)
+
+        super(ProcessExecutor, self).__init__(seed)
+        self.engine = engine
+        self.__pool = EnginePool(engine, workers, _Pickler, _Unpickler)
+
+    @property
+    def engine(self):
+        return self.__engine
+
+    @engine.setter
+    def engine(self, engine):
+        if isinstance(engine, Engine):
+            self.__engine = engine
+        else:
+            raise type_error("engine", Engine, type(engine))
+
+    @property
+    def workers(self):
+        return self.__pool.size
+
+    def map(self, problem, starts):
+        """Generates the successor of each start and evaluates it in the worker
+        processes; see Executor.map. The successors are bound to the engine."""
+
+        results = self.__pool.map(
+            _generate,
+            [(problem, start) for start in starts],
+            self.get_seeds(problem, starts),
+        )
+
+        return [(self.engine.bind(successor), value) for successor, value in results]
+
+    def close(self):
+        """Shuts the worker processes down."""
+
+        self.__pool.close()
+
+
+class _Pickler(EnginePickler):
+    """Pickles engines, transposition tables, and executors by reference."""
+
+    def persistent_id(self, obj):
+        if isinstance(obj, Executor):
+            return "executor {}".format(obj.seed)
+        if isinstance(obj, TranspositionTable):
+            return "none"
+
+        return EnginePickler.persistent_id(self, obj)
+
+
+class _Unpickler(EngineUnpickler):
+    """Unpickles references made by _Pickler in a worker process."""
+
+    def persistent_load(self, pid):
+        if pid.startswith("executor"):
+            return Executor(int(pid.split()[1]))
+        if pid == "none":
+            return None
+
+        return EngineUnpickler.persistent_load(self, pid)
+
+
+def _generate(engine, task):
+    """Generates and evaluates the successor of a start on the engine of a
+    worker process."""
+
+    problem, start = task
+    successor = problem.get_successor(engine.bind(start))
+
+    return successor, problem.get_value(successor)
@@ -15,10 +15,8 @@
 import pprint
 import time
 
-import pandas as pd
-
-from rearrangement.planning.discretization import discretize
-from rearrangement.planning import dlvhex
+from rearrangement import DEBUG_PATH, make_dirs
+from rearrangement.physics import Stats
 
 
 def generate_plan(
@@ -29,6 +27,7 @@ def generate_plan(
     verbose=False,
     accuracy=2,
     camera_distance=0,
+    workers=0,
 ):
     """
     Generates a plan to achieve the configuration.
@@ -48,6 +47,9 @@ def generate_plan(
         Verbosity.
     accuracy : int
         Accuracy of poses by how many digits to be rounded to.
+    workers : int
+        Number of worker processes resolving the collisions of candidate
+        plans; 0 resolves them in the process of the hybrid planner.
 
     Returns
     -------
@@ -56,6 +58,12 @@ def generate_plan(
 
     """
 
+    # pandas and the planners are only loaded once planning is actually used
+    import pandas as pd
+
+    from rearrangement.planning.discretization import discretize
+    from rearrangement.planning import dlvhex
+
     def merge_two_dicts(dict_1, dict_2):
         """
         Merges two dicts. From https://stackoverflow.com/questions/38987/.
@@ -102,6 +110,10 @@ def generate_plan(
 
     columns = ["bodyName", "plannerID", "poseFrom", "poseTo"]
 
+    # The phases of planning are timed here, while the engines checking plans
+    # for collisions in the process of the hybrid planner add their counters
+    stats = Stats()
+
     # The logic here is if there are no orginal bodies, or if the original
     # bodies have not moved, and the plan does not involve bodies that are
     # non-uniform along the z-axis, we do not need a 'plan' at the task level,
@@ -114,24 +126,28 @@ def generate_plan(
 
         time_elapsed = 0.0
     else:
-        discretized_configuration = discretize(
-            continuous_configuration=continuous_configuration,
-            name=name,
-            new=new,
-            verbose=verbose,
-        )
+        with stats.timer("discretize"):
+            discretized_configuration = discretize(
+                continuous_configuration=continuous_configuration,
+                name=name,
+                new=new,
+                verbose=verbose,
+            )
 
         # Query the hybrid planner for the minimum feasible plan.
         start_time = time.time()
-        data = dlvhex.hybrid_plan(
-            continuous_configuration=continuous_configuration,
-            discretized_configuration=discretized_configuration,
-            collision_threshold=collision_threshold,
-            new=new,
-            name=name,
-            verbose=verbose,
-            accuracy=accuracy,
-        )
+        with stats.timer("hybrid_plan"):
+            data = dlvhex.hybrid_plan(
+                continuous_configuration=continuous_configuration,
+                discretized_configuration=discretized_configuration,
+                collision_threshold=collision_threshold,
+                new=new,
+                name=name,
+                verbose=verbose,
+                accuracy=accuracy,
+                workers=workers,
+                stats=stats,
+            )
         time_elapsed = time.time() - start_time
         data = data + place_news(continuous_configuration, accuracy)
 
@@ -143,6 +159,7 @@ def generate_plan(
         ],
         "number of plan steps": len(plan),
         "hybrid planning time": "{:.4f} s".format(time_elapsed),
+        "stats": stats.to_dict(),
     }
 
     if verbose:
@@ -150,4 +167,7 @@ def generate_plan(
         pprint.pprint(hybrid_planning_res)
         print ("\n")
 
+        make_dirs(DEBUG_PATH)
+        stats.dump_json(DEBUG_PATH + "/{}-planning_stats.json".format(name))
+
     return plan
@@ -17,7 +17,7 @@
 import time
 import pprint
 
-from rearrangement import DEBUG_PATH
+from rearrangement import DEBUG_PATH, make_dirs
 from rearrangement.planning.discretization.discrete import Discrete
 
 
@@ -63,6 +63,7 @@ def discretize(continuous_configuration, name="instance", new=True, verbose=Fals
     }
 
     if verbose:
+        make_dirs(DEBUG_PATH)
         disc_config.plot_suboptimal(
             DEBUG_PATH + "/{}-discretized_configuration-suboptimal.pdf".format(name)
         )
@@ -19,9 +19,8 @@ import subprocess
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 
-from rearrangement import TEMP_PATH
+from rearrangement import TEMP_PATH, make_dirs
 from rearrangement.errors import type_error
 from rearrangement.physics import Configuration, Engine
 
@@ -263,6 +262,8 @@ class Discrete(object):
 
         """
 
+        import matplotlib.pyplot as plt
+
         self._plot(
             self.suboptimal_lines["hlines"],
             self.suboptimal_lines["vlines"],
@@ -283,6 +284,8 @@ class Discrete(object):
 
         """
 
+        import matplotlib.pyplot as plt
+
         self._plot(
             self.optimal_lines["hlines"],
             self.optimal_lines["vlines"],
@@ -303,6 +306,8 @@ class Discrete(object):
 
         """
 
+        import matplotlib.pyplot as plt
+
         self._plot(
             self.optimal_lines["hlines"],
             self.optimal_lines["vlines"],
@@ -324,6 +329,8 @@ class Discrete(object):
 
         """
 
+        import matplotlib.pyplot as plt
+
         self._plot(
             self.suboptimal_lines["hlines"],
             self.suboptimal_lines["vlines"],
@@ -360,6 +367,8 @@ class Discrete(object):
 
         """
 
+        import matplotlib.pyplot as plt
+
         borders = self.borders
         x_min = borders[0][0][0]
         x_max = borders[0][0][1]
@@ -431,6 +440,7 @@ class Discrete(object):
         
         """
 
+        make_dirs(TEMP_PATH)
         cd_path = os.path.dirname(__file__)
         input_path = os.path.abspath(TEMP_PATH + "/naive_discretization.lp")
         optimizer_path = os.path.abspath(cd_path + "/optimal_discretizer.lp")
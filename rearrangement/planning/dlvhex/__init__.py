@@ -27,6 +27,8 @@ def hybrid_plan(
     name,
     verbose,
     accuracy,
+    workers=0,
+    stats=None,
 ):
     """
     Uses DLVHEX as a hybrid planner, integrating task and motion planning.
@@ -46,6 +48,12 @@ def hybrid_plan(
         Base filename to use for debug files.
     verbose : bool
         Verbosity.
+    workers : int
+        Number of worker processes resolving the collisions of candidate
+        plans; 0 resolves them in the process of DLVHEX.
+    stats : Stats
+        The stats to which the counters and timers of the engines checking
+        candidate plans for collisions are added (optional).
 
     RETURNS
     -------
@@ -92,6 +100,8 @@ def hybrid_plan(
         min_steps,
         name,
         verbose,
+        workers,
+        stats,
     )
 
     if success:
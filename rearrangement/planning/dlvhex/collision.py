@@ -11,16 +11,24 @@
     Repository: https://github.com/ardabbour/rearrangement/
 """
 
+import atexit
 import copy
 import json
 
 import numpy as np
 
-from rearrangement import DATA_PATH
-from rearrangement.physics import Constraint, Engine
+from rearrangement import DATA_PATH, TEMP_PATH
+from rearrangement.physics import Constraint, Engine, EnginePool, Stats
 from rearrangement.planning.feasibility import Consistent, Plan
 from rearrangement.search import LocalSearch
 
+# Shared by headless collision checks, so that its loaded bodies are reused
+_ENGINE = None
+
+# The counters and timers of the engines released by collision checks, written
+# to the temporary directory for the process running the hybrid planner
+_STATS = Stats()
+
 
 def colliding(
     plan,
@@ -28,6 +36,7 @@ def colliding(
     discrete_configuration_df,
     collision_threshold=0.01,
     verbose=False,
+    workers=0,
 ):
     """
     Checks to find if a plan is collision-free.
@@ -43,6 +52,9 @@ def colliding(
         declared.
     verbose : bool
         Verbosity
+    workers : int
+        Number of worker processes resolving the collisions of the plan; 0
+        resolves them in this process.
 
     RETURNS
     -------
@@ -51,9 +63,7 @@ def colliding(
 
     """
 
-    engine = Engine()
-    engine.connect(visual=verbose)
-    engine.collision_threshold = collision_threshold
+    engine = get_engine(verbose, collision_threshold)
 
     # Create constrained (according to DLVHEX cells) sequence of configs
     constrained_configs = get_constrained_configs(
@@ -71,24 +81,74 @@ def colliding(
     # If the initialized plan has no collisions, return False
     if problem.get_value(state)[0] == 0:
         state.save_plan(filename="plan", screenshots=verbose)
-        engine.disconnect()
+        release_engine(engine)
         return False
 
-    # Else, search for solution
-    solution = LocalSearch(problem, timeout=2, random_restart=False).simple()
+    # Else, search for solution; the workers replicate the bodies loaded above
+    if workers:
+        problem.pool = EnginePool(engine, workers)
+    try:
+        solution = LocalSearch(problem, timeout=2, random_restart=False).simple()
+    finally:
+        if problem.pool is not None:
+            problem.pool.close()
 
     # If the plan cannot be freed from collisions, return True
     if problem.get_value(solution)[0] > 0:
-        engine.disconnect()
+        release_engine(engine)
         return True
 
     # Else, store the plan with continuous poses in a csv and return False
     solution.save_plan(filename="plan", screenshots=verbose)
 
-    engine.disconnect()
+    release_engine(engine)
     return False
 
 
+def get_engine(visual, collision_threshold):
+    """Returns a connected engine; headless engines are shared across calls."""
+
+    global _ENGINE
+
+    if visual:
+        engine = Engine()
+        engine.connect(visual=True)
+    else:
+        if _ENGINE is None or not _ENGINE.connected:
+            _ENGINE = Engine()
+            _ENGINE.connect(visual=False)
+        engine = _ENGINE
+    engine.collision_threshold = collision_threshold
+
+    return engine
+
+
+def release_engine(engine):
+    """Adds the stats of an engine returned by get_engine to those of previous
+    collision checks, writes them to collision_stats.json in the temporary
+    directory, and disconnects the engine, unless it is shared."""
+
+    _STATS.merge(engine.stats.to_dict())
+    engine.stats.reset()
+    _STATS.dump_json(TEMP_PATH + "/collision_stats.json")
+
+    if engine is not _ENGINE:
+        engine.disconnect()
+
+
+def close_engine():
+    """Disconnects the shared headless engine, if any; it is called at exit."""
+
+    global _ENGINE
+
+    if _ENGINE is not None and _ENGINE.connected:
+        _ENGINE.disconnect()
+    _ENGINE = None
+
+
+atexit.register(close_engine)
+
+
 def get_constrained_configs(plan, cont_config_df, disc_conf_df, engine):
     """Returns a list of configurations, each with its appropriate constraints."""
 
@@ -101,21 +161,18 @@ def get_constrained_configs(plan, cont_config_df, disc_conf_df, engine):
     this_config = copy.deepcopy(init_config)
 
     for step in plan[1:]:
-        next_query = create_query(cont_config_df, disc_conf_df, step)
+        next_query = json.loads(create_query(cont_config_df, disc_conf_df, step))
         next_config = copy.deepcopy(this_config)
         for phys_body in next_config.movable:
             name = phys_body.name
             json_constraints = [
-                item
-                for _, item in json.loads(next_query)["originals"][name][
-                    "constraints"
-                ].items()
+                item for _, item in next_query["originals"][name]["constraints"].items()
             ]
             body_constraints = []
             for x in json_constraints:
                 body_constraints.append(Constraint(x["shape"], x["geometry"]))
             phys_body.constraints = body_constraints
-            pose = json.loads(next_query)["originals"][name]["pose"]
+            pose = next_query["originals"][name]["pose"]
             phys_body.pose = pose
 
         configs.append(next_config)
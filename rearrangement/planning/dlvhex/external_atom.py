@@ -33,7 +33,7 @@ def isCollision(location_predicate):
 
     # Get information of continuous state and its discretization
     config_info, discrete_info = utils.get_dataframes(plan)
-    verbose, col_thresh = utils.read_settings()
+    verbose, col_thresh, workers = utils.read_settings()
 
     # Check for collisions in the plan
     if not collision.colliding(
@@ -42,6 +42,7 @@ def isCollision(location_predicate):
         discrete_info,
         verbose=verbose,
         collision_threshold=col_thresh,
+        workers=workers,
     ):
         return None
 
@@ -15,7 +15,7 @@ import os
 
 import pandas as pd
 
-from rearrangement import TEMP_PATH
+from rearrangement import TEMP_PATH, make_dirs
 
 
 def preprocess(continuous_configuration, discretized_configuration):
@@ -63,6 +63,7 @@ def preprocess(continuous_configuration, discretized_configuration):
 
     # Store configuration info, including initial and goal poses and cells
     config_info = get_config_info(continuous_configuration, initial_info, goal_info)
+    make_dirs(TEMP_PATH)
     config_info_path = os.path.abspath(TEMP_PATH + "/config_info.csv")
     config_info.to_csv(str(config_info_path), index=False)
 
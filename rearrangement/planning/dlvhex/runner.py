@@ -19,7 +19,7 @@ import sys
 
 import pandas as pd
 
-from rearrangement import TEMP_PATH
+from rearrangement import TEMP_PATH, make_dirs
 
 
 def run_dlvhex_planner(
@@ -30,6 +30,8 @@ def run_dlvhex_planner(
     min_steps,
     name,
     verbose,
+    workers=0,
+    stats=None,
 ):
     """
     Incremental planning with DLVHEX
@@ -48,6 +50,12 @@ def run_dlvhex_planner(
         Base filename to use for debug files.
     verbose : bool
         Verbosity.
+    workers : int
+        Number of worker processes resolving the collisions of candidate
+        plans; 0 resolves them in the process of DLVHEX.
+    stats : Stats
+        The stats to which the counters and timers of the engines checking
+        candidate plans for collisions are added (optional).
 
     RETURNS
     -------
@@ -133,9 +141,11 @@ def run_dlvhex_planner(
     dir_path = os.path.abspath(os.path.dirname(__file__))
     domain_path = os.path.abspath(dir_path + "/hybrid_planner.lp")
     plugin_path = os.path.abspath(dir_path + "/external_atom.py")
+    make_dirs(TEMP_PATH)
     input_path = os.path.abspath(TEMP_PATH + "/plan_input.lp")
     exec_path = os.path.abspath(TEMP_PATH + "/exec.sh")
     settings_path = os.path.abspath(TEMP_PATH + "/settings.json")
+    stats_path = os.path.abspath(TEMP_PATH + "/collision_stats.json")
 
     with open(settings_path, "w") as settings:
         json.dump(
@@ -143,6 +153,7 @@ def run_dlvhex_planner(
                 "collision_threshold": collision_threshold,
                 "name": name,
                 "verbose": verbose,
+                "workers": workers,
             },
             settings,
         )
@@ -161,6 +172,13 @@ def run_dlvhex_planner(
         )
         ans, _ = process.communicate()
 
+        # Each run of DLVHEX writes the stats of its collision checks anew
+        if os.path.exists(stats_path):
+            if stats is not None:
+                with open(stats_path) as stats_file:
+                    stats.merge(json.load(stats_file))
+            os.remove(stats_path)
+
         if not isinstance(ans, str):
             ans = ans.decode("utf-8")
         time_steps += 1
@@ -22,12 +22,13 @@ from rearrangement import TEMP_PATH
 def read_settings():
     settings_json = json.load(open(TEMP_PATH + "/settings.json"))
 
-    verbose, collision_threshold = (
+    verbose, collision_threshold, workers = (
         settings_json["verbose"],
         settings_json["collision_threshold"],
+        settings_json["workers"],
     )
 
-    return verbose, collision_threshold
+    return verbose, collision_threshold, workers
 
 
 def get_task_plan(dlvhex_input):
@@ -15,7 +15,7 @@ import copy
 import time
 
 from rearrangement.errors import type_error
-from rearrangement.physics import Engine
+from rearrangement.physics import Engine, EnginePool
 from rearrangement.search import Problem, LocalSearch
 from rearrangement.placement import Middle
 
@@ -36,6 +36,9 @@ class Consistent(Problem):
         The pyBullet physics engine wrapper.
     start_time : float
         The starting time of the problem, in Unix time.
+    pool : EnginePool
+        The pool whose engines resolve the collisions of the configurations of
+        a plan in parallel; None resolves them one by one with engine.
     
     ATTRIBUTES
     ----------
@@ -45,13 +48,17 @@ class Consistent(Problem):
         The pyBullet physics engine wrapper.
     start_time : float
         The starting time of the problem, in Unix time.
+    pool : EnginePool
+        The pool whose engines resolve the collisions of the configurations of
+        a plan in parallel; None resolves them one by one with engine.
 
     """
 
-    def __init__(self, initial_state, engine, start_time=time.time()):
+    def __init__(self, initial_state, engine, start_time=time.time(), pool=None):
 
         self.start_time = start_time
         self.engine = engine
+        self.pool = pool
 
         super(Consistent, self).__init__(initial_state, maximality=False, lexi=True)
 
@@ -77,6 +84,17 @@ class Consistent(Problem):
         else:
             raise type_error("start_time", float, type(start_time))
 
+    @property
+    def pool(self):
+        return self.__pool
+
+    @pool.setter
+    def pool(self, pool):
+        if pool is None or isinstance(pool, EnginePool):
+            self.__pool = pool
+        else:
+            raise type_error("pool", EnginePool, type(pool))
+
     def get_successors(self, state):
         """Given state S with configurations C0, C1, ..., Cn; n = |A|, it
         returns m successor states S'1, S'2, ..., S'm; m <= n
@@ -119,7 +137,7 @@ class Consistent(Problem):
                     body = config.movable[ref_body_ind]
                     same_cons = body.constraints == ref_body.constraints
                     if same_cons and not for_stop_flag:
-                        body.pose = ref_body.pose
+                        body._set_pose(ref_body.pose)
                     else:
                         for_stop_flag = True
 
@@ -129,37 +147,42 @@ class Consistent(Problem):
                     body = config.movable[ref_body_ind]
                     same_cons = body.constraints == ref_body.constraints
                     if same_cons and not back_stop_flag:
-                        body.pose = ref_body.pose
+                        body._set_pose(ref_body.pose)
                     else:
                         back_stop_flag = True
 
             return successor
 
-        successors = set()
-        for index, configuration in enumerate(state.configurations):
-            in_collision = self.engine.get_collision_info(configuration)["status"]
-            if in_collision:
-
-                # Create a new plan
-                successor = copy.deepcopy(state)
-
-                # Select the configuration to resolve collisions in
-                successor_configuration = successor.configurations[index]
+        # Select the configurations to resolve collisions in
+        indices = [
+            index
+            for index, configuration in enumerate(state.configurations)
+            if self.engine.get_collision_info(configuration, "consistent")["status"]
+        ]
+        tasks = [(state.configurations[index], self.start_time) for index in indices]
+
+        # Attempt to resolve the collisions of each selected configuration,
+        # independently of the others
+        if self.pool is None:
+            new_configs = [_resolve(self.engine, task) for task in tasks]
+        else:
+            new_configs = [
+                self.engine.bind(new_config)
+                for new_config in self.pool.map(_resolve, tasks)
+            ]
 
-                # Define collision resolving local search problem
-                middle = Middle(copy.deepcopy(successor_configuration), self.engine)
+        successors = set()
+        for index, new_config in zip(indices, new_configs):
 
-                # Attempt to resolve collisions in selected configuration
-                new_config = LocalSearch(
-                    middle, timeout=1, start_time=self.start_time, random_restart=False
-                ).simple()
+            # Create a new plan
+            successor = copy.deepcopy(state)
 
-                # Propagate the changes done by resolving the collisions to
-                # the rest of the configurations in the plan.
-                successor = propagate(index, new_config, successor)
+            # Propagate the changes done by resolving the collisions to
+            # the rest of the configurations in the plan.
+            successor = propagate(index, new_config, successor)
 
-                # Add the successor to the set of successors
-                successors.add(successor)
+            # Add the successor to the set of successors
+            successors.add(successor)
 
         return successors
 
@@ -183,7 +206,7 @@ class Consistent(Problem):
 
         cost = [0, 0, 0]
         for config in state.configurations:
-            config_cost = self.engine.get_collision_info(config)
+            config_cost = self.engine.get_collision_info(config, "consistent")
             if config_cost["status"]:
                 cost[0] += 1
                 cost[1] += config_cost["number"]
@@ -206,3 +229,17 @@ class Consistent(Problem):
             config.randomize()
 
         return randomized_state
+
+
+def _resolve(engine, task):
+    """Resolves the collisions of a configuration with a middle search on an
+    engine, given the configuration and the start time of the search."""
+
+    configuration, start_time = task
+
+    # Define collision resolving local search problem
+    middle = Middle(engine.bind(configuration), engine)
+
+    return LocalSearch(
+        middle, timeout=1, start_time=start_time, random_restart=False
+    ).simple()
@@ -16,7 +16,7 @@ import json
 
 import pandas as pd
 
-from rearrangement import DEBUG_PATH, TEMP_PATH
+from rearrangement import DEBUG_PATH, TEMP_PATH, make_dirs
 from rearrangement.errors import type_error
 from rearrangement.physics import Engine
 
@@ -142,10 +142,14 @@ class Plan(object):
             columns = ["bodyName", "plannerID", "poseFrom", "poseTo"]
             data = self.calculate_plan()
             dataframe = pd.DataFrame(data=data, columns=columns)
+            make_dirs(TEMP_PATH)
             dataframe.to_csv(TEMP_PATH + "/{}.csv".format(filename), index=False)
 
         if screenshots:
+            make_dirs(DEBUG_PATH)
             for index, configuration in enumerate(self.configurations):
                 self.engine.configuration = configuration
-                img = self.engine.get_image()
-                img.save(DEBUG_PATH + "/{}-step_{}.png".format(filename, index))
+                self.engine.save_image(
+                    DEBUG_PATH + "/{}-step_{}.png".format(filename, index)
+                )
+            self.engine.flush_images()
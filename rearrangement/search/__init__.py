@@ -12,6 +12,8 @@
 """
 
 from rearrangement.search.utils import pairwise_comparison, multiple_comparison
+from rearrangement.search.table import TranspositionTable
+from rearrangement.search.executor import Executor
 from rearrangement.search.problem import Problem
 from rearrangement.search.node import Node
 from rearrangement.search.local import LocalSearch
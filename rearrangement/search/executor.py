@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    Executor class definition
+
+    An executor generates and evaluates the successors of a state from their
+    starts (see Problem.get_starts), which are independent of each other. This
+    executor does so in order, in the same process; subclasses may farm the
+    starts out, as long as they return the same results in the same order.
+
+    Author: Abdul Rahman Dabbour
+    Affiliation: CogRobo Lab, FENS, Sabanci University
+    License: GNU General Public License v3.0
+    Repository: https://github.com/ardabbour/rearrangement/
+"""
+
+import pickle
+import zlib
+
+import numpy as np
+
+from rearrangement.errors import type_error
+
+
+class Executor(object):
+    """
+    Defines an executor that generates successors one by one.
+
+    Numpy is seeded before generating each successor by a seed derived from
+    the seed of the executor, the index of the start, and its key (see
+    Problem.get_key), so that successors do not depend on where or in which
+    order they are generated. The random state of numpy is restored afterwards;
+    generating successors therefore does not shift the random numbers drawn
+    by the search, such as those of random restarts.
+
+    Parameters
+    ----------
+    seed : int
+        the seed from which the seeds of the successors are derived.
+
+    Attributes
+    ----------
+    seed : int
+        the seed from which the seeds of the successors are derived.
+    """
+
+    def __init__(self, seed=0):
+        self.seed = seed
+
+    @property
+    def seed(self):
+        return self.__seed
+
+    @seed.setter
+    def seed(self, seed):
+        if isinstance(seed, int):
+            self.__seed = seed
+        else:
+            raise type_error("seed", int, type(seed))
+
+    def get_seeds(self, problem, starts):
+        """Returns the seed numpy is seeded with before generating the
+        successor of each start."""
+
+        return [
+            zlib.crc32(pickle.dumps((self.seed, index, problem.get_key(start)), 2))
+            & 0x7FFFFFFF
+            for index, start in enumerate(starts)
+        ]
+
+    def map(self, problem, starts):
+        """
+        Generates the successor of each start and evaluates it.
+
+        Parameters
+        ----------
+        problem : Problem
+            the problem the starts were given by.
+        starts : list
+            the starts of the successors, as given by Problem.get_starts.
+
+        Returns
+        -------
+        results : list
+            the (successor, value) tuple of each start, in the order of starts.
+        """
+
+        results = []
+        state = np.random.get_state()
+        try:
+            for start, seed in zip(starts, self.get_seeds(problem, starts)):
+                np.random.seed(seed)
+                successor = problem.get_successor(start)
+                results.append((successor, problem.get_value(successor)))
+        finally:
+            np.random.set_state(state)
+
+        return results
+
+    def close(self):
+        """Frees the resources of the executor."""
+
+        pass
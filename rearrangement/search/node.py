@@ -23,6 +23,8 @@ class Node(object):
         the problem definition.
     state : Any
         the state.
+    value : float
+        the value of the state, if already known (optional).
 
     Attributes
     ----------
@@ -35,13 +37,18 @@ class Node(object):
     value : float
         value of the state.
 
+    Values, and the successors of deterministic problems, are looked up in the
+    transposition table of the problem before being computed, if it has one.
+    Successors are generated by the executor of the problem, if it has one and
+    the problem gives the starts of the successors.
+
     """
 
-    def __init__(self, problem, state):
+    def __init__(self, problem, state, value=None):
         self.problem = problem
         self.state = state
         self.successors = None
-        self.value = problem.get_value(self.state)
+        self.value = self.__get_value(value)
 
     @property
     def problem(self):
@@ -78,6 +85,62 @@ class Node(object):
     def value(self, value):
         self.__value = value
 
+    def __get_key(self):
+        """Returns the key of the state in the transposition table, or None if
+        it is not to be memoized."""
+
+        if self.problem.table is None:
+            return None
+
+        return self.problem.get_key(self.state)
+
+    def __get_value(self, value):
+        """Returns the value of the state, memoized if possible, unless it is
+        already known."""
+
+        key = self.__get_key()
+        if key is None:
+            return self.problem.get_value(self.state) if value is None else value
+
+        if value is not None:
+            self.problem.table.set_value(key, value)
+            return value
+
+        value = self.problem.table.get_value(key)
+        if value is None:
+            value = self.problem.get_value(self.state)
+            self.problem.table.set_value(key, value)
+
+        return value
+
+    def __get_successors(self):
+        """Returns the successor states along with their values, or None where
+        their values are not known."""
+
+        starts = None
+        if self.problem.executor is not None:
+            starts = self.problem.get_starts(self.state)
+        if starts is None:
+            successor_states = list(self.problem.get_successors(self.state))
+            return successor_states, [None] * len(successor_states)
+
+        results = self.problem.executor.map(self.problem, starts)
+
+        return [x for x, _ in results], [x for _, x in results]
+
     def expand(self):
-        successor_states = self.problem.get_successors(self.state)
-        self.successors = [Node(self.problem, x) for x in successor_states]
+        key = self.__get_key() if self.problem.deterministic else None
+        successor_states = None
+        if key is not None:
+            successor_states = self.problem.table.get_successors(key)
+        if successor_states is None:
+            successor_states, values = self.__get_successors()
+            if key is not None:
+                self.problem.table.set_successors(key, successor_states)
+        else:
+            values = [None] * len(successor_states)
+
+        self.successors = [
+            Node(self.problem, x, value)
+            for x, value in zip(successor_states, values)
+        ]
@@ -13,6 +13,7 @@
 """
 
 from rearrangement.errors import type_error
+from rearrangement.search import Executor, TranspositionTable
 
 
 class Problem(object):
@@ -29,6 +30,10 @@ class Problem(object):
         whether the objective is to be compared lexicographically.
     goal : Any
         the goal state where the problem terminates (optional)
+    table : TranspositionTable
+        the table memoizing the values and successors of states (optional)
+    executor : Executor
+        the executor generating the successors of states (optional)
 
     Attributes
     ----------
@@ -40,14 +45,27 @@ class Problem(object):
         whether the objective is to be compared lexicographically.
     goal : Any
         the goal state where the problem terminates (optional)
+    table : TranspositionTable
+        the table memoizing the values and successors of states (optional)
+    executor : Executor
+        the executor generating the successors of states (optional)
+    deterministic : bool
+        whether the successors of a state depend on its key alone, so that
+        they can be memoized along with its value.
     
     """
 
-    def __init__(self, init_state, maximality, lexi, goal=None):
+    deterministic = False
+
+    def __init__(
+        self, init_state, maximality, lexi, goal=None, table=None, executor=None
+    ):
         self.init_state = init_state
         self.maximality = maximality
         self.goal = goal
         self.lexi = lexi
+        self.table = table
+        self.executor = executor
 
     @property
     def init_state(self):
@@ -87,6 +105,28 @@ class Problem(object):
         else:
             raise type_error("maximality", Problem, type(maximality))
 
+    @property
+    def table(self):
+        return self.__table
+
+    @table.setter
+    def table(self, table):
+        if table is None or isinstance(table, TranspositionTable):
+            self.__table = table
+        else:
+            raise type_error("table", TranspositionTable, type(table))
+
+    @property
+    def executor(self):
+        return self.__executor
+
+    @executor.setter
+    def executor(self, executor):
+        if executor is None or isinstance(executor, Executor):
+            self.__executor = executor
+        else:
+            raise type_error("executor", Executor, type(executor))
+
     def set_goal(self, goal):
         self.__goal = goal
 
@@ -95,11 +135,29 @@ class Problem(object):
 
         raise NotImplementedError()
 
+    def get_starts(self, state):
+        """Returns the starts from which get_successor generates the successors
+        of a state independently of each other, or None if the successors can
+        only be generated together by get_successors."""
+
+        return None
+
+    def get_successor(self, start):
+        """Returns the successor generated from a start given by get_starts."""
+
+        raise NotImplementedError()
+
     def get_value(self, state):
         """Returns the value of a state."""
 
         raise NotImplementedError()
 
+    def get_key(self, state):
+        """Returns a hashable key of a state for the transposition table, or
+        None if the state is not to be memoized."""
+
+        return None
+
     def get_random_restart(self):
         """Returns a random state."""
 
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    TranspositionTable class definition
+
+    A transposition table memoizes the values and the successors of the states
+    a local search has already seen, so that nested searches and random
+    restarts reaching the same state again do not evaluate or expand it again.
+
+    Author: Abdul Rahman Dabbour
+    Affiliation: CogRobo Lab, FENS, Sabanci University
+    License: GNU General Public License v3.0
+    Repository: https://github.com/ardabbour/rearrangement/
+"""
+
+import collections
+import copy
+import sys
+
+from rearrangement.errors import type_error, value_error
+
+
+class TranspositionTable(object):
+    """
+    Defines a bounded transposition table, keyed by the keys problems give
+    their states (see Problem.get_key). The least recently used states are
+    forgotten first, once the memory of the table exceeds its budget.
+
+    The memory of an entry is estimated by sys.getsizeof from its key, value,
+    and memoized successors. States that hold other objects, such as
+    Configuration, define __sizeof__ to account for them; the size of other
+    states is that of the object alone.
+
+    Parameters
+    ----------
+    max_bytes : int
+        the memory budget of the table, in bytes.
+
+    Attributes
+    ----------
+    max_bytes : int
+        the memory budget of the table, in bytes.
+    nbytes : int
+        the estimated memory of the entries of the table, in bytes.
+    hits : int
+        the number of lookups that found a memoized value or successors.
+    misses : int
+        the number of lookups that did not.
+    evictions : int
+        the number of states forgotten to respect max_bytes.
+    """
+
+    def __init__(self, max_bytes=2 ** 26):
+        self.max_bytes = max_bytes
+        self.__entries = collections.OrderedDict()
+        self.__sizes = {}
+        self.__nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key):
+        return key in self.__entries
+
+    @property
+    def max_bytes(self):
+        return self.__max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes):
+        if not isinstance(max_bytes, int):
+            raise type_error("max_bytes", int, type(max_bytes))
+        if max_bytes < 1:
+            raise value_error("max_bytes", "a positive integer", max_bytes)
+        self.__max_bytes = max_bytes
+
+    @property
+    def nbytes(self):
+        return self.__nbytes
+
+    def __touch(self, key):
+        """Marks a state as the most recently used."""
+
+        # OrderedDict.move_to_end is not available on Python 2
+        self.__entries[key] = self.__entries.pop(key)
+
+    def __lookup(self, key, field):
+        """Returns the memoized field of a state, or None, counting the lookup
+        and marking the state as the most recently used."""
+
+        entry = self.__entries.get(key)
+        if entry is None or field not in entry:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.__touch(key)
+
+        return entry[field]
+
+    def __store(self, key, field, item, size):
+        """Memoizes a field of a state along with its size, forgetting the
+        least recently used states while the table is over its budget."""
+
+        entry = self.__entries.setdefault(key, {})
+        entry[field] = (item, size)
+        self.__touch(key)
+
+        old_size = self.__sizes.get(key, 0)
+        self.__sizes[key] = (
+            _get_size(key)
+            + sys.getsizeof(entry)
+            + sum(x for _, x in entry.values())
+        )
+        self.__nbytes += self.__sizes[key] - old_size
+
+        while self.__nbytes > self.max_bytes and self.__entries:
+            evicted, _ = self.__entries.popitem(last=False)
+            self.__nbytes -= self.__sizes.pop(evicted)
+            self.evictions += 1
+
+    def get_value(self, key):
+        """Returns the memoized value of a state, or None if there is none."""
+
+        value = self.__lookup(key, "value")
+        if value is None:
+            return None
+
+        return value[0]
+
+    def set_value(self, key, value):
+        """Memoizes the value of a state."""
+
+        self.__store(key, "value", value, _get_size(value))
+
+    def get_successors(self, key):
+        """Returns copies of the memoized successors of a state, or None if
+        there are none; the copies may be modified freely."""
+
+        successors = self.__lookup(key, "successors")
+        if successors is None:
+            return None
+
+        return copy.deepcopy(successors[0])
+
+    def set_successors(self, key, successors):
+        """Memoizes copies of the successors of a state, so that later changes
+        to the successors do not reach the table."""
+
+        successors = copy.deepcopy(list(successors))
+        size = sys.getsizeof(successors) + sum(sys.getsizeof(x) for x in successors)
+        self.__store(key, "successors", successors, size)
+
+    def clear(self):
+        """Forgets all states and resets the counters."""
+
+        self.__entries.clear()
+        self.__sizes.clear()
+        self.__nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def to_dict(self):
+        """Returns the size, the estimated memory, and the counters of the
+        table as a dict."""
+
+        return {
+            "size": len(self),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def _get_size(obj):
+    """Returns the size of an object in bytes, including the items of tuples,
+    which keys and lexicographic values are made of."""
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, tuple):
+        size += sum(_get_size(x) for x in obj)
+
+    return size
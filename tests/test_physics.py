@@ -2,16 +2,63 @@
 # -*- coding: utf-8 -*-
 
 import pytest
+import copy
+import json
 import math
+import os
+import pickle
+import sys
+import numpy as np
+import pybullet as p
+import rearrangement
 from rearrangement.physics import (
     Body,
     Configuration,
     Constraint,
+    CompiledConstraints,
     Engine,
+    EnginePool,
     to_euler,
     to_quaternion,
+    to_eulers,
+    to_quaternions,
+    to_local_aabb,
+    to_world_aabb,
+    get_overlapping_pairs,
+    get_penetration_matrix,
+    separate_footprints,
+    Footprint,
+    Geometry,
+    GeometryCache,
+    get_geometry_cache,
+    Occupancy,
+    project_poses,
+    pack_geometry,
+    unpack_geometry,
+    Scene,
+    Stats,
+    ImageWriter,
 )
 
+QUERY = os.path.join(
+    os.path.dirname(rearrangement.__file__), "data", "example-query.json"
+)
+
+
+@pytest.fixture
+def engine():
+    np.random.seed(0)
+    engine = Engine()
+    engine.connect(False)
+    with open(QUERY) as query_file:
+        engine.load_configuration(json.load(query_file))
+    yield engine
+    engine.disconnect()
+
+
+def get_calls(engine, kind):
+    return engine.stats.to_dict()["calls"].get(kind, 0)
+
 
 def test_to_euler():
     ans = [round(x, 5) for x in to_euler([0.5, 0.5, 0.5, 0.5])]
@@ -21,3 +68,657 @@ def test_to_euler():
 def test_to_quaternion():
     ans = [round(x, 5) for x in to_quaternion([math.pi / 2, 0, math.pi / 2])]
     assert ans == [0.5, 0.5, 0.5, 0.5]
+
+
+def test_to_eulers():
+    quaternions = [[0.5, 0.5, 0.5, 0.5], [0, 0, 0.6, 0.8], [0.1, 0.2, 0.3, 0.927]]
+    for quaternion, euler in zip(quaternions, to_eulers(quaternions)):
+        assert list(euler) == pytest.approx(to_euler(quaternion), abs=1e-12)
+
+
+def test_to_quaternions():
+    eulers = [[math.pi / 2, 0, math.pi / 2], [0, 0, -2.5], [0.3, -1.2, 2.1]]
+    for euler, quaternion in zip(eulers, to_quaternions(eulers)):
+        assert list(quaternion) == pytest.approx(to_quaternion(euler), abs=1e-12)
+
+
+def test_to_local_aabb():
+    aabb = [[0.0, 1.0, 0.0], [2.0, 2.0, 0.5]]
+    local = to_local_aabb(aabb, [1.0, 1.0, 0.25], math.pi / 2)
+    assert local == pytest.approx([0.5, 0.0, 0.5, 1.0, -0.25, 0.25])
+    assert to_local_aabb(aabb, [1.0, 1.0, 0.25], math.pi / 4) is None
+
+    for yaw in [0.0, 0.3, 2.0, -2.8]:
+        world = to_world_aabb(local, [1.0, -1.0, 0.25], yaw)
+        again = to_local_aabb(world, [1.0, -1.0, 0.25], yaw)
+        assert again == pytest.approx(local)
+
+
+def test_get_overlapping_pairs():
+    aabbs = [
+        [[0, 0, 0], [1, 1, 1]],
+        [[3, 3, 0], [4, 4, 1]],
+        [[0.5, 0.5, 0], [1.5, 1.5, 1]],
+        [[0.5, 3, 0], [3.5, 3.5, 1]],
+    ]
+    assert get_overlapping_pairs(aabbs) == [(0, 2), (1, 3)]
+
+
+def test_occupancy():
+    obstacles = [[[0, 0, 0], [1, 1, 1]], [[3, 3, 0], [4, 4, 1]]]
+    occupancy = Occupancy(obstacles, [[-5, -5], [5, 5]], resolution=10)
+    assert occupancy.grid.shape == (10, 10)
+    assert occupancy.grid.sum() == 8
+    aabbs = [
+        [[0.5, 0.5, 0], [3.5, 3.5, 1]],
+        [[0.5, 0.5, 2], [0.7, 0.7, 3]],
+        [[-4, -4, 0], [-3, -3, 1]],
+        [[8, 8, 0], [9, 9, 1]],
+    ]
+    assert occupancy.screen(aabbs).tolist() == [True, True, False, False]
+    assert occupancy.is_free(aabbs[2])
+    assert occupancy.get_overlapping_pairs(aabbs) == [(0, 0), (0, 1)]
+    assert not Occupancy([], [[-1, -1], [1, 1]]).screen(aabbs).any()
+
+
+def test_geometry_cache(tmpdir):
+    urdf = str(tmpdir.join("lshape.urdf"))
+    with open(urdf, "w") as urdf_file:
+        urdf_file.write(
+            """<robot name="lshape">
+            <link name="base">
+                <collision><geometry><box size="1 3 1"/></geometry></collision>
+            </link>
+            <link name="cube">
+                <collision>
+                    <origin xyz="1 1 0"/>
+                    <geometry><box size="1 1 1"/></geometry>
+                </collision>
+            </link>
+            <joint name="fixed" type="fixed">
+                <parent link="base"/>
+                <child link="cube"/>
+            </joint>
+            </robot>"""
+        )
+
+    path = str(tmpdir.join("cache/geometry.json"))
+    cache = GeometryCache(path)
+    geometry = cache.get(urdf, 2.0)
+    assert cache.get(urdf, 2.0) is geometry
+    assert geometry.scaling == 2.0
+    assert geometry.area == pytest.approx(16.0, rel=1e-2)
+    assert geometry.z_extent.tolist() == [-1.0, 1.0]
+    assert geometry.half_extents.tolist() == [1.0, 0.0, 2.0, 3.0]
+    assert len(geometry.polygon) == 5
+
+    geometry.aabb_model.update(
+        local=[0, 0, 1, 1, -1, 1], offset=[], yaw=0.0, invariant=False, verified=True
+    )
+    cache.save()
+    stored = GeometryCache(path)
+    again = stored.get(urdf, 2.0)
+    assert again.footprint.extents.tolist() == geometry.footprint.extents.tolist()
+    assert again.aabb_model["verified"]
+    assert again.area == geometry.area
+
+    os.remove(path)
+    cache.save()
+    stored.save()
+    assert not os.path.exists(path)
+    stored.get(urdf, 1.0)
+    stored.save()
+    with open(path) as cache_file:
+        assert len(json.load(cache_file)) == 1
+
+    assert get_geometry_cache().path is None
+
+    assert Geometry(None).polygon.shape == (0, 2)
+
+
+def test_get_penetration_matrix():
+    box = Footprint([[0, 0]], [0], [[0.5, 0.5]], [False], [[-0.5, 0.5]])
+    disc = Footprint([[0, 0]], [0], [[0.5, 0.5]], [True], [[-0.5, 0.5]])
+    poses = [[0, 0, 0], [0.75, 0, 0], [0, -0.9, 0], [5, 5, 0]]
+    ans = get_penetration_matrix([box, box, disc, disc], poses, [0.5] * 4)
+    assert ans.shape == (4, 4)
+    assert [round(x, 5) for x in ans[0]] == [0, 0.25, 0.1, 0]
+    assert round(ans[1, 2], 5) == round(0.5 - math.hypot(0.25, 0.4), 5)
+    assert (ans == ans.T).all()
+
+
+def test_stacked_spheres():
+    # Spheres of radius 0.5, the second resting on the first with an offset
+    sphere = Footprint([[0, 0]], [0], [[0.5, 0.5]], [True], [[-0.5, 0.5]])
+    poses, z_offs = [[0, 0, 0], [0.6, 0, 0]], [0.5, 1.3]
+    ans = get_penetration_matrix([sphere, sphere], poses, z_offs)
+
+    eid = p.connect(p.DIRECT)
+    try:
+        shape = p.createCollisionShape(p.GEOM_SPHERE, radius=0.5, physicsClientId=eid)
+        bids = [
+            p.createMultiBody(0, shape, basePosition=[x, 0, z], physicsClientId=eid)
+            for (x, _, _), z in zip(poses, z_offs)
+        ]
+        points = p.getClosestPoints(bids[0], bids[1], 0.01, physicsClientId=eid)
+    finally:
+        p.disconnect(eid)
+
+    # The physics engine finds the spheres touching, while they overlap as
+    # cylinders by the overlap of their heights
+    assert min(x[8] for x in points) == pytest.approx(0.0, abs=1e-6)
+    assert ans[0, 1] == ans[1, 0] == pytest.approx(0.2)
+
+
+def test_separate_footprints():
+    box = Footprint([[0, 0]], [0], [[0.5, 0.5]], [False], [[-0.5, 0.5]])
+    disc = Footprint([[0, 0]], [0], [[0.5, 0.5]], [True], [[-0.5, 0.5]])
+    rectangle = Constraint(
+        "rectangular", {"min x": -1, "max x": 1, "min y": -1, "max y": 1}
+    )
+    footprints = [box, box, disc]
+    poses = [[0, 0, 0], [0.75, 0, 0], [0, -0.9, 0.3]]
+    constraints = [[], [rectangle], [rectangle]]
+    ans, iterations = separate_footprints(
+        footprints, poses, [0.5] * 3, constraints, [True, False, False]
+    )
+    assert ans[0].tolist() == [0, 0, 0]
+    assert ans[:, 2].tolist() == [0, 0, 0.3]
+    assert 0 < iterations < 100
+    assert get_penetration_matrix(footprints, ans, [0.5] * 3).max() <= 1e-3
+
+
+def test_project_poses():
+    rectangle = Constraint(
+        "rectangular", {"min x": 0, "max x": 1, "min y": 0, "max y": 1}
+    )
+    rotation = Constraint("rotational", {"min": 0, "max": 1})
+    circle = Constraint("circular", {"center": [0, 0], "radius": 0})
+    poses = [[2.0, -1.0, 2.0], [0.5, 0.5, -1.0], [3.0, 3.0, 0.5]]
+    ans = project_poses([[rectangle, rotation], [rectangle], [circle]], poses)
+    assert ans.tolist() == [[1.0, 0.0, 1.0], [0.5, 0.5, -1.0], [0.0, 0.0, 0.5]]
+
+
+def test_compiled_constraints():
+    circle = Constraint("circular", {"center": [0, 0], "radius": 1.0})
+    rotation = Constraint("rotational", {"min": 0, "max": 1})
+    constraints = [[circle, rotation], [rotation]]
+    compiled = CompiledConstraints(constraints)
+    assert compiled.codes.tolist() == [[1, 2], [2, -1]]
+
+    poses = [[3.0, 0.0, 2.0], [0.5, 0.5, -1.0]]
+    assert compiled.project(poses).tolist() == [[-1.0, 0.0, 1.0], [0.5, 0.5, 0.0]]
+
+    geometry = circle.geometry
+    geometry["radius"] = 2.0
+    circle.geometry = geometry
+    assert compiled.refresh(constraints)
+    assert compiled.project(poses).tolist() == [[-2.0, 0.0, 1.0], [0.5, 0.5, 0.0]]
+    assert not compiled.refresh([[circle], [rotation]])
+
+    again, copies = pickle.loads(pickle.dumps((compiled, constraints)))
+    assert again.refresh(copies)
+    assert again.project(poses).tolist() == compiled.project(poses).tolist()
+
+
+def test_pack_geometry():
+    geometry = {"center": [1.0, -2.0], "radius": 0.5}
+    code, params = pack_geometry("circular", geometry)
+    assert (code, params) == (1, [1.0, -2.0, 0.5, 0.0])
+    assert unpack_geometry(code, params) == ("circular", geometry)
+    assert pack_geometry("triangular", {}) == (-1, [0.0, 0.0, 0.0, 0.0])
+
+
+def test_scene(tmpdir):
+    query = {
+        "surface": {"path": "surface.urdf", "z offset": 0.5, "area": 50.0},
+        "obstacles": {
+            "wall": {"path": "wall.urdf", "pose": [0, 1, 0], "z offset": 0.5, "area": 2}
+        },
+        "originals": {
+            "cube": {
+                "path": "cube.urdf",
+                "pose": [1.0, 2.0, 0.5],
+                "z offset": 0.5,
+                "area": 1.0,
+                "constraints": {
+                    "rot_const": {
+                        "shape": "rotational",
+                        "geometry": {"min": 0.0, "max": 1.0},
+                    }
+                },
+            }
+        },
+        "news": {"new": {"path": "cube.urdf", "z offset": 0.5, "area": 1.0}},
+    }
+    scene = Scene.from_json(query)
+    assert len(scene) == 4
+    assert scene.kinds.tolist() == [0, 1, 2, 3]
+    assert scene.urdfs.tolist() == ["cube.urdf", "surface.urdf", "wall.urdf"]
+    assert scene.get_path(3) == "cube.urdf"
+    assert np.isnan(scene.poses[3]).all()
+    assert [name for name, _ in scene.get_constraints(2)] == ["rot_const"]
+
+    path = str(tmpdir.join("scene.npz"))
+    scene.save(path)
+    assert Scene.load(path).to_json() == query
+
+
+def test_stats():
+    stats = Stats()
+    stats.count("stepSimulation", 10)
+    stats.count("stepSimulation")
+    stats.evaluate("inner")
+    with stats.timer("push_bodies"):
+        pass
+    ans = stats.to_dict()
+    assert ans["calls"] == {"stepSimulation": 11}
+    assert ans["evaluations"] == {"inner": 1}
+    assert ans["times"]["push_bodies"] >= 0
+    total = Stats()
+    total.merge(ans)
+    total.merge(ans)
+    assert total.calls == {"stepSimulation": 22}
+    assert total.evaluations == {"inner": 2}
+    assert total.times["push_bodies"] == 2 * ans["times"]["push_bodies"]
+    stats.reset()
+    assert stats.to_dict() == {"calls": {}, "times": {}, "evaluations": {}}
+
+
+def test_image_writer(tmpdir):
+    writer = ImageWriter()
+    path = str(tmpdir.join("image.png"))
+    writer.save(np.full((4, 6, 4), 255, dtype=np.uint8), path)
+    writer.save(np.zeros((4, 6, 4), dtype=np.uint8), str(tmpdir.join("no/a.png")))
+    with pytest.raises(IOError):
+        writer.flush()
+    writer.close()
+    assert os.path.isfile(path)
+    assert writer.pending == 0
+    with pytest.raises(ValueError):
+        writer.save(np.zeros((4, 6, 4), dtype=np.uint8), path)
+
+
+def test_image_writer_without_pil(tmpdir, monkeypatch):
+    monkeypatch.setitem(sys.modules, "PIL", None)
+    writer = ImageWriter()
+    writer.save(np.zeros((4, 6, 4), dtype=np.uint8), str(tmpdir.join("a.png")))
+    with pytest.raises(ImportError):
+        writer.flush()
+    writer.close()
+    assert writer.pending == 0
+
+
+def test_pairwise_penetration_cache(engine):
+    configuration = engine.configuration
+    severity = engine.get_collision_info(configuration)["severity"]
+    calls = get_calls(engine, "getClosestPoints")
+    assert engine.get_collision_info(configuration)["severity"] == severity
+    assert get_calls(engine, "getClosestPoints") == calls
+
+    body = configuration.movable[0]
+    pose = body.pose
+    body.pose = [pose[0] + 0.05, pose[1], pose[2]]
+    severity = engine.get_collision_info(configuration)["severity"]
+    pairs = engine.get_candidate_pairs(configuration)
+    moved = [pair for pair in pairs if body in pair]
+    assert moved
+    assert get_calls(engine, "getClosestPoints") == calls + len(moved)
+
+    calls = get_calls(engine, "getClosestPoints")
+    engine.clear_collision_cache()
+    assert engine.get_collision_info(configuration)["severity"] == severity
+    assert get_calls(engine, "getClosestPoints") == calls + len(pairs)
+
+
+def get_penetration_matrices(engine, configuration):
+    matrices = []
+    for collision_method in ["closest", "contacts"]:
+        engine.collision_method = collision_method
+        engine.clear_collision_cache()
+        matrices.append(engine.get_penetration_matrix(configuration).copy())
+
+    return matrices
+
+
+def test_contact_pairs(engine):
+    configuration = engine.configuration
+    closest, contacts = get_penetration_matrices(engine, configuration)
+    assert closest.any()
+    assert np.array_equal(contacts, closest)
+    assert get_calls(engine, "getContactPoints") == 1
+
+    pairs = engine.get_contact_pairs(configuration)
+    assert len(pairs) < len(engine.get_candidate_pairs(configuration))
+    assert all(y not in configuration.obstacles for _, y in pairs)
+
+    for _ in range(2):
+        engine.push_bodies(configuration)
+        closest, contacts = get_penetration_matrices(engine, configuration)
+        assert np.array_equal(contacts, closest)
+
+
+def get_rgba(body):
+    shape = p.getVisualShapeData(body.bid, physicsClientId=body.eid)[0]
+    return [round(x, 6) for x in shape[7]]
+
+
+def test_lazy_colors(engine):
+    configuration = engine.configuration
+    assert engine.lazy_colors
+    calls = get_calls(engine, "changeVisualShape")
+    colliding = engine.get_collision_info(configuration)["list"]
+    body = [x for x in configuration.movable if x in colliding][0]
+    assert get_calls(engine, "changeVisualShape") == calls
+    assert get_rgba(body) == body.init_color
+
+    engine.get_image(32, 32)
+    assert body.color == [1.0, 1.0, 0.0, 1.0]
+    assert get_rgba(body) == body.color
+
+    body.reset_color()
+    engine.get_collision_info(configuration)
+    assert get_rgba(body) == body.init_color
+    engine.flush_colors()
+    assert get_rgba(body) == [1.0, 1.0, 0.0, 1.0]
+
+
+def test_trusted_setters(engine):
+    configuration = engine.configuration
+    index = 2
+    body = configuration.movable[index]
+    body._set_pose([1.0, -0.5, 0.25])
+    assert configuration.poses[index].tolist() == body.pose
+    assert body.pose == pytest.approx([1.0, -0.5, 0.25])
+    pos, orn = p.getBasePositionAndOrientation(body.bid, physicsClientId=body.eid)
+    assert list(pos) == pytest.approx([1.0, -0.5, body.z_off])
+    assert list(orn) == pytest.approx(to_quaternion([0, 0, 0.25]))
+
+    body._set_pose([100.0, 100.0, 0.0])
+    assert configuration.poses[index].tolist() == body.pose
+    assert body.pose[0] < 100.0 and body.pose[1] < 100.0
+    pos, _ = p.getBasePositionAndOrientation(body.bid, physicsClientId=body.eid)
+    assert list(pos) == pytest.approx(body.pose[:2] + [body.z_off])
+
+    body._set_color([0.0, 1.0, 0.0, 1.0])
+    assert body.color == [0.0, 1.0, 0.0, 1.0]
+    assert get_rgba(body) == body.color
+
+
+def test_body_reuse(engine):
+    with open(QUERY) as query_file:
+        query = json.load(query_file)
+    configuration = engine.configuration
+    engine.get_collision_info(configuration)
+    engine.flush_colors()
+    body = configuration.originals[0]
+    body.pose = [1.0, 1.0, 0.5]
+    body.add_constraint(Constraint("circular", {"center": [1.0, 1.0], "radius": 0.0}))
+    bids = set(x.bid for x in configuration.collidable)
+
+    query["news"] = dict(list(query["news"].items())[:3])
+    calls = get_calls(engine, "loadURDF")
+    configuration = engine.load_configuration(query)
+    assert get_calls(engine, "loadURDF") == calls
+    assert configuration.originals[0].pose == query["originals"][body.name]["pose"]
+    for body in configuration.collidable:
+        pos, orn = p.getBasePositionAndOrientation(body.bid, physicsClientId=body.eid)
+        assert list(pos) == pytest.approx(body.pose[:2] + [body.z_off])
+        orientation = to_quaternion([0, 0, body.pose[2]])
+        assert abs(np.dot(orn, orientation)) == pytest.approx(1.0)
+        assert get_rgba(body) == body.init_color
+        assert len(body.constraints) == 1
+
+    parked = bids - set(x.bid for x in configuration.collidable)
+    assert len(parked) == 25
+    pairs = engine.get_candidate_pairs(configuration)
+    assert pairs and not [x for pair in pairs for x in pair if x.bid in parked]
+    p.performCollisionDetection(physicsClientId=engine.eid)
+    for bid in parked:
+        assert not p.getContactPoints(bid, physicsClientId=engine.eid)
+
+
+def test_snapshot(engine):
+    configuration = engine.configuration
+    poses = configuration.poses.tolist()
+    severity = engine.get_collision_info(configuration)["severity"]
+    pairs = engine.get_candidate_pairs(configuration)
+    sid = engine.snapshot()
+
+    modified = copy.deepcopy(configuration)
+    engine.push_bodies(modified)
+    assert modified.poses.tolist() != poses
+    assert engine.get_candidate_pairs(configuration) != pairs
+
+    engine.restore(sid)
+    engine.remove_snapshot(sid)
+    for body, pose in zip(configuration.movable, poses):
+        pos, _ = p.getBasePositionAndOrientation(body.bid, physicsClientId=body.eid)
+        assert list(pos[:2]) == pytest.approx(pose[:2])
+    assert engine.get_candidate_pairs(configuration) == pairs
+    assert engine.get_collision_info(configuration)["severity"] == severity
+    assert configuration.poses.tolist() == poses
+
+
+def test_configuration_snapshot(engine):
+    configuration = engine.configuration
+    body = configuration.movable[0]
+    key = configuration.get_key()
+    snapshot = configuration.snapshot()
+    assert snapshot[0].tolist() == configuration.poses.tolist()
+    assert snapshot[0] is not configuration.poses
+
+    configuration.set_poses(np.random.uniform(-0.5, 0.5, configuration.poses.shape))
+    body.add_constraint(Constraint("circular", {"center": [0.0, 0.0], "radius": 0.1}))
+    constraint = configuration.movable[1].constraints[0]
+    geometry = constraint.geometry
+    constraint.geometry = dict(geometry, **{"min x": 0.0, "max x": 1.0})
+    assert configuration.get_key() != key
+
+    configuration.restore(snapshot)
+    assert configuration.get_key() == key
+    assert constraint.geometry is geometry
+    assert len(body.constraints) == 1
+    assert body.pose == snapshot[0][0].tolist()
+    pos, _ = p.getBasePositionAndOrientation(body.bid, physicsClientId=body.eid)
+    assert list(pos[:2]) == pytest.approx(snapshot[0][0, :2])
+
+
+@pytest.mark.parametrize("protocol", [0, pickle.HIGHEST_PROTOCOL])
+def test_pickle_configuration(engine, protocol):
+    configuration = engine.configuration
+    again = pickle.loads(pickle.dumps(configuration, protocol))
+    assert again.get_key() == configuration.get_key()
+    assert [x.name for x in again.collidable] == [
+        x.name for x in configuration.collidable
+    ]
+
+    # The bodies still store their poses in the pose array of the copy
+    again.poses[0] = [0.1, 0.2, 0.3]
+    assert again.movable[0].pose == [0.1, 0.2, 0.3]
+    assert configuration.movable[0].pose != [0.1, 0.2, 0.3]
+
+
+def test_replicate(engine):
+    configuration = engine.configuration
+    configuration.movable[0].pose = [0.5, 0.5, 1.0]
+    replica = engine.replicate()
+    try:
+        assert replica.eid != engine.eid
+        moved = copy.deepcopy(configuration)
+        moved.movable[1].pose = [-0.5, 0.5, 0.0]
+        for source in [configuration, moved]:
+            bound = replica.bind(source)
+            assert [x.eid for x in bound.collidable] == [replica.eid] * len(
+                bound.collidable
+            )
+            info = engine.get_collision_info(source)
+            again = replica.get_collision_info(bound)
+            assert again["number"] == info["number"] > 0
+            assert again["severity"] == pytest.approx(info["severity"])
+            names = sorted(x.name for x in info["list"])
+            assert sorted(x.name for x in again["list"]) == names
+    finally:
+        replica.disconnect()
+
+
+def get_pool_info(engine, configuration):
+    info = engine.get_collision_info(engine.bind(configuration))
+    return info["number"], info["severity"], np.random.randint(2 ** 30)
+
+
+def push_pool_bodies(engine, configuration):
+    configuration = engine.bind(configuration)
+    engine.push_bodies(configuration)
+    return configuration
+
+
+def test_engine_pool(engine):
+    configuration = engine.configuration
+    moved = copy.deepcopy(configuration)
+    moved.movable[1].pose = [-0.5, 0.5, 0.0]
+    pool = EnginePool(engine, 2)
+    try:
+        evaluations = engine.stats.evaluations.get("other", 0)
+        results = pool.map(get_pool_info, [configuration, moved] * 2, [1, 2, 1, 2])
+        assert results[:2] == results[2:]
+        assert engine.stats.evaluations["other"] == evaluations + 4
+        for source, (number, severity, draw) in zip([configuration, moved], results):
+            info = engine.get_collision_info(source)
+            assert number == info["number"] > 0
+            assert severity == pytest.approx(info["severity"])
+        np.random.seed(1)
+        assert results[0][2] == np.random.randint(2 ** 30)
+
+        # Pushes in one worker do not leak into later evaluations
+        pushed = [engine.bind(x) for x in pool.map(push_pool_bodies, [moved] * 4)]
+        assert [x.poses.tolist() for x in pushed[1:]] == [pushed[0].poses.tolist()] * 3
+        assert [x.eid for x in pushed[0].collidable] == [engine.eid] * len(
+            pushed[0].collidable
+        )
+        assert pool.map(get_pool_info, [moved], [2]) == results[1:2]
+    finally:
+        pool.close()
+
+
+def test_aabb_info(engine):
+    body = engine.configuration.movable[0]
+    info = body.aabb_info
+    assert body.aabb_info == info
+    body._set_pose([1.0, -1.0, 0.0])
+    moved = body.aabb_info
+    assert moved != info
+    assert moved["min x"] < 1.0 < moved["max x"]
+    assert moved["min y"] < -1.0 < moved["max y"]
+    aabb_min, aabb_max = p.getAABB(body.bid, physicsClientId=body.eid)
+    assert [moved["min x"], moved["max x"]] == pytest.approx(
+        [aabb_min[0], aabb_max[0]], abs=1e-3
+    )
+
+
+def test_push_bodies():
+    with open(QUERY) as query_file:
+        example = json.load(query_file)
+    path = example["originals"]["org_cube_1"]["path"]
+
+    def cube(x, **kwargs):
+        body = {"path": path, "pose": [x, 1.0, 0], "z offset": 0.5, "area": 1}
+        body.update(kwargs)
+        return body
+
+    engine = Engine()
+    engine.connect(False)
+    try:
+        query = {
+            "surface": example["surface"],
+            "obstacles": example["obstacles"],
+            "originals": {},
+            "news": {"a": cube(2.0), "b": cube(2.4)},
+        }
+        configuration = engine.load_configuration(query)
+        assert engine.get_collision_info(configuration)["severity"] > 0
+        engine.push_bodies(configuration)
+        assert engine.get_collision_info(configuration)["severity"] == 0
+        gap = configuration.poses[1, 0] - configuration.poses[0, 0]
+        assert gap >= 1.0 - engine.collision_threshold
+
+        pin = {"shape": "circular", "geometry": {"center": [0.6, 1.0], "radius": 0.0}}
+        query["obstacles"]["obs_cube"] = cube(0.0)
+        query["news"] = {"a": cube(0.6, constraints={"pin": pin})}
+        configuration = engine.load_configuration(query)
+        severity = engine.get_collision_info(configuration)["severity"]
+        assert severity > 0
+        engine.stats.reset()
+        engine.push_bodies(configuration, batch_size=10, window=5)
+        assert engine.stats.to_dict()["calls"]["stepSimulation"] <= 10 * 5
+        assert engine.get_collision_info(configuration)["severity"] == pytest.approx(
+            severity, abs=1e-3
+        )
+    finally:
+        engine.disconnect()
+
+
+def test_separate_bodies(engine):
+    configuration = engine.configuration
+    assert all(body.footprint is not None for body in configuration.collidable)
+    severity = engine.get_collision_info(configuration)["severity"]
+    engine.stats.reset()
+    engine.separate_bodies(configuration)
+    assert "stepSimulation" not in engine.stats.to_dict()["calls"]
+    assert engine.get_collision_info(configuration)["severity"] < 0.1 * severity
+    for body in configuration.movable:
+        pos, _ = p.getBasePositionAndOrientation(body.bid, physicsClientId=body.eid)
+        assert list(pos[:2]) == pytest.approx(body.pose[:2])
+
+
+def test_engine_penetration_matrix(engine):
+    configuration = engine.configuration
+    matrix = engine.get_penetration_matrix(configuration)
+    assert matrix.shape == (len(configuration.collidable),) * 2
+    assert (matrix == matrix.T).all()
+    assert not np.diagonal(matrix).any()
+    assert not matrix.flags.writeable
+
+    info = engine.get_collision_info(configuration)
+    in_collision = np.triu(matrix > engine.collision_threshold)
+    assert np.sum(matrix[in_collision]) == pytest.approx(info["severity"])
+    assert np.count_nonzero(in_collision) == info["number"]
+    scores = engine.get_collision_scores(configuration)
+    assert np.sum(scores) == pytest.approx(2 * info["severity"])
+    assert engine.get_penetration_matrix(configuration) is matrix
+
+    k = int(np.argmax(scores))
+    body = configuration.collidable[k]
+    assert body in configuration.movable
+    body.pose = [4.5, 2.0, 0.0]
+    moved = engine.get_penetration_matrix(configuration)
+    assert moved is not matrix
+    assert moved[k].sum() < matrix[k].sum()
+
+
+def test_candidate_pairs(engine):
+    with open(QUERY) as query_file:
+        query = json.load(query_file)
+    obstacle = query["obstacles"]["obs_cylinder_1"]
+    query["obstacles"]["obs_cylinder_2"] = dict(obstacle, pose=[0.5, 0.0, 0.0])
+    query["originals"]["org_cube_1"]["pose"] = [0.25, 0.0, 0.0]
+    configuration = engine.load_configuration(query)
+
+    obstacles = configuration.obstacles
+    assert len(obstacles) == 2
+    pairs = engine.get_candidate_pairs(configuration)
+    assert pairs
+    assert not [x for x in pairs if x[0] in obstacles and x[1] in obstacles]
+    assert len([x for x in pairs if configuration.originals[0] in x]) >= 2
+
+    matrix = engine.get_penetration_matrix(configuration)
+    assert matrix[0, 1] > 0.4
+
+
+def test_configuration_size(engine):
+    configuration = engine.configuration
+    configuration.compiled_constraints
+    size = sys.getsizeof(configuration)
+    bodies = sum(sys.getsizeof(x) for x in configuration.collidable)
+    assert size > bodies > configuration.poses.nbytes
+    assert sys.getsizeof(copy.deepcopy(configuration)) == pytest.approx(size, rel=0.1)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pytest
+import json
+import os
+import time
+import numpy as np
+import rearrangement
+from rearrangement.physics import Engine
+from rearrangement.placement import Middle, ProcessExecutor
+from rearrangement.placement.middle import (
+    create_pose,
+    get_free_cells,
+    get_reach,
+    get_square,
+)
+from rearrangement.search import Executor, LocalSearch, TranspositionTable
+
+QUERY = os.path.join(
+    os.path.dirname(rearrangement.__file__), "data", "example-query.json"
+)
+
+
+class RestartedMiddle(Middle):
+    """Middle that gives no successors until it has restarted once."""
+
+    restarts = 0
+
+    def get_starts(self, state):
+        if not self.restarts:
+            return []
+        return super(RestartedMiddle, self).get_starts(state)
+
+    def get_random_restart(self, attempts=10):
+        self.restarts += 1
+        return super(RestartedMiddle, self).get_random_restart(attempts)
+
+
+def solve_middle(workers, news=16, table=None, problem=Middle):
+    with open(QUERY) as query_file:
+        query = json.load(query_file)
+    query["news"] = dict(list(query["news"].items())[:news])
+
+    np.random.seed(0)
+    engine = Engine()
+    engine.connect(False)
+    configuration = engine.load_configuration(query)
+    if workers is None:
+        executor = None
+    else:
+        executor = ProcessExecutor(engine, workers) if workers else Executor()
+    middle = problem(
+        configuration,
+        engine,
+        start_time=time.time(),
+        table=table,
+        executor=executor,
+    )
+    solution = LocalSearch(
+        middle, start_time=time.time(), random_restart=problem is not Middle
+    ).simple()
+    if executor is not None:
+        executor.close()
+    value = middle.get_value(solution)
+    engine.disconnect()
+
+    return solution.poses.tolist(), value, np.random.rand()
+
+
+def test_middle_workers():
+    poses, value, draw = solve_middle(None)
+    assert value[0] == 0
+    assert solve_middle(0) == (poses, value, draw)
+    assert solve_middle(2) == (poses, value, draw)
+
+
+def test_middle_workers_restart():
+    poses, value, draw = solve_middle(0, problem=RestartedMiddle)
+    assert value[0] == 0
+    assert solve_middle(2, problem=RestartedMiddle) == (poses, value, draw)
+    assert solve_middle(None, problem=RestartedMiddle) == (poses, value, draw)
+
+
+def test_middle_table():
+    result = solve_middle(None)
+    table = TranspositionTable(2 ** 22)
+    assert solve_middle(None, table=table) == result
+    assert table.hits > 0
+
+
+def test_free_cells():
+    with open(QUERY) as query_file:
+        query = json.load(query_file)
+    query["news"] = {}
+
+    np.random.seed(0)
+    engine = Engine()
+    engine.connect(False)
+    try:
+        configuration = engine.load_configuration(query)
+        occupancy = engine.get_occupancy(configuration)
+        body = [x for x in configuration.originals if x.name == "org_cube_1"][0]
+        reach = get_reach(body)
+        assert reach == pytest.approx(np.sqrt(0.5))
+
+        cells = get_free_cells(4, configuration, body)
+        free_cells = get_free_cells(4, configuration, body, occupancy)
+        assert 0 < len(free_cells) < len(cells)
+        for cell in free_cells:
+            square = get_square(create_pose(cell, "center"), reach)
+            assert occupancy.is_free(square)
+
+        middle = Middle(configuration, engine, start_time=time.time())
+        restart = middle.get_random_restart()
+        squares = [get_square(x.pose, get_reach(x)) for x in restart.movable]
+        assert not occupancy.screen(squares).any()
+    finally:
+        engine.disconnect()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+import pytest
+
+from rearrangement import TEMP_PATH, make_dirs
+
+collision = pytest.importorskip("rearrangement.planning.dlvhex.collision")
+
+
+def test_shared_engine():
+    engine = collision.get_engine(False, 0.01)
+    assert collision.get_engine(False, 0.02) is engine
+    assert engine.collision_threshold == 0.02
+    collision.release_engine(engine)
+    assert engine.connected
+
+    collision.close_engine()
+    assert not engine.connected
+    assert collision._ENGINE is None
+    collision.close_engine()
+
+    again = collision.get_engine(False, 0.01)
+    assert again is not engine and again.connected
+    collision.close_engine()
+    assert not again.connected
+
+
+def test_released_stats():
+    make_dirs(TEMP_PATH)
+    path = TEMP_PATH + "/collision_stats.json"
+    engine = collision.get_engine(False, 0.01)
+    try:
+        engine.stats.count("stepSimulation", 3)
+        collision.release_engine(engine)
+        engine.stats.count("stepSimulation", 2)
+        collision.release_engine(engine)
+        with open(path) as stats_file:
+            calls = json.load(stats_file)["calls"]
+        assert calls["stepSimulation"] >= 5
+        assert engine.stats.to_dict()["calls"] == {}
+    finally:
+        collision.close_engine()
+        os.remove(path)
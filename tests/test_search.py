@@ -3,7 +3,46 @@
 
 import pytest
 import random
-from rearrangement.search import pairwise_comparison, multiple_comparison
+import time
+import numpy as np
+from rearrangement.search import (
+    pairwise_comparison,
+    multiple_comparison,
+    Executor,
+    LocalSearch,
+    Problem,
+    TranspositionTable,
+)
+
+
+class Countdown(Problem):
+    """Counts down to zero, one or two at a time."""
+
+    deterministic = True
+
+    def __init__(self, init_state, table=None, executor=None):
+        self.evaluations = 0
+        self.expansions = 0
+        super(Countdown, self).__init__(
+            init_state, False, False, table=table, executor=executor
+        )
+
+    def get_successors(self, state):
+        self.expansions += 1
+        return [state - 1, state - 2]
+
+    def get_starts(self, state):
+        return [state - 1, state - 2]
+
+    def get_successor(self, start):
+        return start
+
+    def get_value(self, state):
+        self.evaluations += 1
+        return abs(state)
+
+    def get_key(self, state):
+        return state
 
 
 def test_pairwise_comparison_minimize():
@@ -24,3 +63,66 @@ def test_multiple_comparison_maximize():
     tuples = [(3, 3, 4, 9), (2, 4, 4, 9), (2, 3, 5, 9), (2, 3, 4, 10)]
     random.shuffle(tuples)
     assert multiple_comparison(tuples, find_min=True) == (2, 3, 4, 10)
+
+
+def test_transposition_table():
+    table = TranspositionTable()
+    table.set_value("a", 1)
+    table.set_successors("a", [[0]])
+    table.set_value("b", 2)
+    assert table.get_value("a") == 1
+    nbytes = table.nbytes
+    table.max_bytes = nbytes
+    table.set_value("c", 3)
+    assert "a" in table and "b" not in table
+    assert table.nbytes == nbytes
+    assert table.get_successors("a") == [[0]]
+    assert table.get_successors("a") is not table.get_successors("a")
+    assert table.get_value("b") is None
+    assert table.to_dict() == {
+        "size": 2,
+        "bytes": nbytes,
+        "hits": 4,
+        "misses": 1,
+        "evictions": 1,
+    }
+
+    table.set_successors("d", [np.zeros(nbytes)])
+    assert len(table) == 0 and table.nbytes == 0
+    assert table.evictions == 4
+
+
+def test_local_search_memoization():
+    table = TranspositionTable()
+    problem = Countdown(10, table)
+    assert LocalSearch(problem, start_time=time.time()).simple() == 0
+    evaluations, expansions = problem.evaluations, problem.expansions
+    assert LocalSearch(problem, start_time=time.time()).simple() == 0
+    assert (problem.evaluations, problem.expansions) == (evaluations, expansions)
+    assert table.hits > 0
+
+    problem = Countdown(10)
+    assert LocalSearch(problem, start_time=time.time()).simple() == 0
+    assert problem.evaluations == evaluations
+
+
+def test_executor():
+    problem = Countdown(10, executor=Executor())
+    assert Executor().map(problem, [3, -1]) == [(3, 3), (-1, 1)]
+    assert LocalSearch(problem, start_time=time.time()).simple() == 0
+    assert problem.expansions == 0
+
+
+def test_executor_seeds():
+    problem = Countdown(10)
+    executor = Executor()
+    seeds = executor.get_seeds(problem, [3, 3, -1])
+    assert seeds == executor.get_seeds(problem, [3, 3, -1])
+    assert len(set(seeds)) == 3
+    assert Executor(1).get_seeds(problem, [3]) != seeds[:1]
+
+    np.random.seed(0)
+    draw = np.random.rand()
+    np.random.seed(0)
+    executor.map(problem, [3, -1])
+    assert np.random.rand() == draw
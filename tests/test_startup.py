@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ["matplotlib", "pandas", "PIL"]
+
+# Generous bound on the wall-clock time of a fresh interpreter importing the
+# placement and planning packages; it only catches gross regressions
+MAX_STARTUP_TIME = 5.0
+
+HELP = """
+import runpy
+sys.argv = ["main.py", "--help"]
+sys.stdout = open(os.devnull, "w")
+try:
+    runpy.run_path("main.py", run_name="__main__")
+except SystemExit:
+    pass
+sys.stdout = sys.__stdout__
+"""
+
+
+def get_loaded(statement, modules):
+    """Runs statement in a fresh interpreter at the repository root, and returns
+    which of modules it loaded, the directories it created, and the wall-clock
+    time it took."""
+
+    code = "\n".join(
+        [
+            "import os, sys",
+            "created = []",
+            "os.makedirs = lambda path, *args, **kwargs: created.append(path)",
+            statement,
+            "print(([x for x in {} if x in sys.modules], created))".format(modules),
+        ]
+    )
+
+    start = time.time()
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=ROOT)
+    elapsed = time.time() - start
+
+    # pybullet prints its build time on import
+    loaded, created = eval(output.decode().strip().splitlines()[-1])
+    return loaded, created, elapsed
+
+
+def test_import_is_lazy():
+    loaded, created, elapsed = get_loaded(
+        "import rearrangement.placement, rearrangement.planning", HEAVY
+    )
+    assert loaded == []
+    assert created == []
+    assert elapsed < MAX_STARTUP_TIME
+
+
+def test_help_is_lazy():
+    loaded, created, _ = get_loaded(HELP, HEAVY + ["pybullet", "numpy"])
+    assert loaded == []
+    assert created == []
+
+
+def test_make_dirs(tmpdir):
+    from rearrangement import make_dirs
+
+    path = str(tmpdir.join("debug"))
+    make_dirs(path, path)
+    assert os.path.isdir(path)